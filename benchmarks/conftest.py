@@ -0,0 +1,97 @@
+"""Generators for synthetic inputs shared by the benchmarks."""
+
+from datetime import datetime, timedelta, timezone
+import functools
+from typing import List
+
+
+CALENDAR_START = datetime(2020, 1, 6, tzinfo=timezone.utc)
+
+
+def _format(timestamp: datetime) -> str:
+    return timestamp.strftime('%Y%m%dT%H%M%SZ')
+
+
+@functools.lru_cache(maxsize=None)
+def synthetic_calendar(count: int) -> bytes:
+    """Create a calendar spanning roughly a year with many recurrences.
+
+    Half of the events recur, either daily, weekly on several days, or
+    monthly. Some recurring events have exceptions and modified
+    occurrences.
+    """
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0',
+             'PRODID:-//autosuspend//benchmarks//EN']
+    for i in range(count):
+        start = CALENDAR_START + timedelta(hours=(i * 7) % (365 * 24))
+        uid = 'event-{}@autosuspend'.format(i)
+        lines += ['BEGIN:VEVENT', 'UID:' + uid,
+                  'SUMMARY:Event {}'.format(i),
+                  'DTSTAMP:' + _format(CALENDAR_START)]
+        lines += ['DTSTART:' + _format(start),
+                  'DTEND:' + _format(start + timedelta(minutes=45))]
+        if i % 2 == 1:
+            lines.append([
+                'RRULE:FREQ=DAILY;COUNT=200',
+                'RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR;UNTIL=20211231T000000Z',
+                'RRULE:FREQ=MONTHLY;INTERVAL=1',
+            ][(i // 2) % 3])
+            if i % 6 == 1:
+                lines.append('EXDATE:' + _format(start + timedelta(days=1)))
+        lines.append('END:VEVENT')
+        if i % 2 == 1 and i % 6 == 3:
+            # move the occurrence of the following day
+            moved = start + timedelta(days=1)
+            lines += ['BEGIN:VEVENT', 'UID:' + uid,
+                      'SUMMARY:Moved event {}'.format(i),
+                      'DTSTAMP:' + _format(CALENDAR_START),
+                      'RECURRENCE-ID:' + _format(moved),
+                      'DTSTART:' + _format(moved + timedelta(hours=2)),
+                      'DTEND:' + _format(moved + timedelta(hours=3)),
+                      'END:VEVENT']
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(lines).encode('utf-8')
+
+
+def synthetic_smbstatus(connections: int) -> str:
+    """Create output of ``smbstatus -b`` with the given connections."""
+    lines = ['',
+             'Samba version 4.7.6-Ubuntu',
+             'PID     Username     Group        Machine'
+             '                                   Protocol Version  '
+             'Encryption           Signing',
+             '-' * 120]
+    for i in range(connections):
+        lines.append(
+            '{:<7} user{:<8} group{:<7} 192.168.0.{:<3} '
+            '(ipv4:192.168.0.{}:{})     SMB3_11           -'
+            '                    partial(AES-128-CMAC)'.format(
+                1000 + i, i, i, i % 255, i % 255, 40000 + i))
+    return '\n'.join(lines) + '\n'
+
+
+def synthetic_xml(elements: int) -> bytes:
+    """Create a nested XML document with the given number of leaves."""
+    parts = ['<root>']
+    for i in range(elements):
+        parts.append(
+            '<group id="{0}"><item state="{1}" name="item{0}">'
+            '<value>{0}</value></item></group>'.format(
+                i, 'active' if i == elements - 1 else 'idle'))
+    parts.append('</root>')
+    return ''.join(parts).encode('utf-8')
+
+
+class FakeProcess:
+
+    def __init__(self, pid: int) -> None:
+        self.info = {
+            'pid': pid,
+            'name': 'process{}'.format(pid),
+            'username': 'user{}'.format(pid % 50),
+        }
+
+
+def synthetic_process_table(count: int) -> List[FakeProcess]:
+    """Create process objects as returned by :func:`psutil.process_iter`."""
+    return [FakeProcess(pid) for pid in range(1, count + 1)]
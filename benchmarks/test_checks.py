@@ -0,0 +1,73 @@
+import pytest
+
+from autosuspend.checks.activity import Processes, Smb, XPath
+from autosuspend.util import processes
+
+from .conftest import (synthetic_process_table,
+                       synthetic_smbstatus,
+                       synthetic_xml)
+
+
+@pytest.mark.parametrize('connections', [0, 10, 1000])
+def test_smb_parsing(benchmark, connections) -> None:
+    output = synthetic_smbstatus(connections)
+    check = Smb('bench')
+
+    benchmark(check._evaluate, output)
+
+
+class _Reply:
+
+    def __init__(self, content: bytes) -> None:
+        self.content = content
+
+
+@pytest.mark.parametrize('elements', [100, 10000, 100000])
+@pytest.mark.parametrize('changed', [True, False],
+                         ids=['changed', 'unchanged'])
+def test_xpath_evaluate(benchmark, mocker, elements, changed) -> None:
+    """Evaluate an expression on a large document.
+
+    Unchanged documents are only parsed once.
+    """
+    content = synthetic_xml(elements)
+    check = XPath('bench', url='http://localhost/', timeout=5,
+                  xpath='/root/group/item[@state="active"]')
+    reply = _Reply(content)
+    mocker.patch.object(check, 'request', side_effect=lambda: (
+        _Reply(content) if changed else reply))
+
+    assert benchmark(check.evaluate)
+
+
+@pytest.fixture(params=[1000, 10000])
+def process_table(request, mocker):
+    table = synthetic_process_table(request.param)
+    mocker.patch('psutil.process_iter', side_effect=lambda attrs: iter(table))
+    return table
+
+
+def test_processes_no_match(benchmark, process_table) -> None:
+    check = Processes('bench', ['missing{}'.format(i) for i in range(10)])
+
+    assert benchmark(check.check) is None
+
+
+def test_processes_shared_snapshot(benchmark, process_table) -> None:
+    """Several process checks evaluated in the same iteration."""
+    checks = [Processes('bench{}'.format(i), ['missing{}'.format(i)])
+              for i in range(10)]
+
+    def iteration() -> None:
+        with processes.iteration_scope():
+            for check in checks:
+                check.check()
+
+    benchmark(iteration)
+
+
+def test_processes_names_of_user(benchmark, process_table) -> None:
+    def lookup() -> None:
+        processes.snapshot(['name', 'username']).names_of_user('user7')
+
+    benchmark(lookup)
@@ -0,0 +1,35 @@
+from datetime import timedelta
+from io import BytesIO
+
+import pytest
+
+from autosuspend.util import ical
+
+from .conftest import CALENDAR_START, synthetic_calendar
+
+
+WINDOW_START = CALENDAR_START + timedelta(days=30)
+WINDOW_END = WINDOW_START + timedelta(days=7)
+
+SIZES = [10, 1000, 50000]
+
+
+def _list_events(data: bytes) -> None:
+    ical.list_calendar_events(BytesIO(data), WINDOW_START, WINDOW_END)
+
+
+@pytest.mark.parametrize('count', SIZES)
+def test_list_calendar_events_cold(benchmark, count) -> None:
+    """Parse and expand a calendar not seen before."""
+    data = synthetic_calendar(count)
+    benchmark.pedantic(_list_events, args=(data,),
+                       setup=ical._parsed_cache.clear,
+                       rounds=1 if count >= 50000 else 5)
+
+
+@pytest.mark.parametrize('count', SIZES)
+def test_list_calendar_events_warm(benchmark, count) -> None:
+    """Look up events in an unchanged calendar from a previous iteration."""
+    data = synthetic_calendar(count)
+    _list_events(data)
+    benchmark(_list_events, data)
@@ -0,0 +1,49 @@
+import concurrent.futures
+from datetime import datetime, timezone
+import time
+from typing import Optional
+
+import pytest
+
+import autosuspend
+
+
+class _StubCheck(autosuspend.Activity):
+
+    @classmethod
+    def create(cls, name, config):
+        pass
+
+    def __init__(self, name: str, delay: float) -> None:
+        autosuspend.Activity.__init__(self, name)
+        self._delay = delay
+
+    def check(self) -> Optional[str]:
+        if self._delay:
+            time.sleep(self._delay)
+        return None
+
+
+@pytest.fixture(params=['sequential', 'concurrent', 'asyncio'])
+def pool(request):
+    pool = {
+        'sequential': lambda: None,
+        'concurrent': lambda: concurrent.futures.ThreadPoolExecutor(
+            max_workers=4),
+        'asyncio': lambda: autosuspend.AsyncioExecutor(max_workers=4),
+    }[request.param]()
+    yield pool
+    if pool is not None:
+        pool.shutdown()
+
+
+@pytest.mark.parametrize('delay', [0, 0.001], ids=['noop', '1ms'])
+@pytest.mark.parametrize('count', [10, 100])
+def test_iteration(benchmark, pool, count, delay) -> None:
+    """Execute an iteration in which no check matches."""
+    processor = autosuspend.Processor(
+        [_StubCheck('stub{}'.format(i), delay) for i in range(count)],
+        [], 3600, 0, 0, lambda wakeup_at: None, lambda wakeup_at: None,
+        True, pool=pool)
+
+    benchmark(processor.iteration, datetime.now(timezone.utc), False)
@@ -0,0 +1,45 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+import autosuspend
+
+
+def _run(code: str, *options: str) -> str:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.path.dirname(os.path.dirname(autosuspend.__file__))
+    return subprocess.run(
+        [sys.executable, *options, '-c', code], env=env, check=True,
+        stderr=subprocess.PIPE).stderr.decode()
+
+
+def _import_time(module: str) -> int:
+    """Cumulative import time in microseconds reported by ``-X importtime``."""
+    output = _run('import ' + module, '-X', 'importtime')
+    match = re.search(r'^import time:\s+\d+ \|\s+(\d+) \| {}$'.format(
+        re.escape(module)), output, re.MULTILINE)
+    assert match is not None
+    return int(match.group(1))
+
+
+@pytest.mark.parametrize('module', [
+    'autosuspend',
+    'autosuspend.checks.activity',
+    'autosuspend.checks.wakeup',
+])
+def test_import(benchmark, module) -> None:
+    """Start an interpreter and import a module.
+
+    The cumulative import time as reported by ``python -X importtime`` is
+    stored with the results as ``import_time_us``.
+    """
+    benchmark.extra_info['import_time_us'] = _import_time(module)
+    benchmark.pedantic(_run, args=('import ' + module,), rounds=10)
+
+
+def test_interpreter_startup(benchmark) -> None:
+    """Reference for the interpreter startup without any imports."""
+    benchmark.pedantic(_run, args=('pass',), rounds=10)
@@ -43,6 +43,7 @@ rst_epilog = '''
 .. _MPD: http://www.musicpd.org/
 .. _python-mpd2: https://pypi.python.org/pypi/python-mpd2
 .. _dbus-python: https://cgit.freedesktop.org/dbus/dbus-python/
+.. _PyGObject: https://pygobject.readthedocs.io
 .. _Kodi: https://kodi.tv/
 .. _requests: https://pypi.python.org/pypi/requests
 .. _systemd: https://www.freedesktop.org/wiki/Software/systemd/
@@ -57,6 +58,8 @@ rst_epilog = '''
 .. _tzlocal: https://pypi.org/project/tzlocal/
 .. _requests-file: https://github.com/dashea/requests-file
 .. _Plex: https://www.plex.tv/
+.. _Prometheus: https://prometheus.io/
+.. _Prometheus node exporter: https://github.com/prometheus/node_exporter
 
 .. |project| replace:: {project}
 .. |project_bold| replace:: **{project}**
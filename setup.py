@@ -15,7 +15,7 @@ extras_require = {
     'Mpd': ['python-mpd2'],
     'Kodi': ['requests'],
     'XPath': ['lxml', 'requests'],
-    'Logind': ['dbus-python'],
+    'Logind': ['dbus-python', 'PyGObject'],
     'ical': ['requests', 'icalendar', 'python-dateutil', 'tzlocal'],
     'localfiles': ['requests-file'],
     'test': [
@@ -2,31 +2,51 @@
 """A daemon to suspend a system on inactivity."""
 
 import argparse
+import concurrent.futures
 import configparser
 import datetime
 import functools
+import importlib
 import logging
-import logging.config
-import os
-import os.path
+import signal
 import subprocess
 import time
-from typing import (Callable,
+from typing import (Any,
+                    Awaitable,
+                    Callable,
+                    Dict,
                     IO,
                     Iterable,
                     List,
+                    Mapping,
                     Optional,
                     Sequence,
+                    Tuple,
                     Type,
+                    TYPE_CHECKING,
                     TypeVar,
                     Union)
 
 from .checks import (Activity,
                      Check,
                      ConfigurationError,
+                     has_native_async,
+                     ResultCache,
                      TemporaryCheckError,
                      Wakeup)
-from .util import logger_by_class_instance
+from .checks.util import set_http_pool_size
+from .util import (logger_by_class_instance,
+                   metrics,
+                   ordering,
+                   processes,
+                   resume,
+                   state,
+                   trace,
+                   watchdog)
+
+
+if TYPE_CHECKING:
+    import asyncio
 
 
 # pylint: disable=invalid-name
@@ -34,6 +54,10 @@ _logger = logging.getLogger('autosuspend')
 # pylint: enable=invalid-name
 
 
+CheckType = TypeVar('CheckType', bound=Check)
+T = TypeVar('T')
+
+
 def execute_suspend(
     command: Union[str, Sequence[str]], wakeup_at: Optional[datetime.datetime],
 ) -> None:
@@ -115,10 +139,164 @@ def schedule_wakeup(
                         command, exc_info=True)
 
 
+def _record_check(check: Check, wall: float, cpu: Optional[float],
+                  result: Any, error: Optional[Exception] = None) -> None:
+    name = getattr(check, 'name', type(check).__name__)
+    kind = 'wakeup' if isinstance(check, Wakeup) else 'activity'
+    trace.get_trace().record_check(name, kind, wall, cpu, result, error)
+    metrics.get_metrics().observe_check(
+        name, kind, wall, result is not None,
+        isinstance(error, TemporaryCheckError))
+    if kind == 'activity':
+        ordering.get_statistics().observe(name, wall, result is not None)
+
+
+def _computations(check: Check) -> Optional[int]:
+    cache = getattr(check, '_result_cache', None)
+    return cache.computations if isinstance(cache, ResultCache) else None
+
+
+def _executed(check: Check, computations: Optional[int]) -> bool:
+    """Determine whether a call has not been served from the result cache.
+
+    Args:
+        computations:
+            result of :func:`_computations` before the call
+    """
+    return computations is None or _computations(check) != computations
+
+
+# calls of checks that have been abandoned after exceeding their execution
+# timeout and which might still be running on their watchdog thread
+_abandoned = {}  # type: Dict[Check, concurrent.futures.Future]
+
+
+def _is_abandoned_call_running(check: Check) -> bool:
+    future = _abandoned.get(check)
+    if future is None:
+        return False
+    if future.done():
+        _abandoned.pop(check, None)
+        return False
+    return True
+
+
+def _call_check(check: Check, *args: Any) -> Any:
+    """Call the ``check`` method and enforce a configured execution timeout.
+
+    The execution is recorded in the shared :class:`trace.Trace` unless the
+    result has been served from the result cache of the check.
+
+    Raises:
+        TemporaryCheckError:
+            the check did not finish within its execution timeout or a
+            previously abandoned call of the check is still running
+    """
+    if _is_abandoned_call_running(check):
+        raise TemporaryCheckError(
+            'Check {} is still running after exceeding its execution '
+            'timeout'.format(check.name))
+    computations = _computations(check)
+    cpu, call = trace.timed(check.check, *args)  # type: ignore
+    start = time.perf_counter()
+    try:
+        result = _call_with_timeout(check, call)
+    except Exception as error:
+        if _executed(check, computations):
+            _record_check(check, time.perf_counter() - start, cpu(), None,
+                          error)
+        raise
+    if _executed(check, computations):
+        _record_check(check, time.perf_counter() - start, cpu(), result)
+    return result
+
+
+def _call_with_timeout(check: Check, call: Callable[[], Any]) -> Any:
+    timeout = getattr(check, 'execution_timeout', None)
+    if timeout is None:
+        return call()
+    try:
+        return watchdog.run_with_timeout(
+            call, timeout,
+            name='autosuspend-watchdog-{}'.format(check.name))
+    except watchdog.ExecutionTimeout as error:
+        if error.pending is not None:
+            _abandoned[check] = error.pending
+        raise TemporaryCheckError(
+            'Check {} did not finish within its execution timeout of {} '
+            'seconds'.format(check.name, timeout)) from error
+
+
+class AsyncioExecutor(concurrent.futures.ThreadPoolExecutor):
+    """Executes checks concurrently on an asyncio event loop.
+
+    Checks implementing ``check_async`` on their own are awaited on the event
+    loop. All other checks are executed on the threads of this pool.
+    Arguments are the same as for
+    :class:`concurrent.futures.ThreadPoolExecutor`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        import asyncio
+        super().__init__(*args, **kwargs)
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(self)
+
+    def run(self, coroutine: Awaitable[T]) -> T:
+        """Run a coroutine on the event loop until it is complete."""
+        return self._loop.run_until_complete(coroutine)
+
+    def shutdown(self, wait: bool = True, **kwargs: Any) -> None:
+        if not self._loop.is_closed():
+            self._loop.close()
+        super().shutdown(wait, **kwargs)
+
+
+async def _call_check_async(check: Check,
+                            pool: concurrent.futures.Executor,
+                            *args: Any) -> Any:
+    """Await ``check_async`` or bridge to ``check`` for sync-only checks.
+
+    Raises:
+        TemporaryCheckError:
+            the check did not finish within its execution timeout
+    """
+    import asyncio
+    if not has_native_async(check):
+        if isinstance(check, Activity):
+            # cancelling the task does not stop the thread
+            return await asyncio.wrap_future(_submit(pool, check))
+        return await asyncio.get_running_loop().run_in_executor(
+            pool, functools.partial(_call_check, check, *args))
+
+    timeout = getattr(check, 'execution_timeout', None)
+    computations = _computations(check)
+    # CPU time cannot be attributed to checks sharing the event loop
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(
+            check.check_async(*args), timeout)  # type: ignore
+    except asyncio.TimeoutError as error:
+        _record_check(check, time.perf_counter() - start, None, None, error)
+        raise TemporaryCheckError(
+            'Check {} did not finish within its execution timeout of {} '
+            'seconds'.format(check.name, timeout)) from error
+    except Exception as error:
+        if _executed(check, computations):
+            _record_check(check, time.perf_counter() - start, None, None,
+                          error)
+        raise
+    if _executed(check, computations):
+        _record_check(check, time.perf_counter() - start, None, result)
+    return result
+
+
 def execute_checks(checks: Iterable[Activity],
                    all_checks: bool,
-                   logger: logging.Logger) -> bool:
-    """Execute the provided checks sequentially.
+                   logger: logging.Logger,
+                   pool: Optional[concurrent.futures.Executor] = None,
+                   ) -> bool:
+    """Execute the provided checks.
 
     Args:
         checks:
@@ -126,55 +304,336 @@ def execute_checks(checks: Iterable[Activity],
         all_checks:
             if ``True``, execute all checks even if a previous one already
             matched.
+        pool:
+            if provided, the checks are executed concurrently using this
+            executor. An :class:`AsyncioExecutor` awaits the checks on its
+            event loop. Otherwise, checks are executed sequentially.
 
     Return:
         ``True`` if a check matched
     """
-    matched = False
+    results = collect_check_results(checks, all_checks, logger, pool)
+    return any(result is not None for result in results.values())
+
+
+def collect_check_results(checks: Iterable[Activity],
+                          all_checks: bool,
+                          logger: logging.Logger,
+                          pool: Optional[concurrent.futures.Executor] = None,
+                          ) -> Dict[Activity, Optional[str]]:
+    """Execute the provided checks and collect their individual results.
+
+    Arguments are the same as for :func:`execute_checks`.
+
+    Return:
+        A mapping from each check that was executed successfully to its
+        result. Checks that failed temporarily or that were skipped are not
+        contained.
+    """
+    if pool is None:
+        return _execute_checks_sequentially(checks, all_checks, logger)
+    elif isinstance(pool, AsyncioExecutor):
+        return pool.run(
+            _execute_checks_async(checks, all_checks, logger, pool))
+    else:
+        return _execute_checks_concurrently(checks, all_checks, logger, pool)
+
+
+def _execute_checks_sequentially(checks: Iterable[Activity],
+                                 all_checks: bool,
+                                 logger: logging.Logger,
+                                 ) -> Dict[Activity, Optional[str]]:
+    results = {}  # type: Dict[Activity, Optional[str]]
+    for check in checks:
+        logger.debug('Executing check %s', check.name)
+        try:
+            result = _call_check(check)
+            results[check] = result
+            if result is not None:
+                logger.info('Check %s matched. Reason: %s', check.name, result)
+                if not all_checks:
+                    logger.debug('Skipping further checks')
+                    break
+        except TemporaryCheckError:
+            logger.warning('Check %s failed. Ignoring...', check,
+                           exc_info=True)
+    return results
+
+
+# executions of activity checks on pools, which might outlive their iteration
+_running = {}  # type: Dict[Check, concurrent.futures.Future]
+
+
+def _submit(pool: concurrent.futures.Executor,
+            check: Check) -> concurrent.futures.Future:
+    future = pool.submit(_call_check, check)
+    _running[check] = future
+    return future
+
+
+def _is_still_running(check: Check, logger: logging.Logger) -> bool:
+    """Determine whether an execution abandoned by a previous iteration runs.
+
+    Checks are not required to be thread-safe. Hence, they must not be
+    executed again as long as such an execution is in progress. This includes
+    calls that exceeded their execution timeout, which keep running on their
+    watchdog thread after the pool thread has given up on them.
+    """
+    future = _running.get(check)
+    if future is not None and future.done():
+        _running.pop(check, None)
+        future = None
+    if future is None and not _is_abandoned_call_running(check):
+        return False
+    logger.warning('Check %s of a previous iteration is still running. '
+                   'Skipping it', check.name)
+    return True
+
+
+def _is_match(future: concurrent.futures.Future) -> bool:
+    return future.exception() is None and future.result() is not None
+
+
+def _execute_checks_concurrently(checks: Iterable[Activity],
+                                 all_checks: bool,
+                                 logger: logging.Logger,
+                                 pool: concurrent.futures.Executor,
+                                 ) -> Dict[Activity, Optional[str]]:
+    futures = []
     for check in checks:
+        if _is_still_running(check, logger):
+            continue
         logger.debug('Executing check %s', check.name)
+        futures.append((check, _submit(pool, check)))
+
+    if not all_checks:
+        # Stop waiting as soon as the first match arrives. Checks that have
+        # not started yet are cancelled, running ones are ignored.
+        for future in concurrent.futures.as_completed(
+                [f for _, f in futures]):
+            if _is_match(future):
+                break
+        for _, future in futures:
+            future.cancel()
+
+    # Evaluate the results in the configured order so that logging and the
+    # final outcome are identical to the sequential execution.
+    results = {}  # type: Dict[Activity, Optional[str]]
+    for check, future in futures:
+        if future.cancelled() or (not all_checks and not future.done()):
+            logger.debug('Ignoring outstanding check %s', check.name)
+            continue
         try:
-            result = check.check()
+            result = future.result()
+            results[check] = result
             if result is not None:
                 logger.info('Check %s matched. Reason: %s', check.name, result)
-                matched = True
                 if not all_checks:
                     logger.debug('Skipping further checks')
                     break
         except TemporaryCheckError:
             logger.warning('Check %s failed. Ignoring...', check,
                            exc_info=True)
-    return matched
+    return results
+
+
+async def _execute_checks_async(checks: Iterable[Activity],
+                                all_checks: bool,
+                                logger: logging.Logger,
+                                pool: concurrent.futures.Executor,
+                                ) -> Dict[Activity, Optional[str]]:
+    import asyncio
+    tasks = []
+    for check in checks:
+        if _is_still_running(check, logger):
+            continue
+        logger.debug('Executing check %s', check.name)
+        tasks.append((check, asyncio.ensure_future(
+            _call_check_async(check, pool))))
+
+    if not tasks:
+        return {}
+
+    if all_checks:
+        await asyncio.wait([t for _, t in tasks])
+    else:
+        # Stop waiting as soon as the first match arrives and cancel all
+        # other checks.
+        for next_done in asyncio.as_completed([t for _, t in tasks]):
+            try:
+                if await next_done is not None:
+                    break
+            except Exception:  # noqa: S110 evaluated below in order
+                pass
+        pending = [t for _, t in tasks if not t.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    # Evaluate the results in the configured order so that logging and the
+    # final outcome are identical to the sequential execution.
+    results = {}  # type: Dict[Activity, Optional[str]]
+    for check, task in tasks:
+        if task.cancelled():
+            logger.debug('Ignoring outstanding check %s', check.name)
+            continue
+        try:
+            result = task.result()
+            results[check] = result
+            if result is not None:
+                logger.info('Check %s matched. Reason: %s', check.name, result)
+                if not all_checks:
+                    logger.debug('Skipping further checks')
+                    break
+        except TemporaryCheckError:
+            logger.warning('Check %s failed. Ignoring...', check,
+                           exc_info=True)
+    return results
 
 
 def execute_wakeups(wakeups: Iterable[Wakeup],
                     timestamp: datetime.datetime,
-                    logger: logging.Logger) -> Optional[datetime.datetime]:
+                    logger: logging.Logger,
+                    pool: Optional[concurrent.futures.Executor] = None,
+                    ) -> Optional[datetime.datetime]:
+    results = collect_wakeup_results(wakeups, timestamp, logger, pool)
+    return _earliest_wakeup(results.values())
+
+
+def _earliest_wakeup(
+    candidates: Iterable[Optional[datetime.datetime]],
+) -> Optional[datetime.datetime]:
+    return min((c for c in candidates if c is not None), default=None)
+
+
+async def _await_wakeups(wakeups: Sequence[Wakeup],
+                         timestamp: datetime.datetime,
+                         pool: concurrent.futures.Executor,
+                         ) -> List['asyncio.Task[Any]']:
+    import asyncio
+    tasks = [asyncio.ensure_future(_call_check_async(w, pool, timestamp))
+             for w in wakeups]
+    if tasks:
+        await asyncio.wait(tasks)
+    return tasks
+
+
+def collect_wakeup_results(wakeups: Iterable[Wakeup],
+                           timestamp: datetime.datetime,
+                           logger: logging.Logger,
+                           pool: Optional[concurrent.futures.Executor] = None,
+                           ) -> Dict[Wakeup, Optional[datetime.datetime]]:
+    """Execute the provided wakeup checks and collect their results.
+
+    Return:
+        A mapping from each wakeup that was executed successfully to its
+        result. Results that are not later than ``timestamp`` are reported as
+        ``None``.
+    """
+    # with a pool, all wakeups are submitted before waiting for any result
+    calls = []  # type: List[Tuple[Wakeup, Callable[[], Any]]]
+    if isinstance(pool, AsyncioExecutor):
+        wakeups = list(wakeups)
+        tasks = pool.run(_await_wakeups(wakeups, timestamp, pool))
+        calls = [(wakeup, task.result)
+                 for wakeup, task in zip(wakeups, tasks)]
+    else:
+        for wakeup in wakeups:
+            if pool is None:
+                calls.append((wakeup, functools.partial(
+                    _call_check, wakeup, timestamp)))
+            else:
+                calls.append((wakeup, pool.submit(
+                    _call_check, wakeup, timestamp).result))
 
-    wakeup_at = None
-    for wakeup in wakeups:
+    results = {}  # type: Dict[Wakeup, Optional[datetime.datetime]]
+    for wakeup, call in calls:
         try:
-            this_at = wakeup.check(timestamp)
+            this_at = call()
 
             # sanity checks
-            if this_at is None:
-                continue
-            if this_at <= timestamp:
+            if this_at is not None and this_at <= timestamp:
                 logger.warning('Wakeup %s returned a scheduled wakeup at %s, '
                                'which is earlier than the current time %s. '
                                'Ignoring.',
                                wakeup, this_at, timestamp)
-                continue
+                this_at = None
 
-            if wakeup_at is None:
-                wakeup_at = this_at
-            else:
-                wakeup_at = min(this_at, wakeup_at)
+            results[wakeup] = this_at
         except TemporaryCheckError:
             logger.warning('Wakeup %s failed. Ignoring...', wakeup,
                            exc_info=True)
 
-    return wakeup_at
+    return results
+
+
+class _Scheduler:
+    """Decides which checks are due based on their configured intervals.
+
+    Checks without a configured interval are due in every iteration. For all
+    others, the last result is remembered and reused until the interval has
+    passed.
+    """
+
+    def __init__(self) -> None:
+        self._last_run = {}  # type: Dict[Check, datetime.datetime]
+        self._results = {}  # type: Dict[Check, Any]
+
+    def reset(self) -> None:
+        self._last_run.clear()
+        self._results.clear()
+
+    def split(
+        self,
+        checks: Iterable[CheckType],
+        timestamp: datetime.datetime,
+        reusable: Callable[[CheckType, Any], bool] = lambda c, r: True,
+    ) -> Tuple[List[CheckType], Dict[CheckType, Any]]:
+        """Split checks into due ones and remembered results of the others.
+
+        Args:
+            checks:
+                the checks to consider
+            timestamp:
+                the time of the current iteration
+            reusable:
+                decides whether a remembered result may still be used
+
+        Returns:
+            The due checks in their original order and the remembered results
+            of all others.
+        """
+        due = []  # type: List[CheckType]
+        remembered = {}  # type: Dict[CheckType, Any]
+        for check in checks:
+            last_run = self._last_run.get(check)
+            interval = getattr(check, 'interval', None)
+            if (last_run is None or interval is None or
+                    # clock jumps backwards invalidate the schedule
+                    timestamp < last_run or
+                    (timestamp - last_run).total_seconds() >= interval or
+                    not reusable(check, self._results[check])):
+                due.append(check)
+            else:
+                remembered[check] = self._results[check]
+        return due, remembered
+
+    def retain(self, checks: Iterable[Check]) -> None:
+        """Forget everything about checks not contained in ``checks``."""
+        keep = set(checks)
+        for remembered in (self._last_run, self._results):
+            for check in [c for c in remembered if c not in keep]:
+                del remembered[check]
+
+    def record(
+        self, results: Mapping[CheckType, Any], timestamp: datetime.datetime,
+    ) -> None:
+        """Remember the results of checks executed at ``timestamp``."""
+        for check, result in results.items():
+            if getattr(check, 'interval', None) is None:
+                continue
+            self._last_run[check] = timestamp
+            self._results[check] = result
 
 
 class Processor:
@@ -204,6 +663,15 @@ class Processor:
         all_activities:
             if ``True``, execute all activity checks even if a previous one
             already matched.
+        pool:
+            if provided, execute checks concurrently using this executor
+        state_file:
+            if provided, the idle state is restored from this file and
+            persisted to it on changes
+        adaptive_order:
+            if ``True``, execute activity checks with the same priority in
+            increasing order of their expected cost per match instead of the
+            configured order
     """
 
     def __init__(self,
@@ -214,7 +682,10 @@ class Processor:
                  wakeup_delta: float,
                  sleep_fn: Callable,
                  wakeup_fn: Callable[[datetime.datetime], None],
-                 all_activities: bool) -> None:
+                 all_activities: bool,
+                 pool: Optional[concurrent.futures.Executor] = None,
+                 state_file: Optional[state.StateFile] = None,
+                 adaptive_order: bool = False) -> None:
         self._logger = logger_by_class_instance(self)
         self._activities = activities
         self._wakeups = wakeups
@@ -224,30 +695,123 @@ class Processor:
         self._sleep_fn = sleep_fn
         self._wakeup_fn = wakeup_fn
         self._all_activities = all_activities
+        self._pool = pool
+        self._adaptive_order = adaptive_order
+        self._scheduler = _Scheduler()
         self._idle_since = None  # type: Optional[datetime.datetime]
+        self._last_suspend = None  # type: Optional[datetime.datetime]
+        self._last_wakeup = None  # type: Optional[datetime.datetime]
+        self._state_file = state_file
+        if state_file is not None:
+            self._restore_state(state_file)
+
+    def _restore_state(self, state_file: state.StateFile) -> None:
+        restored = state.validate(
+            state_file.load(), datetime.datetime.now(datetime.timezone.utc),
+            state.boot_time(), state_file.updated_at(), state_file.max_age)
+        self._idle_since, self._last_suspend, self._last_wakeup = restored
+        self._logger.info('Restored state: idle since %s, last suspend at %s, '
+                          'last scheduled wakeup at %s', *restored)
+        if self._idle_since is not None:
+            metrics.get_metrics().set_idle_since(
+                self._idle_since.timestamp())
+
+    def _save_state(self) -> None:
+        if self._state_file is not None:
+            self._state_file.save(state.State(
+                self._idle_since, self._last_suspend, self._last_wakeup))
+
+    def take_over(self, previous: 'Processor') -> None:
+        """Continue with the state of a processor that is replaced.
+
+        The idle state and the remembered results of all checks that are
+        still in use are kept. The executor of the previous processor is shut
+        down and it must not be used afterwards.
+        """
+        self._idle_since = previous._idle_since
+        self._last_suspend = previous._last_suspend
+        self._last_wakeup = previous._last_wakeup
+        self._save_state()
+        self._scheduler = previous._scheduler
+        self._scheduler.retain(
+            list(self._activities) + list(self._wakeups))  # type: ignore
+        if previous._pool is not None and previous._pool is not self._pool:
+            previous._pool.shutdown(wait=False)
 
     def _reset_state(self, reason: str) -> None:
         self._logger.info('%s. Resetting state', reason)
         self._idle_since = None
+        metrics.get_metrics().set_idle_since(None)
+        self._save_state()
+
+    def _determine_activity(self, timestamp: datetime.datetime) -> bool:
+        due, remembered = self._scheduler.split(self._activities, timestamp)
+        for check, result in remembered.items():
+            if result is not None:
+                self._logger.info('Check %s matched in a previous iteration '
+                                  'and is not due yet. Reason: %s',
+                                  check.name, result)
+        active = any(result is not None for result in remembered.values())
+
+        if active and not self._all_activities:
+            if due:
+                self._logger.debug('Skipping due checks')
+            return True
+
+        due = ordering.order(due, self._adaptive_order,
+                             ordering.get_statistics())
+        results = collect_check_results(due, self._all_activities,
+                                        self._logger, self._pool)
+        self._scheduler.record(results, timestamp)
+        return active or any(result is not None
+                             for result in results.values())
+
+    def _determine_wakeup(
+        self, timestamp: datetime.datetime,
+    ) -> Optional[datetime.datetime]:
+        due, remembered = self._scheduler.split(
+            self._wakeups, timestamp,
+            lambda wakeup, result: result is None or result > timestamp)
+        results = collect_wakeup_results(due, timestamp, self._logger,
+                                         self._pool)
+        self._scheduler.record(results, timestamp)
+        return _earliest_wakeup(
+            list(remembered.values()) + list(results.values()))
 
     def iteration(
         self, timestamp: datetime.datetime, just_woke_up: bool,
     ) -> None:
         self._logger.info('Starting new check iteration')
 
-        # determine system activity
-        active = execute_checks(self._activities, self._all_activities,
-                                self._logger)
-        self._logger.debug('All activity checks have been executed. '
-                           'Active: %s', active)
-        # determine potential wake ups
-        wakeup_at = execute_wakeups(self._wakeups, timestamp, self._logger)
+        # results from before a suspension do not reflect the current state
+        if just_woke_up:
+            self._scheduler.reset()
+        if self._state_file is not None:
+            self._state_file.touch()
+
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        # checks of this iteration share a single view on the process table
+        with processes.iteration_scope():
+            # determine system activity
+            active = self._determine_activity(timestamp)
+            self._logger.debug('All activity checks have been executed. '
+                               'Active: %s', active)
+            # determine potential wake ups
+            wakeup_at = self._determine_wakeup(timestamp)
+        trace.get_trace().record_iteration(
+            time.perf_counter() - start_wall,
+            time.process_time() - start_cpu,
+            active,
+            wakeup_at.timestamp() if wakeup_at is not None else None)
         self._logger.debug('Checks report, system should wake up at %s',
                            wakeup_at)
         if wakeup_at is not None:
             wakeup_at -= datetime.timedelta(seconds=self._wakeup_delta)
         self._logger.debug('With delta, system should wake up at %s',
                            wakeup_at)
+        metrics.get_metrics().set_next_wakeup(
+            wakeup_at.timestamp() if wakeup_at is not None else None)
 
         # exit in case something prevents suspension
         if just_woke_up:
@@ -260,6 +824,8 @@ class Processor:
         # set idle timestamp if required
         if self._idle_since is None:
             self._idle_since = timestamp
+            metrics.get_metrics().set_idle_since(timestamp.timestamp())
+            self._save_state()
 
         self._logger.info('System is idle since %s', self._idle_since)
 
@@ -283,8 +849,11 @@ class Processor:
                 # schedule wakeup
                 self._logger.info('Scheduling wakeup at %s', wakeup_at)
                 self._wakeup_fn(wakeup_at)
+                self._last_wakeup = wakeup_at
 
+            self._last_suspend = timestamp
             self._reset_state('Going to suspend')
+            metrics.get_metrics().count_suspend()
             self._sleep_fn(wakeup_at)
         else:
             self._logger.info('Desired idle time of %s s not reached yet.',
@@ -294,7 +863,9 @@ class Processor:
 def loop(processor: Processor,
          interval: float,
          run_for: Optional[int],
-         woke_up_file: str) -> None:
+         woke_up_file: str,
+         resume_check_interval: float = 1.,
+         reloader: Optional['ConfigReloader'] = None) -> None:
     """Run the main loop of the daemon.
 
     Args:
@@ -302,39 +873,76 @@ def loop(processor: Processor,
             the processor to use for handling the suspension computations
         interval:
             the length of one iteration of the main loop in seconds
-        idle_time:
-            the required amount of time the system has to be idle before
-            suspension is triggered
-        sleep_fn:
-            a callable that triggers suspension
         run_for:
             if specified, run the main loop for the specified amount of seconds
             before terminating (approximately)
+        woke_up_file:
+            path of a file indicating that the system has been suspended
+        resume_check_interval:
+            interval in seconds in which to check for resumes while waiting
+            for the next iteration. A detected resume immediately starts the
+            next iteration.
+        reloader:
+            if provided, requested configuration reloads are applied before
+            the next iteration
     """
 
+    detector = resume.ResumeDetector(woke_up_file)
+    just_woke_up = detector.check()
+
     start_time = datetime.datetime.now(datetime.timezone.utc)
     while (run_for is None) or (datetime.datetime.now(datetime.timezone.utc) <
                                 (start_time + datetime.timedelta(
                                     seconds=run_for))):
 
-        just_woke_up = os.path.isfile(woke_up_file)
-        if just_woke_up:
-            os.remove(woke_up_file)
+        if reloader is not None:
+            processor = reloader.apply(processor)
 
         processor.iteration(datetime.datetime.now(datetime.timezone.utc),
                             just_woke_up)
+        trace.get_trace().flush()
 
-        time.sleep(interval)
+        sleep_start = time.monotonic()
+        just_woke_up = detector.sleep(interval, resume_check_interval)
+        trace.get_trace().record_sleep(
+            interval, time.monotonic() - sleep_start, just_woke_up)
 
 
-CheckType = TypeVar('CheckType', bound=Check)
+def _configure_generic_options(
+    check: Check, section: configparser.SectionProxy,
+) -> None:
+    """Apply the options that are available for all checks."""
+    try:
+        check.configure_cache(
+            section.getfloat('cache_ttl', fallback=0),
+            section.getboolean('cache_temporary_errors', fallback=False))
+        check.interval = section.getfloat('interval', fallback=None)
+        if check.interval is not None and check.interval <= 0:
+            raise ConfigurationError(
+                'Interval of section {} must be positive'.format(
+                    section.name))
+        check.priority = section.getint('priority', fallback=0)
+        check.execution_timeout = section.getfloat('execution_timeout',
+                                                   fallback=None)
+        if check.execution_timeout is not None and \
+                check.execution_timeout <= 0:
+            raise ConfigurationError(
+                'Execution timeout of section {} must be positive'.format(
+                    section.name))
+    except ValueError as error:
+        raise ConfigurationError(
+            'Unable to parse generic options of section {}: {}'.format(
+                section.name, error)) from error
 
 
 def set_up_checks(config: configparser.ConfigParser,
                   prefix: str,
                   internal_module: str,
                   target_class: Type[CheckType],
-                  error_none: bool = False) -> List[CheckType]:
+                  error_none: bool = False,
+                  previous_config: Optional[configparser.ConfigParser] = None,
+                  previous_checks: Iterable[CheckType] = (),
+                  ) -> List[CheckType]:
     """Set up :py.class:`Check` instances from a given configuration.
 
     Args:
@@ -350,8 +958,15 @@ def set_up_checks(config: configparser.ConfigParser,
             the base class to check new instance against
         error_none:
             Raise an error if nothing was configured?
+        previous_config:
+            the configuration ``previous_checks`` were created from
+        previous_checks:
+            checks to reuse instead of creating new instances in case the
+            configuration of their section has not changed
     """
     configured_checks = []  # type: List[CheckType]
+    reusable = {check.name: check
+                for check in previous_checks}  # type: Dict[str, CheckType]
 
     check_section = [s for s in config.sections()
                      if s.startswith('{}.'.format(prefix))]
@@ -368,6 +983,13 @@ def set_up_checks(config: configparser.ConfigParser,
             _logger.debug('Skipping disabled check {}'.format(name))
             continue
 
+        if (name in reusable and previous_config is not None and
+                _section_items(previous_config, section) ==
+                _section_items(config, section)):
+            _logger.info('Keeping unchanged check {}'.format(name))
+            configured_checks.append(reusable[name])
+            continue
+
         # try to find the required class
         if '.' in class_name:
             # dot in class name means external class
@@ -382,7 +1004,8 @@ def set_up_checks(config: configparser.ConfigParser,
                 name, import_class, import_module,
                 dict(config[section].items())))
         try:
-            klass = getattr(__import__(import_module, fromlist=[import_class]),
+            # only the modules of enabled checks are loaded
+            klass = getattr(importlib.import_module(import_module),
                             import_class)
         except AttributeError as error:
             raise ConfigurationError(
@@ -394,6 +1017,7 @@ def set_up_checks(config: configparser.ConfigParser,
             raise ConfigurationError(
                 'Check {} is not a correct {} instance'.format(
                     check, target_class.__name__))
+        _configure_generic_options(check, config[section])
         _logger.debug('Created check instance {} with options {}'.format(
             check, check.options()))
         configured_checks.append(check)
@@ -404,6 +1028,13 @@ def set_up_checks(config: configparser.ConfigParser,
     return configured_checks
 
 
+def _section_items(config: configparser.ConfigParser,
+                   section: str) -> Optional[Dict[str, str]]:
+    if not config.has_section(section):
+        return None
+    return dict(config[section].items())
+
+
 def parse_config(config_file: Iterable[str]) -> configparser.ConfigParser:
     """Parse the configuration file.
 
@@ -503,8 +1134,9 @@ def configure_logging(file_or_flag: Union[bool, IO]) -> None:
             # at least configure warnings
             logging.basicConfig(level=logging.WARNING)
     else:
+        from logging.config import fileConfig
         try:
-            logging.config.fileConfig(file_or_flag)
+            fileConfig(file_or_flag)
         except Exception:
             # at least configure warnings
             logging.basicConfig(level=logging.WARNING)
@@ -514,11 +1146,149 @@ def configure_logging(file_or_flag: Union[bool, IO]) -> None:
                             exc_info=True)
 
 
+def configure_pool(
+    config: configparser.ConfigParser,
+) -> Optional[concurrent.futures.Executor]:
+    """Create the executor for running checks as configured.
+
+    Returns:
+        ``None`` in case checks shall be executed sequentially
+    """
+    executor = config.get('general', 'executor', fallback='sequential')
+    if executor == 'sequential':
+        return None
+    elif executor in ('concurrent', 'asyncio'):
+        try:
+            workers = config.getint('general', 'executor_workers', fallback=4)
+        except ValueError as error:
+            raise ConfigurationError(
+                'Unable to parse executor_workers: {}'.format(
+                    error)) from error
+        if workers < 1:
+            raise ConfigurationError(
+                'executor_workers must be at least 1')
+        pool_class = {
+            'concurrent': concurrent.futures.ThreadPoolExecutor,
+            'asyncio': AsyncioExecutor,
+        }[executor]  # type: Type[concurrent.futures.ThreadPoolExecutor]
+        return pool_class(
+            max_workers=workers, thread_name_prefix='autosuspend-check')
+    else:
+        raise ConfigurationError('Unknown executor {}'.format(executor))
+
+
+def configure_http_pool(config: configparser.ConfigParser) -> None:
+    """Configure the connection pools used by network-based checks."""
+    try:
+        size = config.getint('general', 'http_pool_size', fallback=4)
+    except ValueError as error:
+        raise ConfigurationError(
+            'Unable to parse http_pool_size: {}'.format(error)) from error
+    if size < 1:
+        raise ConfigurationError('http_pool_size must be at least 1')
+    set_http_pool_size(size)
+
+
+def configure_resume_check_interval(
+    config: configparser.ConfigParser,
+) -> float:
+    """Determine how often to check for resumes between iterations."""
+    try:
+        interval = config.getfloat('general', 'resume_check_interval',
+                                   fallback=1)
+    except ValueError as error:
+        raise ConfigurationError(
+            'Unable to parse resume_check_interval: {}'.format(error),
+        ) from error
+    if interval <= 0:
+        raise ConfigurationError('resume_check_interval must be positive')
+    return interval
+
+
+def configure_trace(config: configparser.ConfigParser) -> None:
+    """Configure the recording of check and iteration timings."""
+    try:
+        capacity = config.getint('general', 'trace_capacity', fallback=1000)
+    except ValueError as error:
+        raise ConfigurationError(
+            'Unable to parse trace_capacity: {}'.format(error)) from error
+    if capacity < 1:
+        raise ConfigurationError('trace_capacity must be at least 1')
+    trace.configure(capacity,
+                    config.get('general', 'trace_file', fallback=None))
+
+
+def configure_metrics(config: configparser.ConfigParser) -> None:
+    """Start the configured exporters of the metrics."""
+    path = config.get('general', 'metrics_file', fallback=None)
+    if path is not None:
+        metrics.TextfileExporter(metrics.get_metrics(), path).start()
+
+    try:
+        port = config.getint('general', 'metrics_port', fallback=None)
+    except ValueError as error:
+        raise ConfigurationError(
+            'Unable to parse metrics_port: {}'.format(error)) from error
+    if port is not None:
+        address = config.get('general', 'metrics_address',
+                             fallback='127.0.0.1')
+        try:
+            metrics.HttpExporter(metrics.get_metrics(), address,
+                                 port).start()
+        except (OSError, OverflowError) as error:
+            raise ConfigurationError(
+                'Unable to serve metrics on {}:{}: {}'.format(
+                    address, port, error)) from error
+
+
+def configure_check_order(config: configparser.ConfigParser) -> bool:
+    """Determine whether activity checks are ordered adaptively."""
+    check_order = config.get('general', 'check_order', fallback='config')
+    if check_order not in ('config', 'adaptive'):
+        raise ConfigurationError(
+            'Unknown check order {}'.format(check_order))
+    return check_order == 'adaptive'
+
+
+def configure_state_file(
+    config: configparser.ConfigParser,
+) -> Optional[state.StateFile]:
+    """Create the file for persisting the processor state, if configured."""
+    path = config.get('general', 'state_file', fallback=None)
+    if path is None:
+        return None
+    # leave room for the duration of the iteration itself
+    return state.StateFile(
+        path, 2 * config.getfloat('general', 'interval', fallback=60))
+
+
+def _log_trace_summary(signum: int, frame: Any) -> None:
+    _logger.info('Timings of checks:\n%s',
+                 trace.get_trace().format_summary())
+
+
 def configure_processor(
     args: argparse.Namespace,
     config: configparser.ConfigParser,
     checks: Iterable[Activity],
     wakeups: Iterable[Wakeup],
+) -> Processor:
+    pool = configure_pool(config)
+    try:
+        return _create_processor(args, config, checks, wakeups, pool)
+    except Exception:
+        # the configuration is rejected and nobody else will use the pool
+        if pool is not None:
+            pool.shutdown(wait=False)
+        raise
+
+
+def _create_processor(
+    args: argparse.Namespace,
+    config: configparser.ConfigParser,
+    checks: Iterable[Activity],
+    wakeups: Iterable[Wakeup],
+    pool: Optional[concurrent.futures.Executor],
 ) -> Processor:
     return Processor(
         checks, wakeups,
@@ -534,34 +1304,165 @@ def configure_processor(
         functools.partial(schedule_wakeup,
                           config.get('general', 'wakeup_cmd')),
         all_activities=args.all_checks,
+        pool=pool,
+        state_file=configure_state_file(config),
+        adaptive_order=configure_check_order(config),
     )
 
 
-def main(argv: Optional[Sequence[str]] = None) -> None:
-    """Run the daemon."""
-    args = parse_arguments(argv)
-
-    configure_logging(args.logging)
-
-    config = parse_config(args.config_file)
-
+def set_up_all_checks(
+    config: configparser.ConfigParser,
+    previous_config: Optional[configparser.ConfigParser] = None,
+    previous_activities: Iterable[Activity] = (),
+    previous_wakeups: Iterable[Wakeup] = (),
+) -> Tuple[List[Activity], List[Wakeup]]:
+    """Set up the activity and wakeup checks of a configuration."""
     checks = set_up_checks(
         config,
         'check',
         'activity',
         Activity,  # type: ignore
         error_none=True,
+        previous_config=previous_config,
+        previous_checks=previous_activities,
     )
     wakeups = set_up_checks(
         config, 'wakeup', 'wakeup', Wakeup,  # type: ignore
+        previous_config=previous_config,
+        previous_checks=previous_wakeups,
     )
+    return checks, wakeups
+
+
+# options of the general section that are only applied at startup
+_RESTART_OPTIONS = (
+    'interval',
+    'woke_up_file',
+    'resume_check_interval',
+    'trace_capacity',
+    'trace_file',
+    'metrics_file',
+    'metrics_port',
+    'metrics_address',
+)
+
+
+class ConfigReloader:
+    """Reloads the configuration file on request between iterations.
+
+    Checks whose configuration section is unchanged are reused with their
+    complete state. Only changed and new sections result in new check
+    instances. The state of the processor is carried over to the newly
+    configured one. Changes to options that are only applied at startup are
+    ignored with a warning.
+
+    Args:
+        args:
+            the parsed command line arguments
+        config:
+            the configuration that is currently in use
+        activities:
+            the activity checks created from ``config``
+        wakeups:
+            the wakeup checks created from ``config``
+    """
+
+    def __init__(self,
+                 args: argparse.Namespace,
+                 config: configparser.ConfigParser,
+                 activities: Iterable[Activity],
+                 wakeups: Iterable[Wakeup]) -> None:
+        self._args = args
+        self._config = config
+        self._activities = list(activities)
+        self._wakeups = list(wakeups)
+        self._requested = False
+
+    def request(self, *args: Any) -> None:
+        """Request a reload before the next iteration.
+
+        This is safe to use as a signal handler.
+        """
+        self._requested = True
+
+    def apply(self, processor: Processor) -> Processor:
+        """Reload the configuration if requested.
+
+        Returns:
+            the processor to use from now on. This is ``processor`` in case
+            no reload was requested or the new configuration is invalid.
+        """
+        if not self._requested:
+            return processor
+        self._requested = False
+
+        path = self._args.config_file.name
+        _logger.info('Reloading configuration from %s', path)
+        activities = []  # type: List[Activity]
+        wakeups = []  # type: List[Wakeup]
+        try:
+            with open(path, 'r') as config_file:
+                config = parse_config(config_file)
+            configure_http_pool(config)
+            activities, wakeups = set_up_all_checks(
+                config, self._config, self._activities, self._wakeups)
+            new_processor = configure_processor(
+                self._args, config, activities, wakeups)
+        except (OSError, configparser.Error, ConfigurationError):
+            # new checks might already have started background threads
+            previous = set(self._activities) | set(self._wakeups)
+            for check in activities + wakeups:  # type: ignore
+                if check not in previous:
+                    check.close()
+            _logger.error('Unable to reload the configuration. '
+                          'Continuing with the previous one', exc_info=True)
+            return processor
+
+        self._warn_about_ignored_options(config)
+        new_processor.take_over(processor)
+        kept = set(activities) | set(wakeups)
+        for check in self._activities + self._wakeups:
+            if check not in kept:
+                check.close()
+        self._config = config
+        self._activities = activities
+        self._wakeups = wakeups
+        return new_processor
+
+    def _warn_about_ignored_options(
+        self, config: configparser.ConfigParser,
+    ) -> None:
+        for option in _RESTART_OPTIONS:
+            if (config.get('general', option, fallback=None) !=
+                    self._config.get('general', option, fallback=None)):
+                _logger.warning('Changed option %s requires a restart to '
+                                'take effect', option)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Run the daemon."""
+    args = parse_arguments(argv)
+
+    configure_logging(args.logging)
+
+    config = parse_config(args.config_file)
+
+    configure_http_pool(config)
+    configure_trace(config)
+    configure_metrics(config)
+    signal.signal(signal.SIGUSR1, _log_trace_summary)
+    checks, wakeups = set_up_all_checks(config)
 
     processor = configure_processor(args, config, checks, wakeups)
+    reloader = ConfigReloader(args, config, checks, wakeups)
+    signal.signal(signal.SIGHUP, reloader.request)
     loop(processor,
          config.getfloat('general', 'interval', fallback=60),
          run_for=args.run_for,
          woke_up_file=config.get('general', 'woke_up_file',
-                                 fallback='/var/run/autosuspend-just-woke-up'))
+                                 fallback='/var/run/autosuspend-just-woke-up'),
+         resume_check_interval=configure_resume_check_interval(config),
+         reloader=reloader)
 
 
 if __name__ == "__main__":
@@ -3,7 +3,10 @@
 import abc
 import configparser
 import datetime
-from typing import Any, Mapping, Optional
+import functools
+import threading
+import time
+from typing import Any, Awaitable, Callable, Mapping, Optional, Tuple
 
 from autosuspend.util import logger_by_class_instance
 
@@ -33,16 +36,199 @@ class SevereCheckError(RuntimeError):
     pass
 
 
+class ResultCache:
+    """Stores the outcome of a check execution for a limited time.
+
+    Args:
+        ttl:
+            seconds for which a stored outcome remains valid
+        cache_temporary_errors:
+            if ``True``, a :class:`TemporaryCheckError` raised by the check is
+            stored and raised again until the outcome expires. Otherwise, such
+            errors are never stored.
+
+    Attributes:
+        computations:
+            number of times a fresh outcome has been computed instead of
+            returning the stored one
+    """
+
+    def __init__(self, ttl: float, cache_temporary_errors: bool = False,
+                 ) -> None:
+        self.ttl = ttl
+        self.cache_temporary_errors = cache_temporary_errors
+        self.computations = 0
+        self._lock = threading.Lock()
+        self._expires_at = None  # type: Optional[float]
+        self._result = None  # type: Any
+        self._error = None  # type: Optional[TemporaryCheckError]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._expires_at = None
+            self._result = None
+            self._error = None
+
+    def get(self,
+            compute: Callable[[], Any],
+            is_valid: Callable[[Any], bool]) -> Any:
+        """Return the stored outcome or compute and store a new one.
+
+        Args:
+            compute:
+                called without arguments to determine a fresh result
+            is_valid:
+                called with a stored result to determine whether it can still
+                be used apart from the expiry time
+        """
+        hit, result = self._lookup(is_valid)
+        if hit:
+            return result
+
+        try:
+            result = compute()
+        except TemporaryCheckError as error:
+            self._failed(error)
+            raise
+
+        self._succeeded(result)
+        return result
+
+    async def get_async(self,
+                        compute: Callable[[], Awaitable[Any]],
+                        is_valid: Callable[[Any], bool]) -> Any:
+        """Asynchronous variant of :meth:`get` for awaitable computations."""
+        hit, result = self._lookup(is_valid)
+        if hit:
+            return result
+
+        try:
+            result = await compute()
+        except TemporaryCheckError as error:
+            self._failed(error)
+            raise
+
+        self._succeeded(result)
+        return result
+
+    def _lookup(self, is_valid: Callable[[Any], bool]) -> Tuple[bool, Any]:
+        with self._lock:
+            if (self._expires_at is not None and
+                    time.monotonic() < self._expires_at):
+                if self._error is not None:
+                    raise self._error
+                if is_valid(self._result):
+                    return True, self._result
+            self.computations += 1
+        return False, None
+
+    def _failed(self, error: TemporaryCheckError) -> None:
+        with self._lock:
+            if self.cache_temporary_errors:
+                self._store(None, error)
+            else:
+                self._expires_at = None
+
+    def _succeeded(self, result: Any) -> None:
+        with self._lock:
+            self._store(result, None)
+
+    def _store(self, result: Any, error: Optional[TemporaryCheckError],
+               ) -> None:
+        self._expires_at = time.monotonic() + self.ttl
+        self._result = result
+        self._error = error
+
+
+def _cached(check: Callable) -> Callable:
+    """Decorate a ``check`` method to consult the instance's result cache."""
+
+    @functools.wraps(check)
+    def wrapper(self: 'Check', *args: Any, **kwargs: Any) -> Any:
+        if self._result_cache is None:
+            return check(self, *args, **kwargs)
+        return self._result_cache.get(
+            functools.partial(check, self, *args, **kwargs),
+            lambda result: self._is_cached_result_valid(
+                result, *args, **kwargs))
+
+    wrapper._result_cache_wrapper = True  # type: ignore
+    return wrapper
+
+
+def _cached_async(check_async: Callable) -> Callable:
+    """Decorate a ``check_async`` method to consult the result cache."""
+
+    @functools.wraps(check_async)
+    async def wrapper(self: 'Check', *args: Any, **kwargs: Any) -> Any:
+        if self._result_cache is None:
+            return await check_async(self, *args, **kwargs)
+        return await self._result_cache.get_async(
+            functools.partial(check_async, self, *args, **kwargs),
+            lambda result: self._is_cached_result_valid(
+                result, *args, **kwargs))
+
+    wrapper._result_cache_wrapper = True  # type: ignore
+    return wrapper
+
+
+def _sync_bridge(check_async: Callable) -> Callable:
+    """Mark a ``check_async`` implementation that only delegates to ``check``.
+
+    Such implementations are neither cached on their own, because ``check``
+    already is, nor considered to perform non-blocking I/O.
+    """
+    check_async._result_cache_wrapper = True  # type: ignore
+    check_async._sync_bridge = True  # type: ignore
+    return check_async
+
+
+def has_native_async(check: 'Check') -> bool:
+    """Determine whether a check implements ``check_async`` on its own."""
+    check_async = getattr(type(check), 'check_async', None)
+    return (check_async is not None and
+            not getattr(check_async, '_sync_bridge', False))
+
+
 class Check(abc.ABC):
     """Base class for all kinds of checks.
 
     Subclasses must call this class' ``__init__`` method.
 
+    The results of the ``check`` and ``check_async`` methods implemented by
+    subclasses can be cached transparently by calling :meth:`configure_cache`.
+
     Args:
         name (str):
             Configured name of the check
+
+    Attributes:
+        interval:
+            if not ``None``, the check only needs to be executed again after
+            this amount of seconds. Its last result remains valid until then.
+        execution_timeout:
+            if not ``None``, executions of the check taking longer than this
+            amount of seconds are abandoned and treated as temporary errors.
+            Subprocesses launched with the keyword arguments provided by
+            :func:`autosuspend.util.watchdog.subprocess_kwargs` are killed in
+            this case.
+        priority:
+            activity checks with a higher priority are executed before all
+            others
     """
 
+    _result_cache = None  # type: Optional[ResultCache]
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)  # type: ignore
+        for attribute, decorator in (('check', _cached),
+                                     ('check_async', _cached_async)):
+            method = vars(cls).get(attribute)
+            if (method is not None and
+                    not getattr(method, '__isabstractmethod__', False) and
+                    not getattr(method, '_result_cache_wrapper', False)):
+                setattr(cls, attribute, decorator(method))
+
     @classmethod
     @abc.abstractmethod
     def create(cls, name: str, config: configparser.SectionProxy) -> 'Check':
@@ -67,6 +253,48 @@ class Check(abc.ABC):
         else:
             self.name = self.__class__.__name__
         self.logger = logger_by_class_instance(self, name)
+        self.interval = None  # type: Optional[float]
+        self.execution_timeout = None  # type: Optional[float]
+        self.priority = 0
+
+    def configure_cache(self, ttl: float,
+                        cache_temporary_errors: bool = False) -> None:
+        """Cache results of this check for the given amount of seconds.
+
+        Args:
+            ttl:
+                seconds to reuse a computed result, including ``None``.
+                Caching is disabled for values less or equal to zero.
+            cache_temporary_errors:
+                if ``True``, also cache raised :class:`TemporaryCheckError`
+                instances
+        """
+        if ttl > 0:
+            self._result_cache = ResultCache(ttl, cache_temporary_errors)
+        else:
+            self._result_cache = None
+
+    def _is_cached_result_valid(self, result: Any,
+                                *args: Any, **kwargs: Any) -> bool:
+        """Determine whether a cached result can be returned for a call.
+
+        Args:
+            result:
+                the cached result
+            args:
+                positional arguments of the current call to ``check``
+            kwargs:
+                keyword arguments of the current call to ``check``
+        """
+        return True
+
+    def close(self) -> None:
+        """Release resources held by the check.
+
+        This is called once the check is not used anymore, e.g. because it
+        has been removed when reloading the configuration.
+        """
+        pass
 
     def options(self) -> Mapping[str, Any]:
         """Return the configured options as a mapping.
@@ -74,7 +302,7 @@ class Check(abc.ABC):
         This is used for debugging purposes only.
         """
         return {k: v for k, v in self.__dict__.items()
-                if not callable(v) and k != 'logger'}
+                if not callable(v) and k not in ('logger', '_result_cache')}
 
     def __str__(self) -> str:
         return '{name}[class={clazz}]'.format(name=self.name,
@@ -104,6 +332,18 @@ class Activity(Check):
         """
         pass
 
+    @_sync_bridge
+    async def check_async(self) -> Optional[str]:
+        """Asynchronous variant of :meth:`check`.
+
+        Checks performing I/O can override this method with a non-blocking
+        implementation. The default executes :meth:`check` in the default
+        executor of the running event loop.
+        """
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.check)
+
     def __str__(self) -> str:
         return '{name}[class={clazz}]'.format(name=self.name,
                                               clazz=self.__class__.__name__)
@@ -132,3 +372,24 @@ class Wakeup(Check):
                 Check executions fails severely
         """
         pass
+
+    @_sync_bridge
+    async def check_async(
+        self, timestamp: datetime.datetime,
+    ) -> Optional[datetime.datetime]:
+        """Asynchronous variant of :meth:`check`.
+
+        Checks performing I/O can override this method with a non-blocking
+        implementation. The default executes :meth:`check` in the default
+        executor of the running event loop.
+        """
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.check, timestamp)
+
+    def _is_cached_result_valid(
+        self, result: Optional[datetime.datetime],
+        timestamp: datetime.datetime,
+    ) -> bool:
+        # a cached wake up that has already passed is of no use anymore
+        return result is None or result > timestamp
@@ -1,27 +1,38 @@
 import configparser
-import copy
 from datetime import datetime, timedelta, timezone
 import glob
 from io import BytesIO
 import json
+import math
 import os
 import pwd
 import re
 import socket
 import subprocess
 import time
-from typing import Any, Dict, Iterable, Optional, Pattern, Sequence, Tuple
+from typing import (Any,
+                    Dict,
+                    FrozenSet,
+                    Iterable,
+                    List,
+                    Optional,
+                    Pattern,
+                    Sequence,
+                    Set,
+                    Tuple)
+import urllib.parse
 import warnings
 
-import psutil
-
 from . import (Activity,
                Check,
                ConfigurationError,
                SevereCheckError,
                TemporaryCheckError)
 from .util import CommandMixin, NetworkMixin, XPathMixin
+from ..util import aio, bandwidth, icmp, kodi, processes, tcp, xss
+from ..util.mpd_watcher import MpdWatcher
 from ..util.systemd import list_logind_sessions
+from ..util.watchdog import subprocess_kwargs
 
 
 class ActiveCalendarEvent(NetworkMixin, Activity):
@@ -64,17 +75,26 @@ class ActiveConnection(Activity):
 
     def __init__(self, name: str, ports: Iterable[int]) -> None:
         Activity.__init__(self, name)
-        self._ports = ports
+        self._ports = frozenset(ports)  # type: FrozenSet[int]
+        self._local_addresses = tcp.LocalAddresses()
+
+    def _connections(self) -> Iterable[Tuple[int, Tuple[str, int]]]:
+        try:
+            return [(c.family, c.laddr)
+                    for c in tcp.established_connections(self._ports)]
+        except OSError:
+            self.logger.debug('Unable to read the TCP connection tables. '
+                              'Using psutil instead.', exc_info=True)
+            import psutil
+            return [(c.family, c.laddr)
+                    for c in psutil.net_connections()
+                    if c.status == 'ESTABLISHED' and
+                    c.laddr[1] in self._ports]
 
     def check(self) -> Optional[str]:
-        own_addresses = [(item.family, item.address.split('%')[0])
-                         for sublist in psutil.net_if_addrs().values()
-                         for item in sublist]
-        connected = [c.laddr[1]
-                     for c in psutil.net_connections()
-                     if ((c.family, c.laddr[0]) in own_addresses and
-                         c.status == 'ESTABLISHED' and
-                         c.laddr[1] in self._ports)]
+        connected = [laddr[1]
+                     for family, laddr in self._connections()
+                     if (family, laddr[0]) in self._local_addresses]
         if connected:
             return 'Ports {} are connected'.format(connected)
         else:
@@ -89,7 +109,15 @@ class ExternalCommand(CommandMixin, Activity):
 
     def check(self) -> Optional[str]:
         try:
-            subprocess.check_call(self._command, shell=True)  # noqa: S602
+            subprocess.check_call(self._command, shell=True,  # noqa: S602
+                                  **subprocess_kwargs())
+            return 'Command {} succeeded'.format(self._command)
+        except subprocess.CalledProcessError:
+            return None
+
+    async def check_async(self) -> Optional[str]:
+        try:
+            await aio.check_call(self._command, shell=True)
             return 'Command {} succeeded'.format(self._command)
         except subprocess.CalledProcessError:
             return None
@@ -100,6 +128,23 @@ def _add_default_kodi_url(config: configparser.SectionProxy) -> None:
         config['url'] = 'http://localhost:8080/jsonrpc'
 
 
+def _collect_kodi_notification_args(
+    config: configparser.SectionProxy, args: Dict[str, Any],
+) -> None:
+    if config.getboolean('notifications', fallback=False):
+        args['notification_port'] = config.getint('notification_port',
+                                                  fallback=9090)
+
+
+def _kodi_client(
+    url: str, notification_port: Optional[int], timeout: float,
+) -> Optional[kodi.KodiClient]:
+    if notification_port is None:
+        return None
+    host = urllib.parse.urlsplit(url).hostname or 'localhost'
+    return kodi.client_for(host, notification_port, timeout)
+
+
 class Kodi(NetworkMixin, Activity):
 
     @classmethod
@@ -111,6 +156,7 @@ class Kodi(NetworkMixin, Activity):
             args = NetworkMixin.collect_init_args(config)
             args['suspend_while_paused'] = config.getboolean(
                 'suspend_while_paused', fallback=False)
+            _collect_kodi_notification_args(config, args)
             return args
         except ValueError as error:
             raise ConfigurationError(
@@ -121,8 +167,11 @@ class Kodi(NetworkMixin, Activity):
         return cls(name, **cls.collect_init_args(config))
 
     def __init__(self, name: str, url: str, suspend_while_paused: bool = False,
+                 notification_port: Optional[int] = None,
                  **kwargs) -> None:
         self._suspend_while_paused = suspend_while_paused
+        self._client = _kodi_client(url, notification_port,
+                                    kwargs.get('timeout', 5))
         if self._suspend_while_paused:
             request = url + (
                 '?request={"jsonrpc": "2.0", "id": 1, '
@@ -137,7 +186,27 @@ class Kodi(NetworkMixin, Activity):
         NetworkMixin.__init__(self, url=request, **kwargs)
         Activity.__init__(self, name)
 
+    def close(self) -> None:
+        if self._client is not None:
+            kodi.release(self._client)
+            self._client = None
+
+    def _evaluate_player_state(self, state: str) -> Optional[str]:
+        if state == kodi.PLAYING:
+            if self._suspend_while_paused:
+                return 'Kodi actively playing media'
+            return 'Kodi currently playing'
+        if state == kodi.PAUSED and not self._suspend_while_paused:
+            return 'Kodi currently playing'
+        return None
+
     def check(self) -> Optional[str]:
+        # the notified state is unknown while not connected. Poll instead.
+        if self._client is not None:
+            state = self._client.player_state()
+            if state is not None:
+                return self._evaluate_player_state(state)
+
         try:
             reply = self.request().json()
             if self._suspend_while_paused:
@@ -161,6 +230,7 @@ class KodiIdleTime(NetworkMixin, Activity):
             _add_default_kodi_url(config)
             args = NetworkMixin.collect_init_args(config)
             args['idle_time'] = config.getint('idle_time', fallback=120)
+            _collect_kodi_notification_args(config, args)
             return args
         except ValueError as error:
             raise ConfigurationError(
@@ -172,7 +242,11 @@ class KodiIdleTime(NetworkMixin, Activity):
     ) -> 'KodiIdleTime':
         return cls(name, **cls.collect_init_args(config))
 
-    def __init__(self, name: str, url: str, idle_time: int, **kwargs) -> None:
+    def __init__(self, name: str, url: str, idle_time: int,
+                 notification_port: Optional[int] = None,
+                 **kwargs) -> None:
+        self._client = _kodi_client(url, notification_port,
+                                    kwargs.get('timeout', 5))
         request = url + (
             '?request={{"jsonrpc": "2.0", "id": 1, '
             '"method": "XBMC.GetInfoBooleans",'
@@ -182,12 +256,28 @@ class KodiIdleTime(NetworkMixin, Activity):
         NetworkMixin.__init__(self, url=request, **kwargs)
         Activity.__init__(self, name)
         self._idle_time = idle_time
+        self._boolean = 'System.IdleTime({})'.format(idle_time)
+
+    def close(self) -> None:
+        if self._client is not None:
+            kodi.release(self._client)
+            self._client = None
+
+    def _query(self) -> Dict:
+        if self._client is not None and self._client.connected:
+            try:
+                return {'result': self._client.call(
+                    'XBMC.GetInfoBooleans',
+                    {'booleans': [self._boolean]})}
+            except (ConnectionError, TimeoutError, ValueError):
+                self.logger.debug('Query via notification connection failed',
+                                  exc_info=True)
+        return self.request().json()
 
     def check(self) -> Optional[str]:
         try:
-            reply = self.request().json()
-            if not reply['result'][
-                    "System.IdleTime({})".format(self._idle_time)]:
+            reply = self._query()
+            if not reply['result'][self._boolean]:
                 return 'Someone interacts with Kodi'
             else:
                 return None
@@ -229,7 +319,8 @@ class Mpd(Activity):
             host = config.get('host', fallback='localhost')
             port = config.getint('port', fallback=6600)
             timeout = config.getint('timeout', fallback=5)
-            return cls(name, host, port, timeout)
+            idle = config.getboolean('idle', fallback=False)
+            return cls(name, host, port, timeout, idle=idle)
         except ValueError as error:
             raise ConfigurationError(
                 'Host port or timeout configuration wrong: {}'.format(
@@ -237,13 +328,25 @@ class Mpd(Activity):
 
     def __init__(
         self, name: str, host: str, port: int, timeout: float,
+        idle: bool = False,
     ) -> None:
         Check.__init__(self, name)
         self._host = host
         self._port = port
         self._timeout = timeout
+        self._watcher = None  # type: Optional[MpdWatcher]
+        if idle:
+            self._watcher = MpdWatcher(host, port, timeout)
+            self._watcher.start()
+
+    def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.stop()
 
     def _get_state(self) -> Dict:
+        if self._watcher is not None:
+            return self._watcher.state()
+
         from mpd import MPDClient
         client = MPDClient()
         client.timeout = self._timeout
@@ -273,6 +376,7 @@ class NetworkBandwidth(Activity):
     def create(
         cls, name: str, config: configparser.SectionProxy,
     ) -> 'NetworkBandwidth':
+        import psutil
         try:
             interfaces = config['interfaces'].split(',')
             interfaces = [i.strip() for i in interfaces if i.strip()]
@@ -288,7 +392,6 @@ class NetworkBandwidth(Activity):
                                              fallback=100)
             threshold_receive = config.getfloat('threshold_receive',
                                                 fallback=100)
-            return cls(name, interfaces, threshold_send, threshold_receive)
         except KeyError as error:
             raise ConfigurationError(
                 'Missing configuration key: {}'.format(error)) from error
@@ -296,25 +399,98 @@ class NetworkBandwidth(Activity):
             raise ConfigurationError(
                 'Threshold in wrong format: {}'.format(error)) from error
 
+        try:
+            sample_interval = config.getfloat('sample_interval',
+                                              fallback=None)
+            window = config.getfloat('window', fallback=10)
+            aggregate = bandwidth.create_aggregate(
+                config.get('aggregate', fallback='mean'),
+                q=config.getfloat('percentile', fallback=95),
+                alpha=config.getfloat('ewma_alpha', fallback=0.3))
+        except ValueError as error:
+            raise ConfigurationError(
+                'Unable to configure sampling: {}'.format(error)) from error
+        if sample_interval is not None and sample_interval <= 0:
+            raise ConfigurationError('sample_interval must be positive')
+        if window <= 0:
+            raise ConfigurationError('window must be positive')
+
+        return cls(name, interfaces, threshold_send, threshold_receive,
+                   sample_interval=sample_interval, window=window,
+                   aggregate=aggregate)
+
     def __init__(
         self,
         name: str,
         interfaces: Iterable[str],
         threshold_send: float,
         threshold_receive: float,
+        sample_interval: Optional[float] = None,
+        window: float = 10.,
+        aggregate: bandwidth.Aggregate = bandwidth.mean,
     ) -> None:
         Check.__init__(self, name)
         self._interfaces = interfaces
         self._threshold_send = threshold_send
         self._threshold_receive = threshold_receive
-        self._previous_values = psutil.net_io_counters(pernic=True)
-        self._previous_time = time.time()
+        self._aggregate = aggregate
+        self._sampler = None  # type: Optional[bandwidth.BandwidthSampler]
+        if sample_interval is not None:
+            self._sampler = bandwidth.BandwidthSampler(
+                interfaces, sample_interval,
+                max(1, int(round(window / sample_interval))))
+            self._sampler.start()
+        else:
+            import psutil
+            self._previous_values = psutil.net_io_counters(pernic=True)
+            self._previous_time = time.time()
+
+    def close(self) -> None:
+        if self._sampler is not None:
+            self._sampler.stop()
+
+    def _evaluate(self, interface: str, rate_send: float,
+                  rate_receive: float) -> Optional[str]:
+        if rate_send > self._threshold_send:
+            return (
+                'Interface {} sending rate {} byte/s '
+                'higher than threshold {}'.format(
+                    interface, rate_send, self._threshold_send)
+            )
+        if rate_receive > self._threshold_receive:
+            return (
+                'Interface {} receive rate {} byte/s '
+                'higher than threshold {}'.format(
+                    interface, rate_receive, self._threshold_receive)
+            )
+        return None
+
+    def _check_sampled(
+        self, sampler: bandwidth.BandwidthSampler,
+    ) -> Optional[str]:
+        for interface in self._interfaces:
+            rates = sampler.rates(interface)
+            if not rates:
+                raise TemporaryCheckError(
+                    'No bandwidth samples for interface {} yet'.format(
+                        interface))
+            result = self._evaluate(
+                interface,
+                self._aggregate([send for send, _ in rates]),
+                self._aggregate([receive for _, receive in rates]))
+            if result is not None:
+                return result
+        return None
 
     def check(self) -> Optional[str]:
+        if self._sampler is not None:
+            return self._check_sampled(self._sampler)
+
         # acquire the previous state and preserve it
         old_values = self._previous_values
         old_time = self._previous_time
 
+        import psutil
         # read new values and store them for the next iteration
         new_values = psutil.net_io_counters(pernic=True)
         self._previous_values = new_values
@@ -331,31 +507,20 @@ class NetworkBandwidth(Activity):
                 raise TemporaryCheckError(
                     'Interface {} is missing'.format(interface))
 
-            # send direction
             delta_send = (
                 new_values[interface].bytes_sent -
                 old_values[interface].bytes_sent
             )
-            rate_send = delta_send / (new_time - old_time)
-            if rate_send > self._threshold_send:
-                return (
-                    'Interface {} sending rate {} byte/s '
-                    'higher than threshold {}'.format(
-                        interface, rate_send, self._threshold_send)
-                )
-
-            # receive direction
             delta_receive = (
                 new_values[interface].bytes_recv -
                 old_values[interface].bytes_recv
             )
-            rate_receive = delta_receive / (new_time - old_time)
-            if rate_receive > self._threshold_receive:
-                return (
-                    'Interface {} receive rate {} byte/s '
-                    'higher than threshold {}'.format(
-                        interface, rate_receive, self._threshold_receive)
-                )
+            result = self._evaluate(
+                interface,
+                delta_send / (new_time - old_time),
+                delta_receive / (new_time - old_time))
+            if result is not None:
+                return result
 
         return None
 
@@ -368,26 +533,109 @@ class Ping(Activity):
         try:
             hosts = config['hosts'].split(',')
             hosts = [h.strip() for h in hosts]
-            return cls(name, hosts)
+            count = config.getint('count', fallback=1)
+            timeout = config.getfloat('timeout', fallback=1)
+            require = config.get('require', fallback='any')
+            method = config.get('method', fallback='native')
         except KeyError as error:
             raise ConfigurationError(
                 'Unable to determine hosts to ping: {}'.format(
                     error)) from error
+        except ValueError as error:
+            raise ConfigurationError(
+                'Unable to parse configuration: {}'.format(error)) from error
+
+        if count < 1:
+            raise ConfigurationError('count must be at least 1')
+        if timeout <= 0:
+            raise ConfigurationError('timeout must be positive')
+        if require not in ('any', 'all'):
+            raise ConfigurationError(
+                'Unknown value {} for require'.format(require))
+        if method not in ('native', 'command'):
+            raise ConfigurationError('Unknown method {}'.format(method))
+
+        return cls(name, hosts, count=count, timeout=timeout,
+                   require_all=require == 'all', native=method == 'native')
 
-    def __init__(self, name: str, hosts: Iterable[str]) -> None:
+    def __init__(self, name: str, hosts: Iterable[str], count: int = 1,
+                 timeout: float = 1, require_all: bool = False,
+                 native: bool = True) -> None:
         Check.__init__(self, name)
         self._hosts = hosts
+        self._count = count
+        self._timeout = timeout
+        self._require_all = require_all
+        self._native = native
 
-    def check(self) -> Optional[str]:
+    def _ping_natively(self) -> Set[str]:
+        return icmp.ping(list(self._hosts), self._count, self._timeout,
+                         wanted=None if self._require_all else 1)
+
+    def _fall_back(self) -> None:
+        self.logger.warning('Unable to ping natively. Using the ping command '
+                            'from now on.', exc_info=True)
+        self._native = False
+
+    def _command(self, host: str) -> List[str]:
+        return ['ping', '-q', '-c', str(self._count),
+                '-W', str(max(1, math.ceil(self._timeout))), host]
+
+    def _evaluate(self, up: Set[str]) -> Optional[str]:
         for host in self._hosts:
-            cmd = ['ping', '-q', '-c', '1', host]
-            if subprocess.call(cmd,  # noqa: S603 we know the input
-                               stdout=subprocess.DEVNULL,
-                               stderr=subprocess.DEVNULL) == 0:
+            if host in up:
                 self.logger.debug("host " + host + " appears to be up")
+        if self._require_all:
+            if all(host in up for host in self._hosts):
+                return 'Hosts {} are up'.format(', '.join(self._hosts))
+            return None
+        for host in self._hosts:
+            if host in up:
                 return 'Host {} is up'.format(host)
         return None
 
+    def check(self) -> Optional[str]:
+        if self._native:
+            try:
+                return self._evaluate(self._ping_natively())
+            except icmp.IcmpUnavailable:
+                self._fall_back()
+
+        # the command is executed for one host after another, hence stop as
+        # early as the outcome is known
+        up = set()
+        for host in self._hosts:
+            if subprocess.call(self._command(host),  # noqa: S603 known input
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL,
+                               **subprocess_kwargs()) == 0:
+                up.add(host)
+                if not self._require_all:
+                    break
+            elif self._require_all:
+                break
+        return self._evaluate(up)
+
+    async def check_async(self) -> Optional[str]:
+        import asyncio
+        if self._native:
+            try:
+                return self._evaluate(
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, self._ping_natively))
+            except icmp.IcmpUnavailable:
+                self._fall_back()
+
+        # ping all hosts at once but report in configured order
+        return_codes = await asyncio.gather(*(
+            aio.run_process(self._command(host),
+                            stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL)
+            for host in self._hosts))
+        return self._evaluate({
+            host for host, (return_code, _) in zip(self._hosts, return_codes)
+            if return_code == 0})
+
 
 class Processes(Activity):
 
@@ -408,14 +656,10 @@ class Processes(Activity):
         self._processes = processes
 
     def check(self) -> Optional[str]:
-        for proc in psutil.process_iter():
-            try:
-                pinfo = proc.name()
-                for name in self._processes:
-                    if pinfo == name:
-                        return 'Process {} is running'.format(name)
-            except psutil.NoSuchProcess:
-                pass
+        running = processes.snapshot(['name']).names()
+        for name in self._processes:
+            if name in running:
+                return 'Process {} is running'.format(name)
         return None
 
 
@@ -430,10 +674,22 @@ class Smb(Activity):
     def check(self) -> Optional[str]:
         try:
             status_output = subprocess.check_output(  # noqa: S603, S607
-                ['smbstatus', '-b']).decode('utf-8')
+                ['smbstatus', '-b'], **subprocess_kwargs()).decode('utf-8')
+        except subprocess.CalledProcessError as error:
+            raise SevereCheckError(error) from error
+
+        return self._evaluate(status_output)
+
+    async def check_async(self) -> Optional[str]:
+        try:
+            status_output = (
+                await aio.check_output(['smbstatus', '-b'])).decode('utf-8')
         except subprocess.CalledProcessError as error:
             raise SevereCheckError(error) from error
 
+        return self._evaluate(status_output)
+
+    def _evaluate(self, status_output: str) -> Optional[str]:
         self.logger.debug('Received status output:\n%s',
                           status_output)
 
@@ -485,6 +741,7 @@ class Users(Activity):
         self._host_regex = host_regex
 
     def check(self) -> Optional[str]:
+        import psutil
         for entry in psutil.users():
             if (
                 self._user_regex.fullmatch(entry.name) is not None and
@@ -521,6 +778,7 @@ class XIdleTime(Activity):
                         config.get('ignore_if_process', fallback=r'a^'),
                     ),
                     re.compile(config.get('ignore_users', fallback=r'a^')),
+                    backend=config.get('backend', fallback='auto'),
                 )
             except re.error as error:
                 raise ConfigurationError(
@@ -538,6 +796,7 @@ class XIdleTime(Activity):
         method: str,
         ignore_process_re: Pattern,
         ignore_users_re: Pattern,
+        backend: str = 'auto',
     ) -> None:
         Activity.__init__(self, name)
         self._timeout = timeout
@@ -550,6 +809,26 @@ class XIdleTime(Activity):
                 "Unknown session discovery method {}".format(method))
         self._ignore_process_re = ignore_process_re
         self._ignore_users_re = ignore_users_re
+        if backend not in ('auto', 'xss', 'xprintidle'):
+            raise ValueError("Unknown backend {}".format(backend))
+        self._backend = backend
+        self._xss = None  # type: Optional[xss.IdleTimeQuery]
+        if backend != 'xprintidle':
+            try:
+                self._xss = xss.IdleTimeQuery()
+            except xss.XssUnavailable as error:
+                if backend == 'xss':
+                    raise ConfigurationError(
+                        'Unable to load libXss: {}'.format(error)) from error
+                self.logger.info('libXss is not available. '
+                                 'Using xprintidle instead')
+            if backend == 'auto' and self._xss is not None and \
+                    not self._xss.safe:
+                # Xlib would terminate the daemon on lost connections
+                self.logger.info('libX11 is too old to recover from lost '
+                                 'connections. Using xprintidle instead')
+                self._xss.close()
+                self._xss = None
 
     def _list_sessions_sockets(self) -> Sequence[Tuple[int, str]]:
         """List running X sessions by iterating the X sockets.
@@ -608,27 +887,54 @@ class XIdleTime(Activity):
         return results
 
     def _is_skip_process_running(self, user: str) -> bool:
-        user_processes = []
-        for process in psutil.process_iter():
-            try:
-                if process.username() == user:
-                    user_processes.append(process.name())
-            except (psutil.NoSuchProcess,
-                    psutil.ZombieProcess,
-                    psutil.AccessDenied):
-                # ignore processes which have disappeared etc.
-                pass
+        user_processes = processes.snapshot(
+            ['name', 'username']).names_of_user(user)
 
         for process in user_processes:
             if self._ignore_process_re.match(process) is not None:
                 self.logger.debug(
-                    "Process %s with pid %s matches the ignore regex '%s'."
+                    "Process %s matches the ignore regex '%s'."
                     " Skipping idle time check for this user.",
-                    process.name(), process.pid, self._ignore_process_re)
+                    process, self._ignore_process_re)
                 return True
 
         return False
 
+    def _idle_time_xprintidle(self, display: int, user: str,
+                              xauthority: str) -> float:
+        env = dict(os.environ)
+        env['DISPLAY'] = ':{}'.format(display)
+        env['XAUTHORITY'] = xauthority
+
+        try:
+            idle_time_output = subprocess.check_output(  # noqa: S603, S607
+                ['sudo', '-u', user, 'xprintidle'],
+                **subprocess_kwargs(env))
+            return float(idle_time_output.strip()) / 1000.0
+        except (subprocess.CalledProcessError, ValueError) as error:
+            self.logger.warning(
+                'Unable to determine the idle time for display %s.',
+                display, exc_info=True)
+            raise TemporaryCheckError(error) from error
+
+    def close(self) -> None:
+        if self._xss is not None:
+            self._xss.close()
+
+    def _idle_time(self, display: int, user: str) -> float:
+        xauthority = os.path.join(os.path.expanduser('~' + user),
+                                  '.Xauthority')
+        if self._xss is not None:
+            try:
+                return self._xss.idle_time(int(display), xauthority)
+            except xss.XssError as error:
+                if self._backend == 'xss':
+                    raise TemporaryCheckError(error) from error
+                self.logger.debug(
+                    'Unable to query display %s via libXss. '
+                    'Falling back to xprintidle.', display, exc_info=True)
+        return self._idle_time_xprintidle(display, user, xauthority)
+
     def check(self) -> Optional[str]:
         for display, user in self._provide_sessions():
             self.logger.info('Checking display %s of user %s', display, user)
@@ -645,21 +951,7 @@ class XIdleTime(Activity):
             if self._is_skip_process_running(user):
                 continue
 
-            # prepare the environment for the xprintidle call
-            env = copy.deepcopy(os.environ)
-            env['DISPLAY'] = ':{}'.format(display)
-            env['XAUTHORITY'] = os.path.join(os.path.expanduser('~' + user),
-                                             '.Xauthority')
-
-            try:
-                idle_time_output = subprocess.check_output(  # noqa: S603, S607
-                    ['sudo', '-u', user, 'xprintidle'], env=env)
-                idle_time = float(idle_time_output.strip()) / 1000.0
-            except (subprocess.CalledProcessError, ValueError) as error:
-                self.logger.warning(
-                    'Unable to determine the idle time for display %s.',
-                    display, exc_info=True)
-                raise TemporaryCheckError(error) from error
+            idle_time = self._idle_time(display, user)
 
             self.logger.debug(
                 'Idle time for display %s of user %s is %s seconds.',
@@ -1,10 +1,15 @@
 import configparser
-from typing import Any, Dict, Optional, Sequence, TYPE_CHECKING
+import os
+import threading
+from typing import Any, Dict, Optional, Sequence, Tuple, TYPE_CHECKING
+import urllib.parse
 
 from . import Check, ConfigurationError, SevereCheckError, TemporaryCheckError
 
 
 if TYPE_CHECKING:
+    import requests
+    import requests.auth
     import requests.model
 
 
@@ -59,45 +64,148 @@ class NetworkMixin:
         self._timeout = timeout
         self._username = username
         self._password = password
+        self._auth = None  # type: Optional[requests.auth.AuthBase]
+        self._last_reply = None  # type: Optional[requests.model.Response]
+        self._validators = {}  # type: Dict[str, str]
+        self._file_validator_seen = None  # type: Optional[Tuple[int, int]]
 
     def request(self) -> 'requests.model.Response':
-        import requests
-        from requests.auth import HTTPBasicAuth, HTTPDigestAuth
-        import requests.exceptions
+        """Request the configured URL.
 
-        auth_map = {
-            'basic': HTTPBasicAuth,
-            'digest': HTTPDigestAuth,
-        }
+        In case the resource has not changed since the previous request, the
+        previous reply is returned again. This is determined using the
+        ``ETag`` and ``Last-Modified`` headers for HTTP(S) and the
+        modification time and size for ``file://`` URLs.
+        """
+        import requests.exceptions
 
-        session = requests.Session()
-        try:
-            from requests_file import FileAdapter
-            session.mount('file://', FileAdapter())
-        except ImportError:
-            pass
+        file_validator = self._file_validator()
+        if (file_validator is not None and
+                file_validator == self._file_validator_seen and
+                self._last_reply is not None):
+            return self._last_reply
 
+        session = _session_for(self._url, self._username)
         try:
-            reply = session.get(self._url, timeout=self._timeout)
+            kwargs = {'timeout': self._timeout}  # type: Dict[str, Any]
+            if self._auth is not None:
+                # reuse the authentication negotiated by a previous request
+                # to avoid an unauthenticated round trip
+                kwargs['auth'] = self._auth
+            if self._last_reply is not None and self._validators:
+                kwargs['headers'] = self._validators
+            reply = session.get(self._url, **kwargs)
 
             # replace reply with an authenticated version if credentials are
             # available and the server has requested authentication
             if self._username and self._password and reply.status_code == 401:
-                auth_scheme = reply.headers[
-                    'WWW-Authenticate'].split(' ')[0].lower()
-                if auth_scheme not in auth_map:
-                    raise SevereCheckError(
-                        'Unsupported authentication scheme {}'.format(
-                            auth_scheme))
-                auth = auth_map[auth_scheme](self._username, self._password)
-                reply = session.get(
-                    self._url, timeout=self._timeout, auth=auth)
+                self._auth = self._negotiate_auth(reply)
+                kwargs['auth'] = self._auth
+                reply = session.get(self._url, **kwargs)
+
+            if reply.status_code == 304 and self._last_reply is not None:
+                return self._last_reply
 
             reply.raise_for_status()
+            self._remember(reply, file_validator)
             return reply
         except requests.exceptions.RequestException as error:
             raise TemporaryCheckError(error) from error
 
+    def _file_validator(self) -> Optional[Tuple[int, int]]:
+        parts = urllib.parse.urlsplit(self._url)
+        if parts.scheme != 'file':
+            return None
+        try:
+            stat = os.stat(urllib.parse.unquote(parts.path))
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def _remember(self, reply: 'requests.model.Response',
+                  file_validator: Optional[Tuple[int, int]]) -> None:
+        validators = {}
+        etag = reply.headers.get('ETag')
+        if isinstance(etag, str):
+            validators['If-None-Match'] = etag
+        last_modified = reply.headers.get('Last-Modified')
+        if isinstance(last_modified, str):
+            validators['If-Modified-Since'] = last_modified
+
+        self._validators = validators
+        self._file_validator_seen = file_validator
+        if validators or file_validator is not None:
+            self._last_reply = reply
+        else:
+            self._last_reply = None
+
+    def _negotiate_auth(
+        self, reply: 'requests.model.Response',
+    ) -> 'requests.auth.AuthBase':
+        from requests.auth import HTTPBasicAuth, HTTPDigestAuth
+
+        auth_map = {
+            'basic': HTTPBasicAuth,
+            'digest': HTTPDigestAuth,
+        }
+
+        auth_scheme = reply.headers['WWW-Authenticate'].split(' ')[0].lower()
+        if auth_scheme not in auth_map:
+            raise SevereCheckError(
+                'Unsupported authentication scheme {}'.format(auth_scheme))
+        return auth_map[auth_scheme](self._username, self._password)
+
+
+_DEFAULT_HTTP_POOL_SIZE = 4
+
+_http_pool_size = _DEFAULT_HTTP_POOL_SIZE
+_sessions = {}  # type: Dict[Tuple[str, Optional[str]], requests.Session]
+_sessions_lock = threading.Lock()
+
+
+def set_http_pool_size(size: int) -> None:
+    """Configure the connections kept alive per host for network checks.
+
+    In case the size changes, existing sessions are closed so that the new
+    size applies to all further requests.
+    """
+    global _http_pool_size
+    with _sessions_lock:
+        if size == _http_pool_size:
+            return
+        _http_pool_size = size
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _session_for(url: str, username: Optional[str]) -> 'requests.Session':
+    """Return the process-wide session for the host of the given URL.
+
+    Sessions are shared between all checks requesting the same host with the
+    same user so that connections are kept alive between iterations.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    parts = urllib.parse.urlsplit(url)
+    key = ('{}://{}'.format(parts.scheme, parts.netloc), username)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1,
+                                  pool_maxsize=_http_pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            try:
+                from requests_file import FileAdapter
+                session.mount('file://', FileAdapter())
+            except ImportError:
+                pass
+            _sessions[key] = session
+        return session
+
 
 class XPathMixin(NetworkMixin):
 
@@ -131,6 +239,8 @@ class XPathMixin(NetworkMixin):
         self._xpath = xpath
         from lxml import etree  # noqa: S410 required flag set
         self._parser = etree.XMLParser(resolve_entities=False)
+        self._parsed_reply = None  # type: Optional[requests.model.Response]
+        self._root = None  # type: Any
 
     def evaluate(self) -> Sequence[Any]:
         import requests
@@ -138,9 +248,14 @@ class XPathMixin(NetworkMixin):
         from lxml import etree  # noqa: S410 using safe parser
 
         try:
-            reply = self.request().content
-            root = etree.fromstring(reply, parser=self._parser)  # noqa: S320
-            return root.xpath(self._xpath)
+            reply = self.request()
+            # unchanged resources result in the identical reply object, which
+            # doesn't need to be parsed again
+            if reply is not self._parsed_reply:
+                self._root = etree.fromstring(  # noqa: S320
+                    reply.content, parser=self._parser)
+                self._parsed_reply = reply
+            return self._root.xpath(self._xpath)
         except requests.exceptions.RequestException as error:
             raise TemporaryCheckError(error) from error
         except etree.XMLSyntaxError as error:
@@ -6,6 +6,8 @@ from typing import Optional
 
 from .util import CommandMixin, NetworkMixin, XPathMixin
 from .. import ConfigurationError, TemporaryCheckError, Wakeup
+from ..util import aio
+from ..util.watchdog import subprocess_kwargs
 
 
 class Calendar(NetworkMixin, Wakeup):
@@ -80,21 +82,31 @@ class Command(CommandMixin, Wakeup):
 
     def check(self, timestamp: datetime) -> Optional[datetime]:
         try:
-            output = subprocess.check_output(
+            return self._evaluate(subprocess.check_output(
                 self._command, shell=True,  # noqa: S602
-            ).splitlines()[0]
-            self.logger.debug('Command %s succeeded with output %s',
-                              self._command, output)
-            if output.strip():
-                return datetime.fromtimestamp(
-                    float(output.strip()),
-                    timezone.utc)
-            else:
-                return None
+                **subprocess_kwargs(),
+            ))
+        except (subprocess.CalledProcessError, ValueError) as error:
+            raise TemporaryCheckError(error) from error
 
+    async def check_async(self, timestamp: datetime) -> Optional[datetime]:
+        try:
+            return self._evaluate(
+                await aio.check_output(self._command, shell=True))
         except (subprocess.CalledProcessError, ValueError) as error:
             raise TemporaryCheckError(error) from error
 
+    def _evaluate(self, output: bytes) -> Optional[datetime]:
+        first_line = output.splitlines()[0]
+        self.logger.debug('Command %s succeeded with output %s',
+                          self._command, first_line)
+        if first_line.strip():
+            return datetime.fromtimestamp(
+                float(first_line.strip()),
+                timezone.utc)
+        else:
+            return None
+
 
 class Periodic(Wakeup):
     """Always indicates a wake up after a specified delta of time from now on.
@@ -1,4 +1,6 @@
 import logging
+import os
+import os.path
 from typing import Any, Optional, Type
 
 
@@ -14,3 +16,35 @@ def logger_by_class_instance(
     instance: Any, name: Optional[str] = None,
 ) -> logging.Logger:
     return logger_by_class(instance.__class__, name=name)
+
+
+def write_atomically(path: str, content: str, mode: int = 0o644,
+                     sync: bool = False) -> None:
+    """Replace a file so that readers never see partial content.
+
+    Args:
+        path:
+            the file to replace
+        content:
+            the new text content
+        mode:
+            permissions of the new file
+        sync:
+            if ``True``, flush the content to disk before replacing the file
+            so that a crash leaves either the old or the new content
+    """
+    import tempfile
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(
+        dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+            if sync:
+                f.flush()
+                os.fdatasync(f.fileno())
+        os.chmod(temporary, mode)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
@@ -0,0 +1,75 @@
+"""Helpers for implementing checks with non-blocking I/O based on asyncio."""
+
+import os
+import signal
+import subprocess
+from typing import Any, Optional, Sequence, Tuple, Union
+
+from .watchdog import subprocess_kwargs
+
+
+async def run_process(
+    args: Union[str, Sequence[str]],
+    shell: bool = False,
+    stdout: Optional[int] = None,
+    stderr: Optional[int] = None,
+) -> Tuple[int, bytes]:
+    """Run a process without blocking the event loop.
+
+    The process is started in a new session and its complete process group
+    is killed in case the awaiting task is cancelled, e.g. because of an
+    execution timeout. Thus, processes started by a shell are killed as well.
+
+    Args:
+        args:
+            the command to execute. A string in case of shell execution, else
+            the sequence of program arguments.
+        shell:
+            execute the command using the shell
+        stdout:
+            same as for :class:`subprocess.Popen`
+        stderr:
+            same as for :class:`subprocess.Popen`
+
+    Returns:
+        the return code of the process and its captured standard output
+    """
+    import asyncio
+    kwargs = dict(stdout=stdout, stderr=stderr, start_new_session=True,
+                  **subprocess_kwargs())  # type: Any
+    if shell:
+        assert isinstance(args, str)
+        process = await asyncio.create_subprocess_shell(args, **kwargs)
+    else:
+        process = await asyncio.create_subprocess_exec(*args, **kwargs)
+
+    try:
+        output, _ = await process.communicate()
+    except asyncio.CancelledError:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await process.wait()
+        raise
+
+    assert process.returncode is not None
+    return process.returncode, output or b''
+
+
+async def check_call(args: Union[str, Sequence[str]],
+                     shell: bool = False) -> None:
+    """Non-blocking variant of :func:`subprocess.check_call`."""
+    returncode, _ = await run_process(args, shell=shell)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, args)
+
+
+async def check_output(args: Union[str, Sequence[str]],
+                       shell: bool = False) -> bytes:
+    """Non-blocking variant of :func:`subprocess.check_output`."""
+    returncode, output = await run_process(args, shell=shell,
+                                           stdout=subprocess.PIPE)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, args, output)
+    return output
@@ -0,0 +1,185 @@
+"""Background sampling of network interface transfer rates.
+
+A :class:`BandwidthSampler` reads the byte counters of network interfaces in a
+background thread at a high frequency and keeps the resulting transfer rates
+in a fixed-size ring buffer per interface. Checks can then evaluate aggregates
+over the recent history without waiting for new samples.
+"""
+
+import collections
+import functools
+import logging
+import threading
+import time
+from typing import (Callable,
+                    Deque,
+                    Dict,
+                    Iterable,
+                    List,
+                    Optional,
+                    Sequence,
+                    Tuple)
+
+from .stats import percentile
+
+
+_logger = logging.getLogger(__name__)
+
+_STATISTICS = '/sys/class/net/{}/statistics/{}_bytes'
+
+Aggregate = Callable[[Sequence[float]], float]
+
+
+def read_counters(interface: str) -> Tuple[int, int]:
+    """Read the total bytes sent and received by an interface.
+
+    The counters are read from sysfs, which is much cheaper than querying the
+    counters of all interfaces via :func:`psutil.net_io_counters`. The latter
+    is used on systems without sysfs.
+
+    Returns:
+        bytes sent and received
+
+    Raises:
+        KeyError:
+            the interface does not exist
+    """
+    try:
+        counters = []
+        for direction in ('tx', 'rx'):
+            with open(_STATISTICS.format(interface, direction), 'r') as f:
+                counters.append(int(f.read()))
+        return counters[0], counters[1]
+    except (OSError, ValueError):
+        import psutil
+        stats = psutil.net_io_counters(pernic=True)[interface]
+        return stats.bytes_sent, stats.bytes_recv
+
+
+def mean(values: Sequence[float]) -> float:
+    return sum(values) / len(values)
+
+
+def maximum(values: Sequence[float]) -> float:
+    return max(values)
+
+
+def ewma(values: Sequence[float], alpha: float) -> float:
+    """Exponentially weighted moving average, oldest value first."""
+    average = values[0]
+    for value in values[1:]:
+        average = alpha * value + (1 - alpha) * average
+    return average
+
+
+def create_aggregate(name: str, q: float = 95.,
+                     alpha: float = 0.3) -> Aggregate:
+    """Create an aggregate function by its name.
+
+    Args:
+        name:
+            one of ``mean``, ``max``, ``ewma``, or ``percentile``
+        q:
+            the percentile to compute for ``percentile``
+        alpha:
+            the smoothing factor for ``ewma``
+
+    Raises:
+        ValueError:
+            unknown aggregate or invalid parameters
+    """
+    if name == 'mean':
+        return mean
+    elif name == 'max':
+        return maximum
+    elif name == 'ewma':
+        if not 0 < alpha <= 1:
+            raise ValueError('alpha must be in (0, 1]')
+        return functools.partial(ewma, alpha=alpha)
+    elif name == 'percentile':
+        if not 0 <= q <= 100:
+            raise ValueError('percentile must be in [0, 100]')
+        return functools.partial(percentile, q=q)
+    else:
+        raise ValueError('Unknown aggregate {}'.format(name))
+
+
+class BandwidthSampler:
+    """Samples the transfer rates of interfaces in a background thread.
+
+    Args:
+        interfaces:
+            names of the interfaces to sample
+        interval:
+            time in seconds between two samples
+        capacity:
+            number of rates to retain per interface
+    """
+
+    def __init__(self, interfaces: Iterable[str], interval: float,
+                 capacity: int) -> None:
+        self._interfaces = list(interfaces)
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._rates = {
+            interface: collections.deque(maxlen=capacity)
+            for interface in self._interfaces
+        }  # type: Dict[str, Deque[Tuple[float, float]]]
+        self._previous = {}  # type: Dict[str, Tuple[float, int, int]]
+        self._stopped = threading.Event()
+        self._thread = None  # type: Optional[threading.Thread]
+
+    def sample(self) -> None:
+        """Read the counters of all interfaces once and record the rates."""
+        now = time.monotonic()
+        for interface in self._interfaces:
+            try:
+                sent, received = read_counters(interface)
+            except KeyError:
+                _logger.debug('Interface %s is missing', interface)
+                self._previous.pop(interface, None)
+                continue
+
+            previous = self._previous.get(interface)
+            self._previous[interface] = (now, sent, received)
+            if previous is None or now <= previous[0]:
+                continue
+            old_time, old_sent, old_received = previous
+            if sent < old_sent or received < old_received:
+                # counters have been reset, e.g. because the interface was
+                # recreated
+                continue
+            with self._lock:
+                self._rates[interface].append((
+                    (sent - old_sent) / (now - old_time),
+                    (received - old_received) / (now - old_time),
+                ))
+
+    def rates(self, interface: str) -> List[Tuple[float, float]]:
+        """Return the retained sending and receiving rates, oldest first."""
+        with self._lock:
+            return list(self._rates[interface])
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            try:
+                self.sample()
+            except Exception:
+                _logger.warning('Unable to sample network bandwidth',
+                                exc_info=True)
+
+    def start(self) -> None:
+        """Start sampling in a daemon thread."""
+        if self._thread is not None:
+            return
+        self.sample()
+        self._thread = threading.Thread(
+            target=self._run, name='bandwidth-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -1,5 +1,18 @@
-from datetime import date, datetime, timedelta
-from typing import Dict, IO, Iterable, List, Mapping, Sequence, Union
+import bisect
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+import hashlib
+import threading
+from typing import (Any,
+                    Dict,
+                    IO,
+                    Iterable,
+                    List,
+                    Mapping,
+                    Optional,
+                    Sequence,
+                    Tuple,
+                    Union)
 
 from dateutil.rrule import rruleset, rrulestr
 import icalendar
@@ -123,6 +136,270 @@ def _collect_recurrence_changes(calendar: icalendar.Calendar) -> ChangeMapping:
     return recurring_changes
 
 
+def _is_aware(dt: datetime) -> bool:
+    return dt.tzinfo is not None and dt.tzinfo.utcoffset(dt) is not None
+
+
+class _OccurrenceIndex:
+    """Sorted occurrences of all events of a calendar for fast lookups.
+
+    Single events are indexed once. Recurring events are expanded for a
+    horizon around the requested intervals, which is extended lazily in case
+    a lookup exceeds it. Lookups use binary searches on the sorted
+    occurrences instead of expanding all recurrence rules again.
+
+    The inclusion rules applied for each kind of event are exactly the ones
+    used before the index existed so that results do not change.
+    """
+
+    # Keeps the horizon safely away from the requested intervals so that UTC
+    # offsets and the conversion to dates do not result in missing events.
+    _MARGIN = timedelta(days=2)
+    # Additional time expanded into the future when extending the horizon to
+    # avoid extending it again in every iteration.
+    _CHUNK = timedelta(weeks=4)
+
+    def __init__(self, calendar: icalendar.Calendar,
+                 recurring_changes: ChangeMapping) -> None:
+        self._lock = threading.Lock()
+
+        single_timed = []  # type: List[Tuple[datetime, int, CalendarEvent]]
+        single_all_day = []  # type: List[Tuple[date, int, CalendarEvent]]
+        self._single_timed_max_length = timedelta()
+        self._single_all_day_max_length = timedelta()
+        self._recurring = []  # type: List[Tuple[Any, ...]]
+
+        for seq, component in enumerate(calendar.walk('VEVENT')):
+            summary = component.get('summary')
+            start = component.get('dtstart').dt
+            end = component.get('dtend').dt
+            exclusions = component.get('exdate')
+            if exclusions and not isinstance(exclusions, list):
+                exclusions = [exclusions]
+
+            # Check whether dates are floating and localize with local time if
+            # so. Only works in case of non-all-day events, which are dates,
+            # not datetimes.
+            if isinstance(start, datetime) and not _is_aware(start):
+                assert not _is_aware(end)
+                local_time = tzlocal.get_localzone()
+                start = local_time.localize(start)
+                end = local_time.localize(end)
+
+            length = end - start
+
+            if component.get('rrule'):
+                rrule = component.get('rrule').to_ical().decode('utf-8')
+                changes = []  # type: Iterable[icalendar.cal.Event]
+                if component.get('uid') in recurring_changes:
+                    changes = recurring_changes[component.get('uid')]
+                self._recurring.append(
+                    (seq, summary, start, length, rrule, exclusions, changes))
+            elif isinstance(start, datetime):
+                single_timed.append(
+                    (start, seq, CalendarEvent(str(summary), start, end)))
+                self._single_timed_max_length = max(
+                    self._single_timed_max_length, length)
+            else:
+                single_all_day.append(
+                    (start, seq, CalendarEvent(str(summary), start, end)))
+                self._single_all_day_max_length = max(
+                    self._single_all_day_max_length, length)
+
+        single_timed.sort(key=lambda e: (e[0], e[1]))
+        single_all_day.sort(key=lambda e: (e[0], e[1]))
+        self._single_timed = single_timed
+        self._single_timed_starts = [e[0] for e in single_timed]
+        self._single_all_day = single_all_day
+        self._single_all_day_starts = [e[0] for e in single_all_day]
+
+        self._horizon = None  # type: Optional[Tuple[datetime, datetime]]
+        # recurring timed events are grouped by the timezone of their series
+        # because occurrences are compared in local time of the series.
+        self._timed = {}  # type: Dict[Any, _TimedOccurrences]
+        self._all_day = []  # type: List[Tuple[date, int, int, CalendarEvent]]
+        self._all_day_starts = []  # type: List[date]
+
+    def _covers(self, start_at: datetime, end_at: datetime) -> bool:
+        if self._horizon is None:
+            return False
+        return (self._horizon[0] <= start_at - self._MARGIN and
+                end_at + self._MARGIN <= self._horizon[1])
+
+    def _extend(self, start_at: datetime, end_at: datetime) -> None:
+        lower = start_at - self._MARGIN
+        upper = end_at + self._MARGIN + self._CHUNK
+        if self._horizon is not None:
+            # Earlier parts of the horizon are dropped because lookups usually
+            # move forward in time.
+            upper = max(upper, self._horizon[1])
+
+        timed = {}  # type: Dict[Any, _TimedOccurrences]
+        all_day = []  # type: List[Tuple[date, int, int, CalendarEvent]]
+        for (seq, summary, start, length, rrule, exclusions,
+             changes) in self._recurring:
+            if isinstance(start, datetime):
+                # complex processing in case of normal events
+                occurrences = timed.setdefault(
+                    start.tzinfo, _TimedOccurrences(start.tzinfo))
+                for sub, local_start in enumerate(_expand_rrule(
+                        rrule,
+                        start,
+                        length,
+                        exclusions,
+                        changes,
+                        lower,
+                        upper)):
+                    occurrences.add(local_start, length, seq, sub,
+                                    CalendarEvent(summary, local_start,
+                                                  local_start + length))
+            else:
+                # simplified processing for all-day events
+                for sub, local_start_date in enumerate(_expand_rrule_all_day(
+                        rrule,
+                        start,
+                        exclusions,
+                        lower,
+                        upper)):
+                    all_day.append((
+                        local_start_date, seq, sub,
+                        CalendarEvent(
+                            summary, local_start_date,
+                            local_start_date + timedelta(days=1))))
+
+        for occurrences in timed.values():
+            occurrences.finish()
+        all_day.sort(key=lambda e: (e[0], e[1], e[2]))
+
+        self._timed = timed
+        self._all_day = all_day
+        self._all_day_starts = [e[0] for e in all_day]
+        self._horizon = (lower, upper)
+
+    def lookup(self, start_at: datetime,
+               end_at: datetime) -> List[CalendarEvent]:
+        """Find all events overlapping with the given interval.
+
+        Returns:
+            matching events in the order of the calendar file
+        """
+        with self._lock:
+            if self._recurring and not self._covers(start_at, end_at):
+                self._extend(start_at, end_at)
+            timed = list(self._timed.values())
+            all_day = self._all_day
+            all_day_starts = self._all_day_starts
+
+        matches = []  # type: List[Tuple[int, int, CalendarEvent]]
+
+        # recurring events
+        for occurrences in timed:
+            matches.extend(occurrences.lookup(start_at, end_at))
+        for index in range(
+                bisect.bisect_left(all_day_starts, start_at.date()),
+                bisect.bisect_right(all_day_starts, end_at.date())):
+            _, seq, sub, event = all_day[index]
+            matches.append((seq, sub, event))
+
+        # single events
+        for index in range(
+                bisect.bisect_right(
+                    self._single_timed_starts,
+                    start_at - self._single_timed_max_length),
+                bisect.bisect_left(self._single_timed_starts, end_at)):
+            _, seq, event = self._single_timed[index]
+            if event.end > start_at:
+                matches.append((seq, 0, event))
+        for index in range(
+                bisect.bisect_right(
+                    self._single_all_day_starts,
+                    start_at.date() - self._single_all_day_max_length),
+                bisect.bisect_right(self._single_all_day_starts,
+                                    end_at.date())):
+            _, seq, event = self._single_all_day[index]
+            if event.end > start_at.date():
+                matches.append((seq, 0, event))
+
+        matches.sort(key=lambda m: (m[0], m[1]))
+        return [m[2] for m in matches]
+
+
+class _TimedOccurrences:
+    """Occurrences of recurring events sharing the same timezone.
+
+    Occurrences are sorted by their local time without timezone, which is the
+    representation used for expanding recurrence rules.
+    """
+
+    def __init__(self, tz: Any) -> None:
+        self._tz = tz
+        self._entries = []  # type: List[Tuple[Any, ...]]
+        self._starts = []  # type: List[datetime]
+        self._max_length = timedelta()
+
+    def add(self, start: datetime, length: timedelta, seq: int, sub: int,
+            event: CalendarEvent) -> None:
+        self._entries.append(
+            (start.replace(tzinfo=None), length, seq, sub, event))
+        self._max_length = max(self._max_length, length)
+
+    def finish(self) -> None:
+        self._entries.sort(key=lambda e: (e[0], e[2], e[3]))
+        self._starts = [e[0] for e in self._entries]
+
+    def lookup(self, start_at: datetime,
+               end_at: datetime) -> Iterable[Tuple[int, int, CalendarEvent]]:
+        start_at = start_at.astimezone(self._tz).replace(tzinfo=None)
+        end_at = end_at.astimezone(self._tz).replace(tzinfo=None)
+        for index in range(
+                bisect.bisect_left(self._starts, start_at - self._max_length),
+                bisect.bisect_right(self._starts, end_at)):
+            start, length, seq, sub, event = self._entries[index]
+            if start >= start_at - length:
+                yield seq, sub, event
+
+
+class _ParsedCalendar:
+    """A parsed calendar with information derived from it."""
+
+    def __init__(self, content: bytes) -> None:
+        self.calendar = icalendar.Calendar.from_ical(content)
+        # Do a first pass through the calendar to collect all exclusions to
+        # recurring events so that they can be handled when expanding
+        # recurrences.
+        self.recurring_changes = _collect_recurrence_changes(self.calendar)
+        self.index = _OccurrenceIndex(self.calendar, self.recurring_changes)
+
+
+_PARSED_CACHE_SIZE = 8
+
+_parsed_cache = OrderedDict()  # type: OrderedDict[bytes, _ParsedCalendar]
+_parsed_cache_lock = threading.Lock()
+
+
+def _parse_calendar(content: bytes) -> _ParsedCalendar:
+    """Parse calendar data or reuse the result of a previous parse.
+
+    Parsed calendars are shared by content so that the same calendar used by
+    several checks is only parsed once. The least recently used entries are
+    evicted once the cache is full.
+    """
+    key = hashlib.sha256(content).digest()
+    with _parsed_cache_lock:
+        parsed = _parsed_cache.get(key)
+        if parsed is not None:
+            _parsed_cache.move_to_end(key)
+            return parsed
+
+    parsed = _ParsedCalendar(content)
+
+    with _parsed_cache_lock:
+        _parsed_cache[key] = parsed
+        while len(_parsed_cache) > _PARSED_CACHE_SIZE:
+            _parsed_cache.popitem(last=False)
+    return parsed
+
+
 def list_calendar_events(data: IO[bytes],
                          start_at: datetime,
                          end_at: datetime) -> Sequence[CalendarEvent]:
@@ -137,81 +414,27 @@ def list_calendar_events(data: IO[bytes],
             do not include events that start after or exactly at this time
     """
 
-    def is_aware(dt: datetime) -> bool:
-        return dt.tzinfo is not None and dt.tzinfo.utcoffset(dt) is not None
-
     # some useful notes:
     # * end times and dates are non-inclusive for ical events
     # * start and end are dates for all-day events
 
-    calendar = icalendar.Calendar.from_ical(data.read())
+    events = _parse_calendar(data.read()).index.lookup(start_at, end_at)
+    return sorted(events, key=lambda e: _sort_key(e.start, start_at))
 
-    # Do a first pass through the calendar to collect all exclusions to
-    # recurring events so that they can be handled when expanding recurrences.
-    recurring_changes = _collect_recurrence_changes(calendar)
 
-    events = []
-    for component in calendar.walk():
-        if component.name != 'VEVENT':
-            continue
+def _sort_key(start: Union[datetime, date], start_at: datetime) -> datetime:
+    """Make the starts of all-day and timed events comparable.
 
-        summary = component.get('summary')
-        start = component.get('dtstart').dt
-        end = component.get('dtend').dt
-        exclusions = component.get('exdate')
-        if exclusions and not isinstance(exclusions, list):
-            exclusions = [exclusions]
-
-        # Check whether dates are floating and localize with local time if so.
-        # Only works in case of non-all-day events, which are dates, not
-        # datetimes.
-        if isinstance(start, datetime) and not is_aware(start):
-            assert not is_aware(end)
-            local_time = tzlocal.get_localzone()
-            start = local_time.localize(start)
-            end = local_time.localize(end)
-
-        length = end - start
-
-        if component.get('rrule'):
-            rrule = component.get('rrule').to_ical().decode('utf-8')
-            changes = []  # type: Iterable[icalendar.cal.Event]
-            if component.get('uid') in recurring_changes:
-                changes = recurring_changes[component.get('uid')]
-
-            if isinstance(start, datetime):
-                # complex processing in case of normal events
-                for local_start in _expand_rrule(
-                        rrule,
-                        start,
-                        length,
-                        exclusions,
-                        changes,
-                        start_at,
-                        end_at):
-                    local_end = local_start + length
-                    events.append(CalendarEvent(
-                        summary, local_start, local_end))
-            else:
-                # simplified processing for all-day events
-                for local_start_date in _expand_rrule_all_day(
-                        rrule,
-                        start,
-                        exclusions,
-                        start_at,
-                        end_at):
-                    local_end = local_start_date + timedelta(days=1)
-                    events.append(CalendarEvent(
-                        summary, local_start_date, local_end))
-        else:
-            # same distinction here as above
-            if isinstance(start, datetime):
-                # single events
-                if end > start_at and start < end_at:
-                    events.append(CalendarEvent(str(summary), start, end))
-            else:
-                # all-day events
-                if end > start_at.date() and start <= end_at.date():
-                    events.append(CalendarEvent(str(summary), start, end))
-
-    return sorted(events, key=lambda e: e.start)
+    All-day events start at midnight in the timezone of the lookup, which is
+    also the timezone used for selecting them.
+    """
+    if isinstance(start, datetime):
+        return start
+    midnight = datetime.combine(start, time.min)
+    tz = start_at.tzinfo
+    if tz is None:
+        return midnight
+    if hasattr(tz, 'localize'):
+        # pytz timezones need to determine the correct offset
+        return tz.localize(midnight)
+    return midnight.replace(tzinfo=tz)
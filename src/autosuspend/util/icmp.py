@@ -0,0 +1,215 @@
+"""An in-process implementation of ICMP echo requests (ping).
+
+Unprivileged ICMP datagram sockets are used if the system permits them (see
+``net.ipv4.ping_group_range``). Otherwise, raw sockets are tried, which
+require the ``CAP_NET_RAW`` capability.
+"""
+
+import concurrent.futures
+import logging
+import os
+import select
+import socket
+import struct
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+
+_logger = logging.getLogger(__name__)
+
+_ECHO_REQUEST = {
+    socket.AF_INET: 8, socket.AF_INET6: 128}  # type: Dict[int, int]
+_ECHO_REPLY = {
+    socket.AF_INET: 0, socket.AF_INET6: 129}  # type: Dict[int, int]
+_PROTOCOL = {socket.AF_INET: socket.IPPROTO_ICMP,
+             socket.AF_INET6: socket.IPPROTO_ICMPV6}  # type: Dict[int, int]
+
+_HEADER = struct.Struct('!BBHHH')
+
+
+class IcmpUnavailable(RuntimeError):
+    """Indicates that the system does not permit sending ICMP requests."""
+
+    pass
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack('!{}H'.format(len(data) // 2), data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def _open_socket(family: int) -> Tuple[socket.socket, bool]:
+    """Open an ICMP socket for the address family.
+
+    Returns:
+        the socket and whether it is a raw socket
+    """
+    error = None  # type: Optional[OSError]
+    for kind in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+        try:
+            sock = socket.socket(family, kind, _PROTOCOL[family])
+            sock.setblocking(False)
+            return sock, kind == socket.SOCK_RAW
+        except OSError as this_error:
+            error = this_error
+    raise IcmpUnavailable(
+        'Unable to open an ICMP socket: {}'.format(error)) from error
+
+
+def _resolve(host: str) -> Optional[Tuple[int, str]]:
+    try:
+        family, _, _, _, sockaddr = socket.getaddrinfo(
+            host, None, proto=socket.IPPROTO_TCP)[0]
+        return family, str(sockaddr[0])
+    except (socket.gaierror, IndexError):
+        _logger.debug('Unable to resolve host %s', host, exc_info=True)
+        return None
+
+
+def _resolve_all(hosts: Sequence[str],
+                 timeout: float) -> Dict[Tuple[int, str], List[str]]:
+    """Resolve all hosts concurrently and group them by their address.
+
+    Hosts that cannot be resolved within the timeout are left out so that a
+    single slow lookup does not delay the others.
+    """
+    by_address = {}  # type: Dict[Tuple[int, str], List[str]]
+    if not hosts:
+        return by_address
+
+    pool = concurrent.futures.ThreadPoolExecutor(
+        max_workers=len(hosts), thread_name_prefix='autosuspend-resolve')
+    try:
+        futures = [(host, pool.submit(_resolve, host)) for host in hosts]
+        concurrent.futures.wait([f for _, f in futures], timeout)
+    finally:
+        # pending lookups cannot be interrupted and finish in the background
+        pool.shutdown(wait=False)
+
+    for host, future in futures:
+        if not future.done():
+            _logger.debug('Resolving host %s timed out', host)
+            continue
+        resolved = future.result()
+        if resolved is not None:
+            by_address.setdefault(resolved, []).append(host)
+    return by_address
+
+
+def _normalize(address: str) -> str:
+    # link-local IPv6 replies contain the scope
+    return address.split('%', 1)[0]
+
+
+def _parse_reply(data: bytes, family: int, raw: bool,
+                 identifier: int, token: bytes) -> bool:
+    if raw and family == socket.AF_INET:
+        # raw IPv4 sockets deliver the IP header as well
+        data = data[(data[0] & 0x0f) * 4:]
+    if len(data) < _HEADER.size:
+        return False
+    kind, _, _, reply_identifier, _ = _HEADER.unpack_from(data)
+    if kind != _ECHO_REPLY[family]:
+        return False
+    # datagram sockets replace the identifier and filter replies in the
+    # kernel. Raw sockets receive all ICMP traffic.
+    if raw and reply_identifier != identifier:
+        return False
+    return data[_HEADER.size:] == token
+
+
+def ping(hosts: Sequence[str],
+         count: int = 1,
+         timeout: float = 1.,
+         wanted: Optional[int] = None) -> Set[str]:
+    """Send ICMP echo requests to all hosts at once.
+
+    Args:
+        hosts:
+            host names or IP addresses to ping
+        count:
+            number of requests to send to each host until it replies. The
+            requests are spread evenly over the timeout.
+        timeout:
+            time in seconds to wait for replies of all hosts, including the
+            time required for resolving the host names
+        wanted:
+            stop waiting as soon as this number of hosts has replied. ``None``
+            waits for all hosts.
+
+    Returns:
+        the hosts that replied
+
+    Raises:
+        IcmpUnavailable:
+            the system does not permit opening ICMP sockets
+    """
+    deadline = time.monotonic() + timeout
+    by_address = _resolve_all(hosts, timeout)
+    if wanted is None:
+        wanted = len(hosts)
+
+    sockets = {}  # type: Dict[int, Tuple[socket.socket, bool]]
+    try:
+        for family in {family for family, _ in by_address}:
+            sockets[family] = _open_socket(family)
+
+        identifier = os.getpid() & 0xffff
+        token = os.urandom(16)
+        replied = set()  # type: Set[Tuple[int, str]]
+        replied_hosts = set()  # type: Set[str]
+
+        # requests are spread over the time left after resolving
+        start = time.monotonic()
+        spread = max(0., deadline - start)
+        sent = 0
+        while len(replied_hosts) < wanted and len(replied) < len(by_address):
+            now = time.monotonic()
+            if now >= deadline:
+                break
+
+            next_send = start + sent * spread / count
+            if sent < count and now >= next_send:
+                for family, address in by_address.keys() - replied:
+                    sock, _ = sockets[family]
+                    packet = _HEADER.pack(_ECHO_REQUEST[family], 0, 0,
+                                          identifier, sent) + token
+                    if family == socket.AF_INET:
+                        # the kernel computes the checksum for ICMPv6
+                        packet = (packet[:2] +
+                                  struct.pack('!H', _checksum(packet)) +
+                                  packet[4:])
+                    try:
+                        sock.sendto(packet, (address, 0))
+                    except OSError:
+                        _logger.debug('Unable to send echo request to %s',
+                                      address, exc_info=True)
+                sent += 1
+                continue
+
+            wait_until = deadline if sent >= count else min(
+                deadline, start + sent * spread / count)
+            readable, _, _ = select.select(
+                [s for s, _ in sockets.values()], [], [],
+                max(0., wait_until - now))
+            for family, (sock, raw) in sockets.items():
+                if sock not in readable:
+                    continue
+                try:
+                    data, sender = sock.recvfrom(2048)
+                except OSError:
+                    continue
+                key = (family, _normalize(sender[0]))
+                if key in by_address and _parse_reply(
+                        data, family, raw, identifier, token):
+                    replied.add(key)
+                    replied_hosts.update(by_address[key])
+
+        return replied_hosts
+    finally:
+        for sock, _ in sockets.values():
+            sock.close()
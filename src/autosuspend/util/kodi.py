@@ -0,0 +1,307 @@
+"""A shared client for Kodi's JSON-RPC notification channel.
+
+Kodi pushes notifications such as ``Player.OnPlay`` to all clients connected
+to its raw TCP JSON-RPC interface (port 9090 by default). A
+:class:`KodiClient` keeps one such connection open in a background thread and
+tracks the player state in memory. Requests can be sent over the same
+connection, which avoids an HTTP round trip per request.
+
+Use :func:`client_for` to obtain the client for an instance so that all checks
+against the same Kodi instance share a single connection. Each user has to
+hand the client back via :func:`release` once it is not needed anymore.
+"""
+
+import codecs
+import itertools
+import json
+import logging
+import socket
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+_logger = logging.getLogger(__name__)
+
+PLAYING = 'playing'
+PAUSED = 'paused'
+STOPPED = 'stopped'
+
+_NOTIFICATION_STATES = {
+    'Player.OnPlay': PLAYING,
+    'Player.OnResume': PLAYING,
+    'Player.OnAVStart': PLAYING,
+    'Player.OnPause': PAUSED,
+    'Player.OnStop': STOPPED,
+    'System.OnQuit': STOPPED,
+}
+
+
+class KodiClient:
+    """Keeps a JSON-RPC connection to Kodi open in the background.
+
+    Args:
+        host:
+            host name of the Kodi instance
+        port:
+            port of the raw TCP JSON-RPC interface
+        timeout:
+            timeout in seconds for connecting
+        min_backoff:
+            initial delay in seconds before reconnecting after a failure
+        max_backoff:
+            maximum delay in seconds between reconnection attempts. The delay
+            doubles with each failed attempt.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: float,
+        min_backoff: float = 1.,
+        max_backoff: float = 60.,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._timeout = timeout
+        self._min_backoff = min_backoff
+        self._max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._socket = None  # type: Optional[socket.socket]
+        self._player_state = None  # type: Optional[str]
+        self._ids = itertools.count(1)
+        self._pending = {}  # type: Dict[int, Callable[[Dict], None]]
+        self._stopped = threading.Event()
+        self._thread = None  # type: Optional[threading.Thread]
+
+    @property
+    def connected(self) -> bool:
+        with self._lock:
+            return self._socket is not None
+
+    def player_state(self) -> Optional[str]:
+        """Return the current player state.
+
+        Returns:
+            one of :data:`PLAYING`, :data:`PAUSED`, or :data:`STOPPED`, or
+            ``None`` in case the state is unknown because there is no
+            connection
+        """
+        with self._lock:
+            return self._player_state
+
+    def call(self, method: str, params: Optional[Dict] = None,
+             timeout: Optional[float] = None) -> Any:
+        """Call a JSON-RPC method over the persistent connection.
+
+        Args:
+            method:
+                name of the method
+            params:
+                parameters of the call
+            timeout:
+                time in seconds to wait for the response. Defaults to the
+                connection timeout.
+
+        Returns:
+            the ``result`` of the response
+
+        Raises:
+            ConnectionError:
+                not connected or the connection was lost
+            TimeoutError:
+                no response within the timeout
+            ValueError:
+                Kodi responded with an error
+        """
+        done = threading.Event()
+        response = {}  # type: Dict
+
+        def receive(message: Dict) -> None:
+            response.update(message)
+            done.set()
+
+        request_id = self._send(method, params, receive)
+        if not done.wait(self._timeout if timeout is None else timeout):
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise TimeoutError('No response from Kodi for {}'.format(method))
+        if 'error' in response:
+            raise ValueError('Kodi returned an error for {}: {}'.format(
+                method, response['error']))
+        if 'result' not in response:
+            raise ConnectionError('Connection to Kodi lost')
+        return response['result']
+
+    def _send(self, method: str, params: Optional[Dict],
+              callback: Callable[[Dict], None]) -> int:
+        request = {'jsonrpc': '2.0', 'method': method,
+                   'id': next(self._ids)}  # type: Dict[str, Any]
+        if params is not None:
+            request['params'] = params
+        with self._lock:
+            if self._socket is None:
+                raise ConnectionError('Not connected to Kodi at {}:{}'.format(
+                    self._host, self._port))
+            self._pending[request['id']] = callback
+            try:
+                self._socket.sendall(json.dumps(request).encode('utf-8'))
+            except OSError as error:
+                self._pending.pop(request['id'], None)
+                raise ConnectionError(error) from error
+        return request['id']
+
+    def _handle(self, message: Any, notified: Dict[str, bool]) -> None:
+        if not isinstance(message, dict):
+            return
+        if 'id' in message:
+            with self._lock:
+                callback = self._pending.pop(message['id'], None)
+            if callback is not None:
+                callback(message)
+        elif message.get('method') in _NOTIFICATION_STATES:
+            _logger.debug('Kodi notification %s', message['method'])
+            notified['any'] = True
+            with self._lock:
+                self._player_state = _NOTIFICATION_STATES[message['method']]
+
+    def _request_initial_state(self, notified: Dict[str, bool]) -> None:
+        def receive(message: Dict) -> None:
+            # notifications received in the meantime are more recent
+            if notified['any'] or not message:
+                return
+            try:
+                booleans = message['result']
+                if booleans['Player.Playing']:
+                    state = PLAYING
+                elif booleans['Player.Paused']:
+                    state = PAUSED
+                else:
+                    state = STOPPED
+            except (KeyError, TypeError):
+                _logger.warning('Unexpected reply from Kodi: %s', message)
+                return
+            with self._lock:
+                self._player_state = state
+
+        self._send('XBMC.GetInfoBooleans',
+                   {'booleans': ['Player.Playing', 'Player.Paused']},
+                   receive)
+
+    def _watch(self) -> None:
+        sock = socket.create_connection((self._host, self._port),
+                                        timeout=self._timeout)
+        sock.settimeout(None)
+        with self._lock:
+            self._socket = sock
+        if self._stopped.is_set():
+            return
+
+        notified = {'any': False}
+        self._request_initial_state(notified)
+
+        decoder = json.JSONDecoder()
+        text = codecs.getincrementaldecoder('utf-8')()
+        buffer = ''
+        while not self._stopped.is_set():
+            data = sock.recv(4096)
+            if not data:
+                raise ConnectionError('Connection closed by Kodi')
+            buffer = (buffer + text.decode(data)).lstrip()
+            # Kodi sends JSON objects without any delimiter
+            while buffer:
+                try:
+                    message, end = decoder.raw_decode(buffer)
+                except ValueError:
+                    break
+                buffer = buffer[end:].lstrip()
+                self._handle(message, notified)
+
+    def _disconnect(self) -> None:
+        with self._lock:
+            sock = self._socket
+            self._socket = None
+            self._player_state = None
+            pending = list(self._pending.values())
+            self._pending = {}
+        if sock is not None:
+            sock.close()
+        # wake up all waiting calls
+        for callback in pending:
+            callback({})
+
+    def _run(self) -> None:
+        backoff = self._min_backoff
+        while not self._stopped.is_set():
+            try:
+                self._watch()
+            except Exception as error:
+                if self._stopped.is_set():
+                    break
+                if self.connected:
+                    backoff = self._min_backoff
+                self._disconnect()
+                _logger.warning(
+                    'No notification connection to Kodi at %s:%s (%s). '
+                    'Reconnecting in %s seconds',
+                    self._host, self._port, error, backoff)
+                self._stopped.wait(backoff)
+                backoff = min(2 * backoff, self._max_backoff)
+        self._disconnect()
+
+    def start(self) -> None:
+        """Connect and listen for notifications in a daemon thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name='kodi-client', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Close the connection and stop the background thread."""
+        self._stopped.set()
+        with self._lock:
+            sock = self._socket
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_clients = {}  # type: Dict[Tuple[str, int], KodiClient]
+_users = {}  # type: Dict[Tuple[str, int], int]
+_clients_lock = threading.Lock()
+
+
+def client_for(host: str, port: int, timeout: float) -> KodiClient:
+    """Return the shared and started client for a Kodi instance."""
+    with _clients_lock:
+        client = _clients.get((host, port))
+        if client is None:
+            client = KodiClient(host, port, timeout)
+            client.start()
+            _clients[(host, port)] = client
+            _users[(host, port)] = 0
+        _users[(host, port)] += 1
+        return client
+
+
+def release(client: KodiClient) -> None:
+    """Release a client obtained via :func:`client_for`.
+
+    The client is stopped once its last user has released it.
+    """
+    with _clients_lock:
+        key = next((k for k, c in _clients.items() if c is client), None)
+        if key is None:
+            return
+        _users[key] -= 1
+        if _users[key] > 0:
+            return
+        del _clients[key]
+        del _users[key]
+    client.stop()
@@ -0,0 +1,321 @@
+"""Exports metrics of the daemon in the Prometheus text format.
+
+The shared :class:`Metrics` are updated by the main loop, which only mutates
+in-memory counters. Rendering and exporting happens in background threads,
+either by atomically replacing a file for the textfile collector of the
+Prometheus node exporter (:class:`TextfileExporter`) or by serving the
+metrics via HTTP (:class:`HttpExporter`).
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import write_atomically
+
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5.,
+                   10., 30., 60.)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace(
+        '"', '\\"')
+
+
+def _labels(name: str, kind: str, **extra: str) -> str:
+    labels = [('check', name), ('type', kind)] + sorted(extra.items())
+    return '{' + ','.join('{}="{}"'.format(key, _escape(value))
+                          for key, value in labels) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class _Histogram:
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Metrics about check executions and the suspension state.
+
+    All updates are cheap in-memory operations. Exporters are informed about
+    changes via :meth:`wait_changed`.
+
+    Args:
+        buckets:
+            upper bounds in seconds of the check duration histogram buckets
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self._buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._generation = 0
+        # (check name, check type) -> values
+        self._durations = {}  # type: Dict[Tuple[str, str], _Histogram]
+        self._matches = {}  # type: Dict[Tuple[str, str], int]
+        self._errors = {}  # type: Dict[Tuple[str, str], int]
+        self._idle_since = None  # type: Optional[float]
+        self._next_wakeup = None  # type: Optional[float]
+        self._suspends = 0
+
+    def _touch(self) -> None:
+        self._generation += 1
+        self._changed.notify_all()
+
+    def observe_check(self, name: str, kind: str, duration: float,
+                      matched: bool, failed: bool) -> None:
+        """Account a single execution of a check.
+
+        Args:
+            name:
+                name of the check
+            kind:
+                ``activity`` or ``wakeup``
+            duration:
+                wall-clock time of the execution in seconds
+            matched:
+                whether the check detected activity or a wake up
+            failed:
+                whether the check raised a temporary error
+        """
+        key = (str(name), kind)
+        with self._lock:
+            histogram = self._durations.get(key)
+            if histogram is None:
+                histogram = self._durations[key] = _Histogram(self._buckets)
+                self._matches[key] = 0
+                self._errors[key] = 0
+            histogram.observe(duration)
+            self._matches[key] += matched
+            self._errors[key] += failed
+            self._touch()
+
+    def set_idle_since(self, timestamp: Optional[float]) -> None:
+        """Set the UNIX timestamp since which the system is idle."""
+        with self._lock:
+            if timestamp != self._idle_since:
+                self._idle_since = timestamp
+                self._touch()
+
+    def set_next_wakeup(self, timestamp: Optional[float]) -> None:
+        """Set the UNIX timestamp of the next scheduled wake up."""
+        with self._lock:
+            if timestamp != self._next_wakeup:
+                self._next_wakeup = timestamp
+                self._touch()
+
+    def count_suspend(self) -> None:
+        """Account a suspension of the system."""
+        with self._lock:
+            self._suspends += 1
+            self._touch()
+
+    def wait_changed(self, generation: int,
+                     timeout: Optional[float] = None) -> int:
+        """Wait until the metrics differ from a previously seen state.
+
+        Args:
+            generation:
+                the value returned by the previous call or ``-1`` to return
+                immediately
+            timeout:
+                maximum time to wait in seconds
+
+        Returns:
+            the current generation of the metrics
+        """
+        with self._lock:
+            self._changed.wait_for(lambda: self._generation != generation,
+                                   timeout)
+            return self._generation
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []  # type: List[str]
+
+        def header(metric: str, kind: str, description: str) -> None:
+            lines.append('# HELP {} {}'.format(metric, description))
+            lines.append('# TYPE {} {}'.format(metric, kind))
+
+        with self._lock:
+            metric = 'autosuspend_check_duration_seconds'
+            header(metric, 'histogram', 'Wall-clock time of check executions.')
+            for (name, kind), histogram in sorted(self._durations.items()):
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append('{}_bucket{} {}'.format(
+                        metric, _labels(name, kind, le=_format_value(bound)),
+                        count))
+                lines.append('{}_bucket{} {}'.format(
+                    metric, _labels(name, kind, le='+Inf'), histogram.count))
+                lines.append('{}_sum{} {}'.format(
+                    metric, _labels(name, kind),
+                    _format_value(histogram.sum)))
+                lines.append('{}_count{} {}'.format(
+                    metric, _labels(name, kind), histogram.count))
+
+            for metric, description, values in (
+                    ('autosuspend_check_matches_total',
+                     'Number of check executions that matched.',
+                     self._matches),
+                    ('autosuspend_check_temporary_errors_total',
+                     'Number of check executions with temporary errors.',
+                     self._errors)):
+                header(metric, 'counter', description)
+                for (name, kind), value in sorted(values.items()):
+                    lines.append('{}{} {}'.format(
+                        metric, _labels(name, kind), value))
+
+            for metric, description, timestamp in (
+                    ('autosuspend_idle_since_timestamp_seconds',
+                     'Time since which the system is idle, 0 if active.',
+                     self._idle_since),
+                    ('autosuspend_next_wakeup_timestamp_seconds',
+                     'Time of the next scheduled wake up, 0 if none.',
+                     self._next_wakeup)):
+                header(metric, 'gauge', description)
+                lines.append('{} {}'.format(
+                    metric, _format_value(timestamp or 0)))
+
+            metric = 'autosuspend_suspends_total'
+            header(metric, 'counter', 'Number of initiated suspensions.')
+            lines.append('{} {}'.format(metric, self._suspends))
+
+        return '\n'.join(lines) + '\n'
+
+
+class TextfileExporter:
+    """Writes the metrics to a file whenever they change.
+
+    Args:
+        metrics:
+            the metrics to export
+        path:
+            the file to write, usually inside the directory of the node
+            exporter's textfile collector with a ``.prom`` suffix
+    """
+
+    def __init__(self, metrics: Metrics, path: str) -> None:
+        self._metrics = metrics
+        self._path = path
+        self._stopped = threading.Event()
+        self._thread = None  # type: Optional[threading.Thread]
+
+    def write(self) -> None:
+        """Write the current state of the metrics."""
+        try:
+            # the collector usually runs as a different user
+            write_atomically(self._path, self._metrics.render(), 0o644)
+        except OSError:
+            _logger.warning('Unable to write metrics to %s', self._path,
+                            exc_info=True)
+
+    def _run(self) -> None:
+        generation = -1
+        while not self._stopped.is_set():
+            # time out regularly to notice stop requests
+            current = self._metrics.wait_changed(generation, 1.)
+            if current != generation:
+                generation = current
+                self.write()
+
+    def start(self) -> None:
+        """Write on changes in a daemon thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name='metrics-textfile', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class HttpExporter:
+    """Serves the metrics via HTTP on ``/metrics``.
+
+    Args:
+        metrics:
+            the metrics to export
+        address:
+            the address to listen on
+        port:
+            the port to listen on, ``0`` for an arbitrary free one
+    """
+
+    def __init__(self, metrics: Metrics, address: str, port: int) -> None:
+        import http.server
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+
+            def do_GET(self) -> None:  # noqa: N802
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type',
+                                 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                _logger.debug('%s - %s', self.address_string(),
+                              format % args)
+
+        self._server = http.server.ThreadingHTTPServer((address, port),
+                                                       Handler)
+        self._server.daemon_threads = True
+        self._thread = None  # type: Optional[threading.Thread]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> None:
+        """Serve requests in a daemon thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name='metrics-http',
+            daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving requests."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """Return the metrics shared by the whole process."""
+    return _metrics
@@ -0,0 +1,173 @@
+"""Tracks the state of an MPD server via a persistent connection.
+
+Instead of connecting for every query, a background thread keeps a single
+connection open and waits for changes of the player subsystem using MPD's
+``idle`` command. The most recent status is kept in memory.
+
+As ``idle`` blocks until the server reports a change, TCP keepalive probes are
+used to detect half-open connections, e.g. after the server has dropped off
+the network. The status is unknown until the connection has been
+re-established.
+"""
+
+import logging
+import os
+import socket
+import threading
+from typing import Any, Dict, Optional
+
+
+_logger = logging.getLogger(__name__)
+
+
+class MpdWatcher:
+    """Keeps the status of an MPD server up to date in the background.
+
+    Args:
+        host:
+            host name of the MPD server
+        port:
+            port of the MPD server
+        timeout:
+            timeout in seconds for connecting and for regular commands
+        min_backoff:
+            initial delay in seconds before reconnecting after a failure
+        max_backoff:
+            maximum delay in seconds between reconnection attempts. The delay
+            doubles with each failed attempt.
+        keepalive:
+            seconds without any traffic after which the connection is probed.
+            Unanswered probes are repeated every ``timeout`` seconds before
+            the connection is considered lost.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: float,
+        min_backoff: float = 1.,
+        max_backoff: float = 60.,
+        keepalive: float = 60.,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._timeout = timeout
+        self._min_backoff = min_backoff
+        self._max_backoff = max_backoff
+        self._keepalive = keepalive
+        self._lock = threading.Lock()
+        self._state = None  # type: Optional[Dict]
+        self._error = None  # type: Optional[Exception]
+        self._attempted = threading.Event()
+        self._stopped = threading.Event()
+        self._client = None  # type: Optional[Any]
+        self._thread = None  # type: Optional[threading.Thread]
+
+    def state(self) -> Dict:
+        """Return the most recent status reported by the server.
+
+        Directly after starting, this waits for the initial connection for at
+        most the configured timeout.
+
+        Raises:
+            ConnectionError:
+                there currently is no connection to the server
+        """
+        self._attempted.wait(self._timeout)
+        with self._lock:
+            if self._state is None:
+                raise ConnectionError(
+                    'Not connected to MPD at {}:{}: {}'.format(
+                        self._host, self._port, self._error))
+            return self._state
+
+    def _update(self, state: Optional[Dict],
+                error: Optional[Exception] = None) -> None:
+        with self._lock:
+            self._state = state
+            self._error = error
+        self._attempted.set()
+
+    def _enable_keepalive(self, fd: int) -> None:
+        options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        # the timing options are Linux-specific
+        if hasattr(socket, 'TCP_KEEPIDLE'):
+            options += [
+                (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE,
+                 max(1, int(self._keepalive))),
+                (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL,
+                 max(1, int(self._timeout))),
+                (socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3),
+            ]
+        with socket.socket(fileno=os.dup(fd)) as sock:
+            if sock.family not in (socket.AF_INET, socket.AF_INET6):
+                return
+            for level, option, value in options:
+                sock.setsockopt(level, option, value)
+
+    def _watch(self) -> None:
+        from mpd import MPDClient
+        client = MPDClient()
+        client.timeout = self._timeout
+        client.connect(self._host, self._port)
+        with self._lock:
+            self._client = client
+        try:
+            self._enable_keepalive(client.fileno())
+            self._update(client.status())
+            while not self._stopped.is_set():
+                # blocks until the player changes, stop() interrupts, or the
+                # keepalive probes fail
+                client.idle('player')
+                self._update(client.status())
+        finally:
+            with self._lock:
+                self._client = None
+            client.disconnect()
+
+    def _run(self) -> None:
+        backoff = self._min_backoff
+        while not self._stopped.is_set():
+            try:
+                self._watch()
+            except Exception as error:
+                if self._stopped.is_set():
+                    return
+                with self._lock:
+                    was_connected = self._state is not None
+                if was_connected:
+                    backoff = self._min_backoff
+                self._update(None, error)
+                _logger.warning(
+                    'Lost connection to MPD at %s:%s (%s). '
+                    'Reconnecting in %s seconds',
+                    self._host, self._port, error, backoff)
+                self._stopped.wait(backoff)
+                backoff = min(2 * backoff, self._max_backoff)
+
+    def start(self) -> None:
+        """Connect and watch the server in a daemon thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name='mpd-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Close the connection and stop the background thread."""
+        self._stopped.set()
+        with self._lock:
+            client = self._client
+        if client is not None:
+            # wake up the pending idle command by shutting down the socket
+            try:
+                with socket.fromfd(client.fileno(), socket.AF_INET,
+                                   socket.SOCK_STREAM) as sock:
+                    sock.shutdown(socket.SHUT_RDWR)
+            except Exception:
+                _logger.debug('Unable to interrupt MPD connection',
+                              exc_info=True)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,99 @@
+"""Orders checks so that cheap and likely matching ones are executed first.
+
+Without ``all_checks``, activity checks are executed until the first one
+matches. The expected cost until a match is minimized by executing checks in
+increasing order of their cost divided by their probability to match. Both
+values are estimated per check name as exponential moving averages of the
+executions recorded in the shared :class:`CheckStatistics`.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar('T')
+
+
+class CheckStatistics:
+    """Moving averages of the duration and the match rate of checks.
+
+    Args:
+        weight:
+            weight of a new observation in the moving averages, between 0
+            (exclusive) and 1
+        min_match_rate:
+            lower bound of the match rate used for scoring so that checks
+            which have never matched are still ordered by their cost
+    """
+
+    def __init__(self, weight: float = 0.2,
+                 min_match_rate: float = 0.01) -> None:
+        self._weight = weight
+        self._min_match_rate = min_match_rate
+        self._lock = threading.Lock()
+        # check name -> (average duration, average match rate)
+        self._averages = {}  # type: Dict[str, Tuple[float, float]]
+
+    def observe(self, name: str, duration: float, matched: bool) -> None:
+        """Account a single execution of a check.
+
+        Args:
+            name:
+                name of the check
+            duration:
+                wall-clock time of the execution in seconds
+            matched:
+                whether the check detected activity
+        """
+        with self._lock:
+            previous = self._averages.get(name)
+            if previous is None:
+                self._averages[name] = (duration, float(matched))
+            else:
+                self._averages[name] = (
+                    previous[0] + self._weight * (duration - previous[0]),
+                    previous[1] + self._weight * (matched - previous[1]))
+
+    def averages(self, name: str) -> Optional[Tuple[float, float]]:
+        """Return the average duration and match rate of a check, if known."""
+        with self._lock:
+            return self._averages.get(name)
+
+    def score(self, name: str) -> float:
+        """Return the expected cost per match of a check.
+
+        Checks without any recorded execution score ``0`` so that they are
+        executed early and their statistics become known.
+        """
+        averages = self.averages(name)
+        if averages is None:
+            return 0.
+        duration, match_rate = averages
+        return duration / max(match_rate, self._min_match_rate)
+
+
+def order(checks: Iterable[T], adaptive: bool,
+          statistics: CheckStatistics) -> List[T]:
+    """Sort checks by their priority and optionally by their score.
+
+    Checks with a higher ``priority`` attribute always come first. Within the
+    same priority, checks keep their configured order unless ``adaptive`` is
+    ``True``, in which case they are sorted by :meth:`CheckStatistics.score`.
+    """
+    def key(check: T) -> Tuple[float, float]:
+        priority = getattr(check, 'priority', 0)
+        if not adaptive:
+            return (-priority, 0.)
+        return (-priority,
+                statistics.score(getattr(check, 'name',
+                                         type(check).__name__)))
+
+    return sorted(checks, key=key)
+
+
+_statistics = CheckStatistics()
+
+
+def get_statistics() -> CheckStatistics:
+    """Return the check statistics shared by the whole process."""
+    return _statistics
@@ -0,0 +1,102 @@
+"""Snapshots of the process table shared by all checks of an iteration.
+
+Walking the process table is expensive on hosts with many processes. Checks
+therefore query a :class:`ProcessSnapshot` via :func:`snapshot` instead of
+iterating the processes on their own. Inside of :func:`iteration_scope` the
+snapshot is only captured once and shared between all checks. Outside of it,
+each call captures a new snapshot.
+"""
+
+import contextlib
+import threading
+from typing import (Any,
+                    Dict,
+                    FrozenSet,
+                    Iterable,
+                    Iterator,
+                    List,
+                    Optional,
+                    Set)
+
+
+class ProcessSnapshot:
+    """Selected attributes of all processes at a point in time.
+
+    Attributes that could not be determined for a process, e.g. because of
+    missing permissions, are ``None``.
+    """
+
+    def __init__(self, infos: Iterable[Dict[str, Any]],
+                 attrs: FrozenSet[str]) -> None:
+        self._infos = list(infos)
+        self.attrs = attrs
+
+    @classmethod
+    def capture(cls, attrs: Iterable[str]) -> 'ProcessSnapshot':
+        """Capture the current process table.
+
+        Args:
+            attrs:
+                the :class:`psutil.Process` attributes to collect
+
+        Returns:
+            the new snapshot
+        """
+        import psutil
+        attrs = frozenset(attrs)
+        return cls(
+            (p.info for p in psutil.process_iter(attrs=sorted(attrs))),
+            attrs,
+        )
+
+    def names(self) -> Set[str]:
+        """Return the names of all processes."""
+        return {info['name'] for info in self._infos
+                if info.get('name') is not None}
+
+    def names_of_user(self, user: str) -> List[str]:
+        """Return the names of all processes owned by the given user."""
+        return [info['name'] for info in self._infos
+                if info.get('username') == user and
+                info.get('name') is not None]
+
+
+_lock = threading.Lock()
+_in_scope = False
+_current = None  # type: Optional[ProcessSnapshot]
+# attributes requested by checks so far. Remembering them ensures that a
+# single snapshot suffices in subsequent iterations.
+_wanted = frozenset()  # type: FrozenSet[str]
+
+
+def snapshot(attrs: Iterable[str]) -> ProcessSnapshot:
+    """Provide a snapshot containing at least the requested attributes.
+
+    Args:
+        attrs:
+            the :class:`psutil.Process` attributes required by the caller
+    """
+    global _current, _wanted
+    attrs = frozenset(attrs)
+    with _lock:
+        if not _in_scope:
+            return ProcessSnapshot.capture(attrs)
+        _wanted = _wanted | attrs
+        if _current is None or not attrs <= _current.attrs:
+            _current = ProcessSnapshot.capture(_wanted)
+        return _current
+
+
+@contextlib.contextmanager
+def iteration_scope() -> Iterator[None]:
+    """Share a single snapshot between all :func:`snapshot` calls inside."""
+    global _current, _in_scope
+    with _lock:
+        _in_scope = True
+        _current = None
+    try:
+        yield
+    finally:
+        with _lock:
+            _in_scope = False
+            _current = None
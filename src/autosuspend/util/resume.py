@@ -0,0 +1,92 @@
+"""Detects that the system has resumed from suspension."""
+
+import logging
+import os
+import time
+from typing import Optional
+
+
+_logger = logging.getLogger(__name__)
+
+
+def suspended_seconds() -> Optional[float]:
+    """Return the total time the system has spent in suspension.
+
+    ``CLOCK_BOOTTIME`` includes the time the system was suspended, whereas
+    ``CLOCK_MONOTONIC`` does not. Their difference therefore only grows while
+    the system is suspended.
+
+    Returns:
+        the suspended time in seconds or ``None`` in case the required clocks
+        are not available on this platform
+    """
+    try:
+        return (time.clock_gettime(time.CLOCK_BOOTTIME) -
+                time.clock_gettime(time.CLOCK_MONOTONIC))
+    except (AttributeError, OSError):
+        return None
+
+
+class ResumeDetector:
+    """Detects suspensions using the system clocks and a marker file.
+
+    The marker file is the traditional way of detecting suspensions, which is
+    created by an external service before the system suspends.
+
+    Args:
+        woke_up_file:
+            path of the marker file. ``None`` disables checking the file.
+        threshold:
+            minimal suspended time in seconds to consider as a suspension
+    """
+
+    def __init__(self, woke_up_file: Optional[str] = None,
+                 threshold: float = 1.) -> None:
+        self._woke_up_file = woke_up_file
+        self._threshold = threshold
+        self._last_suspended = suspended_seconds()
+        if self._last_suspended is None:
+            _logger.info('System clocks do not allow detecting suspensions. '
+                         'Relying on the woke up file only.')
+
+    def check(self) -> bool:
+        """Determine whether the system was suspended since the last call."""
+        resumed = False
+
+        suspended = suspended_seconds()
+        if suspended is not None and self._last_suspended is not None:
+            if suspended - self._last_suspended >= self._threshold:
+                _logger.info('System has been suspended for %.0f seconds',
+                             suspended - self._last_suspended)
+                resumed = True
+        self._last_suspended = suspended
+
+        if self._woke_up_file is not None and \
+                os.path.isfile(self._woke_up_file):
+            _logger.debug('Found woke up file %s', self._woke_up_file)
+            os.remove(self._woke_up_file)
+            resumed = True
+
+        return resumed
+
+    def sleep(self, duration: float, granularity: float) -> bool:
+        """Sleep for the given time unless a resume is detected before.
+
+        Args:
+            duration:
+                the time to sleep in seconds
+            granularity:
+                interval in seconds in which to check for a resume while
+                sleeping
+
+        Returns:
+            ``True`` in case the sleep was aborted because the system resumed
+        """
+        remaining = duration
+        while remaining > 0:
+            step = min(remaining, granularity)
+            time.sleep(step)
+            remaining -= step
+            if self.check():
+                return True
+        return False
@@ -0,0 +1,189 @@
+"""Persists the state of the processor across restarts of the daemon.
+
+The state is kept in a small JSON file. It is only rewritten if the state has
+actually changed, which happens at most a few times per idle period. Each
+write is synced to disk so that a crash of the system leaves a consistent
+file behind. In between, only the modification time of the file is updated
+in every iteration so that the time the daemon has not been running can be
+determined on restarts.
+"""
+
+import datetime
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+from . import write_atomically
+
+
+_logger = logging.getLogger(__name__)
+
+_VERSION = 1
+
+
+class State(NamedTuple):
+    idle_since: Optional[datetime.datetime] = None
+    last_suspend: Optional[datetime.datetime] = None
+    last_wakeup: Optional[datetime.datetime] = None
+
+
+def boot_time() -> Optional[float]:
+    """Return the UNIX timestamp at which the system has been booted.
+
+    Returns:
+        the timestamp or ``None`` if it cannot be determined
+    """
+    try:
+        return time.time() - time.clock_gettime(time.CLOCK_BOOTTIME)
+    except (AttributeError, OSError):
+        pass
+    try:
+        import psutil
+        return psutil.boot_time()
+    except Exception:
+        return None
+
+
+def _encode(value: Optional[datetime.datetime]) -> Optional[float]:
+    return value.timestamp() if value is not None else None
+
+
+def _decode(value: Any) -> Optional[datetime.datetime]:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError('Invalid timestamp {!r}'.format(value))
+    return datetime.datetime.fromtimestamp(value, datetime.timezone.utc)
+
+
+def validate(state: State, now: datetime.datetime,
+             booted_at: Optional[float],
+             updated_at: Optional[datetime.datetime] = None,
+             max_age: Optional[float] = None) -> State:
+    """Discard the parts of a restored state that cannot be trusted anymore.
+
+    Args:
+        state:
+            the restored state
+        now:
+            the current time
+        booted_at:
+            UNIX timestamp of the system boot, if known
+        updated_at:
+            the time the state has been confirmed by the daemon for the last
+            time, if known
+        max_age:
+            maximum time in seconds since ``updated_at`` for which the idle
+            time is continued. In case the daemon has not been running for a
+            longer time, the system might have been used in between.
+
+    Returns:
+        the state without invalid entries
+    """
+    if any(t is not None and t > now
+           for t in (state.idle_since, state.last_suspend)):
+        _logger.warning('Persisted state lies in the future. The clock has '
+                        'probably been changed. Discarding it')
+        return State()
+
+    idle_since = state.idle_since
+    if idle_since is not None:
+        if booted_at is not None and idle_since.timestamp() < booted_at:
+            _logger.info('System has been rebooted since it became idle at '
+                         '%s. Discarding the idle time', idle_since)
+            idle_since = None
+        elif (state.last_suspend is not None and
+              idle_since < state.last_suspend):
+            _logger.info('System has been suspended since it became idle at '
+                         '%s. Discarding the idle time', idle_since)
+            idle_since = None
+        elif (updated_at is not None and max_age is not None and
+              (now - updated_at).total_seconds() > max_age):
+            _logger.info('Persisted state has not been updated since %s. '
+                         'Discarding the idle time', updated_at)
+            idle_since = None
+
+    return state._replace(idle_since=idle_since)
+
+
+class StateFile:
+    """A file holding the persisted :class:`State`.
+
+    Args:
+        path:
+            location of the file. The containing directory has to exist.
+        max_age:
+            maximum time in seconds between two :meth:`touch` calls for which
+            a restored idle time is still continued
+    """
+
+    def __init__(self, path: str, max_age: Optional[float] = None) -> None:
+        self._path = path
+        self.max_age = max_age
+        self._written = None  # type: Optional[State]
+
+    def updated_at(self) -> Optional[datetime.datetime]:
+        """Return the last time the file has been written or touched.
+
+        Returns:
+            the time or ``None`` if the file does not exist
+        """
+        try:
+            return datetime.datetime.fromtimestamp(
+                os.stat(self._path).st_mtime, datetime.timezone.utc)
+        except OSError:
+            return None
+
+    def touch(self) -> None:
+        """Confirm that the persisted state is still current.
+
+        Only the modification time of the file is updated.
+        """
+        if self._written is None:
+            return
+        try:
+            os.utime(self._path)
+        except OSError:
+            _logger.debug('Unable to touch state file %s', self._path,
+                          exc_info=True)
+
+    def load(self) -> State:
+        """Read the persisted state.
+
+        Missing or unreadable files result in an empty state.
+        """
+        try:
+            with open(self._path) as f:
+                content = json.load(f)
+            if content.get('version') != _VERSION:
+                raise ValueError('Unsupported version {!r}'.format(
+                    content.get('version')))
+            state = State(*(_decode(content.get(field))
+                            for field in State._fields))
+        except FileNotFoundError:
+            return State()
+        except (OSError, ValueError, AttributeError, OverflowError):
+            _logger.warning('Unable to read state file %s. Ignoring it',
+                            self._path, exc_info=True)
+            return State()
+        self._written = state
+        return state
+
+    def save(self, state: State) -> None:
+        """Write the state if it differs from the last written one."""
+        if state == self._written:
+            return
+        content = {'version': _VERSION}  # type: Dict[str, Any]
+        content.update((field, _encode(value))
+                       for field, value in zip(State._fields, state))
+        try:
+            write_atomically(self._path,
+                             json.dumps(content, sort_keys=True) + '\n',
+                             0o600, sync=True)
+        except OSError:
+            _logger.warning('Unable to write state file %s', self._path,
+                            exc_info=True)
+            return
+        self._written = state
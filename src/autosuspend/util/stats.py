@@ -0,0 +1,21 @@
+"""Statistical helpers shared by different parts of the daemon."""
+
+import math
+from typing import Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Compute a percentile with linear interpolation between ranks.
+
+    Args:
+        values:
+            the values to aggregate
+        q:
+            the percentile in the range ``[0, 100]``
+    """
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100.
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return (ordered[lower] +
+            (ordered[upper] - ordered[lower]) * (rank - lower))
@@ -1,29 +1,200 @@
-from typing import Iterable, Tuple
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+_logger = logging.getLogger(__name__)
+
+_LOGIND_BUS_NAME = 'org.freedesktop.login1'
+_LOGIND_PATH = '/org/freedesktop/login1'
+_MANAGER_INTERFACE = 'org.freedesktop.login1.Manager'
+_SESSION_INTERFACE = 'org.freedesktop.login1.Session'
+_PROPERTIES_INTERFACE = 'org.freedesktop.DBus.Properties'
+
+
+def _session_properties(bus: Any, path: str) -> dict:
+    return bus.get_object(_LOGIND_BUS_NAME, path).GetAll(
+        _SESSION_INTERFACE, dbus_interface=_PROPERTIES_INTERFACE)
+
+
+def _query_logind_sessions(bus: Any) -> List[Tuple[str, str, dict]]:
+    login1 = bus.get_object(_LOGIND_BUS_NAME, _LOGIND_PATH)
+    sessions = login1.ListSessions(dbus_interface=_MANAGER_INTERFACE)
+    return [(str(s[0]), str(s[4]), _session_properties(bus, s[4]))
+            for s in sessions]
+
+
+class LogindSessionModel:
+    """An in-memory model of the logind sessions.
+
+    The model is loaded once and afterwards kept current through the
+    ``SessionNew`` and ``SessionRemoved`` signals of logind and the
+    ``PropertiesChanged`` signals of the sessions. Reading the model does not
+    cause any D-Bus traffic.
+
+    Signals are only delivered if the bus is attached to a running main loop.
+
+    Args:
+        bus:
+            the system bus connection to use
+    """
+
+    def __init__(self, bus: Any) -> None:
+        self._bus = bus
+        self._lock = threading.Lock()
+        # session id -> (object path, properties)
+        self._sessions = {}  # type: Dict[str, Tuple[str, dict]]
+
+        bus.add_signal_receiver(
+            self._on_session_new, signal_name='SessionNew',
+            dbus_interface=_MANAGER_INTERFACE, bus_name=_LOGIND_BUS_NAME,
+            path=_LOGIND_PATH)
+        bus.add_signal_receiver(
+            self._on_session_removed, signal_name='SessionRemoved',
+            dbus_interface=_MANAGER_INTERFACE, bus_name=_LOGIND_BUS_NAME,
+            path=_LOGIND_PATH)
+        bus.add_signal_receiver(
+            self._on_properties_changed, signal_name='PropertiesChanged',
+            dbus_interface=_PROPERTIES_INTERFACE, bus_name=_LOGIND_BUS_NAME,
+            path_keyword='path')
+        # logind might be restarted and lose track of sent signals
+        bus.watch_name_owner(_LOGIND_BUS_NAME, self._on_owner_changed)
+
+        self.reload()
+
+    def reload(self) -> None:
+        """Load all sessions and their properties from scratch."""
+        sessions = {session_id: (path, properties)
+                    for session_id, path, properties
+                    in _query_logind_sessions(self._bus)}
+        with self._lock:
+            self._sessions = sessions
+
+    def sessions(self) -> List[Tuple[str, dict]]:
+        """Return the known sessions and their properties."""
+        with self._lock:
+            return [(session_id, dict(properties))
+                    for session_id, (_, properties)
+                    in sorted(self._sessions.items())]
+
+    def _update(self, session_id: str, path: str) -> None:
+        try:
+            properties = _session_properties(self._bus, path)
+        except Exception:
+            # the session might already be gone again
+            _logger.debug('Unable to get properties of session %s',
+                          session_id, exc_info=True)
+            return
+        with self._lock:
+            self._sessions[session_id] = (path, properties)
+
+    def _on_session_new(self, session_id: str, path: str) -> None:
+        _logger.debug('New logind session %s', session_id)
+        self._update(str(session_id), str(path))
+
+    def _on_session_removed(self, session_id: str, path: str) -> None:
+        _logger.debug('Removed logind session %s', session_id)
+        with self._lock:
+            self._sessions.pop(str(session_id), None)
+
+    def _on_properties_changed(self, interface: str, changed: dict,
+                               invalidated: Iterable[str],
+                               path: Optional[str] = None) -> None:
+        if interface != _SESSION_INTERFACE:
+            return
+        with self._lock:
+            session_id = next(
+                (session_id for session_id, (session_path, _)
+                 in self._sessions.items() if session_path == path),
+                None)
+        if session_id is None:
+            return
+        # Not all properties, e.g. State, announce their changes. Reload all
+        # of them to stay consistent with the ones that changed.
+        self._update(session_id, str(path))
+
+    def _on_owner_changed(self, owner: str) -> None:
+        if not owner:
+            return
+        try:
+            self.reload()
+        except Exception:
+            _logger.warning('Unable to reload logind sessions',
+                            exc_info=True)
+
+
+_model_lock = threading.Lock()
+_model = None  # type: Optional[LogindSessionModel]
+_model_unavailable = False
+# seconds to wait before setting up the model again after a failure
+_MODEL_RETRY_DELAY = 60.
+_model_retry_at = None  # type: Optional[float]
+
+
+def _create_model() -> Optional[LogindSessionModel]:
+    import dbus
+    import dbus.mainloop.glib
+    from gi.repository import GLib
+
+    dbus.mainloop.glib.threads_init()
+    bus = None
+    try:
+        bus = dbus.SystemBus(mainloop=dbus.mainloop.glib.DBusGMainLoop(),
+                             private=True)
+        model = LogindSessionModel(bus)
+    except dbus.exceptions.DBusException:
+        _logger.warning('Unable to track logind sessions via signals',
+                        exc_info=True)
+        if bus is not None:
+            # private connections are not closed automatically
+            bus.close()
+        return None
+    threading.Thread(target=GLib.MainLoop().run, name='logind-signals',
+                     daemon=True).start()
+    return model
+
+
+def logind_session_model() -> Optional[LogindSessionModel]:
+    """Return the shared session model.
+
+    Returns:
+        the model or ``None`` in case receiving signals is not possible
+        because PyGObject is not installed or setting up the model failed.
+        Failed setups are retried after one minute at the earliest.
+    """
+    global _model, _model_unavailable, _model_retry_at
+    with _model_lock:
+        if (_model is None and not _model_unavailable and
+                (_model_retry_at is None or
+                 time.monotonic() >= _model_retry_at)):
+            try:
+                _model = _create_model()
+                if _model is None:
+                    _model_retry_at = time.monotonic() + _MODEL_RETRY_DELAY
+            except ImportError:
+                _logger.info('D-Bus main loop integration is not available. '
+                             'Querying logind sessions on every request')
+                _model_unavailable = True
+        return _model
 
 
 def list_logind_sessions() -> Iterable[Tuple[str, dict]]:
     """List running logind sessions and their properties.
 
+    The sessions are read from the shared :class:`LogindSessionModel` if
+    possible. Otherwise, logind is queried directly.
+
     Returns:
         list of (session_id, properties dict):
             A list with tuples of sessions ids and their associated properties
             represented as dicts.
     """
+    model = logind_session_model()
+    if model is not None:
+        return model.sessions()
+
     import dbus
-    bus = dbus.SystemBus()
-    login1 = bus.get_object("org.freedesktop.login1",
-                            "/org/freedesktop/login1")
-
-    sessions = login1.ListSessions(
-        dbus_interface='org.freedesktop.login1.Manager')
-
-    results = []
-    for session_id, path in [(s[0], s[4]) for s in sessions]:
-        session = bus.get_object('org.freedesktop.login1', path)
-        properties_interface = dbus.Interface(
-            session, 'org.freedesktop.DBus.Properties')
-        properties = properties_interface.GetAll(
-            'org.freedesktop.login1.Session')
-        results.append((session_id, properties))
-
-    return results
+    return [(session_id, properties)
+            for session_id, _, properties
+            in _query_logind_sessions(dbus.SystemBus())]
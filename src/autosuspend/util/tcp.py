@@ -0,0 +1,129 @@
+"""Fast access to the TCP connections of the system.
+
+Instead of mapping all sockets to processes like
+:func:`psutil.net_connections` does, the kernel's connection tables in
+procfs are parsed directly. This does not require root permissions.
+"""
+
+import socket
+import struct
+import time
+from typing import (Container,
+                    FrozenSet,
+                    List,
+                    NamedTuple,
+                    Optional,
+                    Sequence,
+                    Tuple)
+
+
+TCP_TABLES = (
+    (socket.AF_INET, '/proc/net/tcp'),
+    (socket.AF_INET6, '/proc/net/tcp6'),
+)  # type: Sequence[Tuple[int, str]]
+
+_ESTABLISHED = '01'
+
+
+class Connection(NamedTuple):
+    family: int
+    laddr: Tuple[str, int]
+    raddr: Tuple[str, int]
+
+
+def _decode_address(family: int, encoded: str) -> Tuple[str, int]:
+    """Decode an address of the procfs tables.
+
+    Addresses are printed as 32 bit words in host byte order.
+    """
+    address, port = encoded.split(':')
+    words = [int(address[i:i + 8], 16) for i in range(0, len(address), 8)]
+    packed = struct.pack('={}I'.format(len(words)), *words)
+    return socket.inet_ntop(family, packed), int(port, 16)
+
+
+def established_connections(
+    local_ports: Optional[Container[int]] = None,
+) -> List[Connection]:
+    """List established TCP connections.
+
+    Args:
+        local_ports:
+            if provided, only report connections with one of these local
+            ports
+
+    Raises:
+        OSError:
+            the IPv4 connection table cannot be read, for instance because
+            this is not a Linux system. A missing IPv6 table is ignored.
+    """
+    connections = []
+    for family, path in TCP_TABLES:
+        try:
+            with open(path, 'r') as table:
+                lines = table.readlines()[1:]
+        except FileNotFoundError:
+            if family == socket.AF_INET6:
+                # IPv6 might be disabled
+                continue
+            raise
+
+        for line in lines:
+            fields = line.split()
+            if len(fields) < 4 or fields[3] != _ESTABLISHED:
+                continue
+            # filter by port before decoding any addresses
+            local_port = int(fields[1].rsplit(':', 1)[1], 16)
+            if local_ports is not None and local_port not in local_ports:
+                continue
+            connections.append(Connection(
+                family,
+                _decode_address(family, fields[1]),
+                _decode_address(family, fields[2])))
+    return connections
+
+
+def _interface_signature() -> Optional[FrozenSet[Tuple[int, str]]]:
+    try:
+        return frozenset(socket.if_nameindex())
+    except OSError:
+        return None
+
+
+class LocalAddresses:
+    """A cached set of the addresses of all local network interfaces.
+
+    The cache is refreshed in case the set of interfaces changes. Additionally,
+    unknown addresses trigger a refresh to detect changed addresses of
+    existing interfaces, which happens at most once per ``min_refresh``
+    seconds.
+    """
+
+    def __init__(self, min_refresh: float = 10.) -> None:
+        self._min_refresh = min_refresh
+        self._signature = None  # type: Optional[FrozenSet[Tuple[int, str]]]
+        self._addresses = None  # type: Optional[FrozenSet[Tuple[int, str]]]
+        self._refreshed_at = 0.
+
+    def _refresh(self) -> None:
+        import psutil
+        self._addresses = frozenset(
+            (item.family, item.address.split('%')[0])
+            for sublist in psutil.net_if_addrs().values()
+            for item in sublist)
+        self._refreshed_at = time.monotonic()
+
+    def __contains__(self, address: object) -> bool:
+        signature = _interface_signature()
+        if (self._addresses is None or signature is None or
+                signature != self._signature):
+            self._signature = signature
+            self._refresh()
+        assert self._addresses is not None
+
+        if address in self._addresses:
+            return True
+        if time.monotonic() - self._refreshed_at >= self._min_refresh:
+            self._refresh()
+            return address in self._addresses
+        return False
@@ -0,0 +1,231 @@
+"""Records timings of check executions and iterations.
+
+All records are kept in a bounded in-memory ring buffer of the shared
+:class:`Trace`, which is accessible via :func:`get_trace`. Records can be
+exported as JSON lines and aggregated into a summary per check.
+"""
+
+import collections
+import json
+import logging
+import threading
+import time
+from typing import (Any,
+                    Callable,
+                    Deque,
+                    Dict,
+                    Iterator,
+                    List,
+                    Optional,
+                    Tuple)
+
+from .stats import percentile
+
+
+_logger = logging.getLogger(__name__)
+
+
+class Trace:
+    """A bounded trace of check executions, iterations, and sleeps.
+
+    Each record is a dict with a ``kind`` of ``check``, ``iteration``, or
+    ``sleep`` and a UNIX ``timestamp``.
+
+    Args:
+        capacity:
+            maximum number of retained records. The oldest records are
+            dropped first.
+        path:
+            if given, :meth:`flush` appends new records as JSON lines to this
+            file
+    """
+
+    def __init__(self, capacity: int = 1000,
+                 path: Optional[str] = None) -> None:
+        self._lock = threading.Lock()
+        self._records = collections.deque(
+            maxlen=capacity)  # type: Deque[Dict[str, Any]]
+        self._unflushed = collections.deque(
+            maxlen=capacity)  # type: Deque[Dict[str, Any]]
+        self._path = path
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        record['timestamp'] = time.time()
+        with self._lock:
+            self._records.append(record)
+            if self._path is not None:
+                self._unflushed.append(record)
+
+    def record_check(self, name: str, kind: str, wall: float,
+                     cpu: Optional[float], result: Any,
+                     error: Optional[BaseException] = None) -> None:
+        """Record a single execution of a check.
+
+        Args:
+            name:
+                name of the check
+            kind:
+                ``activity`` or ``wakeup``
+            wall:
+                elapsed wall-clock time in seconds
+            cpu:
+                CPU time in seconds consumed by the thread executing the
+                check or ``None`` if unknown
+            result:
+                what the check returned
+            error:
+                the exception raised by the check, if any
+        """
+        self._append({
+            'kind': 'check',
+            'check': str(name),
+            'type': kind,
+            'wall': wall,
+            'cpu': cpu,
+            'result': None if result is None else str(result),
+            'error': None if error is None else type(error).__name__,
+        })
+
+    def record_iteration(self, wall: float, cpu: float, active: bool,
+                         wakeup_at: Optional[float]) -> None:
+        """Record the totals of an iteration.
+
+        Args:
+            wall:
+                elapsed wall-clock time in seconds
+            cpu:
+                CPU time in seconds consumed by the whole process
+            active:
+                whether activity was detected
+            wakeup_at:
+                the determined wake up time as UNIX timestamp, if any
+        """
+        self._append({
+            'kind': 'iteration',
+            'wall': wall,
+            'cpu': cpu,
+            'active': active,
+            'wakeup_at': wakeup_at,
+        })
+
+    def record_sleep(self, planned: float, actual: float,
+                     interrupted: bool) -> None:
+        """Record the sleep between two iterations.
+
+        Args:
+            planned:
+                the intended sleep duration in seconds
+            actual:
+                the measured sleep duration in seconds
+            interrupted:
+                whether the sleep was ended early by a resume
+        """
+        self._append({
+            'kind': 'sleep',
+            'planned': planned,
+            'actual': actual,
+            'lag': actual - planned,
+            'interrupted': interrupted,
+        })
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Return a copy of the retained records, oldest first."""
+        with self._lock:
+            return [dict(r) for r in self._records]
+
+    def json_lines(self) -> Iterator[str]:
+        """Serialize the retained records as JSON lines."""
+        for record in self.records():
+            yield json.dumps(record, sort_keys=True)
+
+    def flush(self) -> None:
+        """Append all records since the last flush to the configured file."""
+        if self._path is None:
+            return
+        with self._lock:
+            pending = list(self._unflushed)
+            self._unflushed.clear()
+        if not pending:
+            return
+        try:
+            with open(self._path, 'a') as f:
+                for record in pending:
+                    f.write(json.dumps(record, sort_keys=True) + '\n')
+        except OSError:
+            _logger.warning('Unable to write trace to %s', self._path,
+                            exc_info=True)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Aggregate the wall times of the retained check executions.
+
+        Returns:
+            per check name the number of executions (``count``), the number
+            of failed executions (``errors``), and the ``p50``, ``p95``, and
+            ``max`` of the wall time in seconds
+        """
+        walls = {}  # type: Dict[str, List[float]]
+        errors = {}  # type: Dict[str, int]
+        for record in self.records():
+            if record['kind'] != 'check':
+                continue
+            walls.setdefault(record['check'], []).append(record['wall'])
+            errors[record['check']] = errors.get(record['check'], 0) + (
+                record['error'] is not None)
+        return {
+            name: {
+                'count': len(values),
+                'errors': errors[name],
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'max': max(values),
+            }
+            for name, values in walls.items()
+        }
+
+    def format_summary(self) -> str:
+        """Render :meth:`summary` as a table, slowest checks first."""
+        rows = sorted(self.summary().items(), key=lambda i: -i[1]['p95'])
+        lines = ['{:<30} {:>6} {:>6} {:>9} {:>9} {:>9}'.format(
+            'check', 'count', 'errors', 'p50 [s]', 'p95 [s]', 'max [s]')]
+        for name, values in rows:
+            lines.append(
+                '{:<30} {:>6} {:>6} {:>9.3f} {:>9.3f} {:>9.3f}'.format(
+                    name, values['count'], values['errors'], values['p50'],
+                    values['p95'], values['max']))
+        return '\n'.join(lines)
+
+
+def timed(fn: Callable[..., Any],
+          *args: Any) -> Tuple[Callable[[], Optional[float]],
+                               Callable[[], Any]]:
+    """Prepare a call that measures the CPU time of the executing thread.
+
+    Returns:
+        a function returning the measured CPU time in seconds once the call
+        has finished (``None`` before) and the call itself
+    """
+    cpu = []  # type: List[float]
+
+    def call() -> Any:
+        start = time.thread_time()
+        try:
+            return fn(*args)
+        finally:
+            cpu.append(time.thread_time() - start)
+
+    return (lambda: cpu[0] if cpu else None), call
+
+
+_trace = Trace()
+
+
+def get_trace() -> Trace:
+    """Return the trace shared by the whole process."""
+    return _trace
+
+
+def configure(capacity: int, path: Optional[str]) -> Trace:
+    """Replace the shared trace with a newly configured one."""
+    global _trace
+    _trace = Trace(capacity, path)
+    return _trace
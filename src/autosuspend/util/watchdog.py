@@ -0,0 +1,154 @@
+"""Enforces time limits on function calls that may spawn subprocesses.
+
+Calls are executed in a separate thread and abandoned in case they exceed
+their time limit. Subprocesses launched from such a call using
+:func:`subprocess_kwargs` are marked so that their complete process trees can
+be killed once the call has been abandoned.
+"""
+
+import concurrent.futures
+import logging
+import os
+import threading
+from typing import (Any,
+                    Callable,
+                    Dict,
+                    List,
+                    Mapping,
+                    Optional,
+                    TYPE_CHECKING,
+                    TypeVar)
+import uuid
+
+
+if TYPE_CHECKING:
+    import psutil
+
+
+_logger = logging.getLogger(__name__)
+
+_MARKER = 'AUTOSUSPEND_WATCHDOG_TOKEN'
+
+_current = threading.local()
+
+T = TypeVar('T')
+
+
+class ExecutionTimeout(RuntimeError):
+    """Indicates that a call did not finish within its time limit.
+
+    Args:
+        message:
+            description of the timeout
+        pending:
+            future of the abandoned call. Its thread keeps running and
+            resolves the future once the call finishes eventually.
+    """
+
+    def __init__(self, message: str,
+                 pending: Optional[concurrent.futures.Future] = None,
+                 ) -> None:
+        super().__init__(message)
+        self.pending = pending
+
+
+def subprocess_kwargs(
+    env: Optional[Mapping[str, str]] = None,
+) -> Dict[str, Any]:
+    """Provide keyword arguments for launching subprocesses.
+
+    Pass the result to the functions of the :mod:`subprocess` module to make
+    the launched process known to the watchdog of the current call.
+
+    Args:
+        env:
+            the environment to use for the subprocess. ``None`` means that
+            the current environment is inherited.
+
+    Returns:
+        an empty dict in case the current thread is not supervised and no
+        environment was requested, else the environment to use
+    """
+    token = getattr(_current, 'token', None)
+    if token is None:
+        return {} if env is None else {'env': env}
+    marked = dict(os.environ if env is None else env)
+    marked[_MARKER] = token
+    return {'env': marked}
+
+
+def _find_marked_processes(token: str) -> List['psutil.Process']:
+    import psutil
+    marked = []
+    for child in psutil.Process().children(recursive=True):
+        try:
+            if child.environ().get(_MARKER) == token:
+                marked.append(child)
+        except (psutil.NoSuchProcess,
+                psutil.ZombieProcess,
+                psutil.AccessDenied):
+            pass
+    return marked
+
+
+def kill_processes(token: str) -> None:
+    """Kill all process trees launched by the supervised call ``token``."""
+    # Parents are killed before their children. Otherwise, a shell might
+    # still react to the death of its child and continue with other commands.
+    import psutil
+    victims = []  # type: List[psutil.Process]
+    for process in _find_marked_processes(token):
+        candidates = [process]
+        try:
+            candidates.extend(process.children(recursive=True))
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            pass
+        victims.extend(c for c in candidates if c not in victims)
+    for victim in victims:
+        _logger.info('Killing process %s', victim.pid)
+        try:
+            victim.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+
+
+def run_with_timeout(function: Callable[[], T], timeout: float,
+                     name: str = 'watchdog') -> T:
+    """Call a function and give up after the specified time.
+
+    Args:
+        function:
+            the function to call without arguments
+        timeout:
+            the maximum time to wait for the result in seconds
+        name:
+            name of the thread executing the function
+
+    Returns:
+        the result of the function call
+
+    Raises:
+        ExecutionTimeout:
+            the call did not finish in time. Subprocesses launched by the
+            call have been killed. The call itself cannot be stopped and is
+            available as :attr:`ExecutionTimeout.pending`.
+    """
+    token = uuid.uuid4().hex
+    future = concurrent.futures.Future()  # type: concurrent.futures.Future
+
+    def target() -> None:
+        _current.token = token
+        try:
+            future.set_result(function())
+        except Exception as error:
+            future.set_exception(error)
+
+    threading.Thread(target=target, name=name, daemon=True).start()
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError as error:
+        kill_processes(token)
+        raise ExecutionTimeout(
+            'Call did not finish within {} seconds'.format(timeout),
+            future,
+        ) from error
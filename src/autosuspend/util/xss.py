@@ -0,0 +1,331 @@
+"""Queries the idle time of X displays in-process using libXss.
+
+Connections to the displays are kept open between queries. They are
+authenticated with the cookie from the ``.Xauthority`` file of the user
+owning the display, which is passed to Xlib via ``XSetAuthorization``.
+
+Xlib terminates the process on I/O errors unless an exit handler can be
+registered via ``XSetIOErrorExitHandler`` (libX11 1.7 and newer). Dead
+connections are therefore detected before using them and, if possible,
+recovered from using such a handler. Without it, an X server disappearing
+between this detection and the query still terminates the process. See
+:attr:`IdleTimeQuery.safe`.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import socket
+import struct
+import threading
+from typing import Dict, Iterator, Optional, Tuple
+
+
+_logger = logging.getLogger(__name__)
+
+_FAMILY_LOCAL = 256
+_FAMILY_WILD = 65535
+
+
+class XssError(RuntimeError):
+    """Indicates that the idle time could not be queried."""
+
+    pass
+
+
+class XssUnavailable(XssError):
+    """Indicates that the required libraries are not installed."""
+
+    pass
+
+
+def _read_xauthority_entries(
+    path: str,
+) -> Iterator[Tuple[int, bytes, bytes, bytes, bytes]]:
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    offset = 0
+
+    def counted() -> bytes:
+        nonlocal offset
+        (length,) = struct.unpack_from('!H', data, offset)
+        value = data[offset + 2:offset + 2 + length]
+        if len(value) != length:
+            raise ValueError('Truncated Xauthority file')
+        offset += 2 + length
+        return value
+
+    while offset < len(data):
+        (family,) = struct.unpack_from('!H', data, offset)
+        offset += 2
+        address, number, name, cookie = (counted(), counted(), counted(),
+                                         counted())
+        yield family, address, number, name, cookie
+
+
+def read_xauthority(path: str, display: int) -> Optional[Tuple[bytes, bytes]]:
+    """Find the authorization for a local display in an Xauthority file.
+
+    Args:
+        path:
+            the Xauthority file to read
+        display:
+            number of the local display
+
+    Returns:
+        the authorization name and data, or ``None`` if the file does not
+        exist or does not contain an entry for the display
+
+    Raises:
+        XssError:
+            the file cannot be parsed
+    """
+    hostname = socket.gethostname().encode()
+    candidates = []
+    try:
+        entries = _read_xauthority_entries(path)
+        for family, address, number, name, cookie in entries:
+            if family not in (_FAMILY_LOCAL, _FAMILY_WILD):
+                continue
+            if number and number != str(display).encode():
+                continue
+            # exact matches of the host name are preferred
+            candidates.append((address != hostname, name, cookie))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error) as error:
+        raise XssError(
+            'Unable to read Xauthority file {}: {}'.format(
+                path, error)) from error
+
+    if not candidates:
+        return None
+    _, name, cookie = min(candidates, key=lambda c: c[0])
+    return name, cookie
+
+
+class _ScreenSaverInfo(ctypes.Structure):
+    _fields_ = [
+        ('window', ctypes.c_ulong),
+        ('state', ctypes.c_int),
+        ('kind', ctypes.c_int),
+        ('til_or_since', ctypes.c_ulong),
+        ('idle', ctypes.c_ulong),
+        ('event_mask', ctypes.c_ulong),
+    ]
+
+
+_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p,
+                                  ctypes.c_void_p)
+_IO_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p)
+_IO_ERROR_EXIT_HANDLER = ctypes.CFUNCTYPE(None, ctypes.c_void_p,
+                                          ctypes.c_void_p)
+
+
+class _Libraries:
+
+    def __init__(self) -> None:
+        paths = [ctypes.util.find_library(n) for n in ('X11', 'Xss')]
+        if None in paths:
+            raise XssUnavailable('libX11 or libXss not found')
+        try:
+            self.x11 = ctypes.CDLL(paths[0])
+            self.xss = ctypes.CDLL(paths[1])
+        except OSError as error:
+            raise XssUnavailable(error) from error
+
+        x11 = self.x11
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        x11.XDefaultRootWindow.restype = ctypes.c_ulong
+        x11.XConnectionNumber.argtypes = [ctypes.c_void_p]
+        x11.XSetAuthorization.argtypes = [ctypes.c_char_p, ctypes.c_int,
+                                          ctypes.c_char_p, ctypes.c_int]
+        x11.XSetAuthorization.restype = None
+        x11.XSetErrorHandler.argtypes = [_ERROR_HANDLER]
+        x11.XSetErrorHandler.restype = ctypes.c_void_p
+        x11.XSetIOErrorHandler.argtypes = [_IO_ERROR_HANDLER]
+        x11.XSetIOErrorHandler.restype = ctypes.c_void_p
+        self.has_exit_handler = hasattr(x11, 'XSetIOErrorExitHandler')
+        if self.has_exit_handler:
+            x11.XSetIOErrorExitHandler.argtypes = [
+                ctypes.c_void_p, _IO_ERROR_EXIT_HANDLER, ctypes.c_void_p]
+            x11.XSetIOErrorExitHandler.restype = None
+
+        xss = self.xss
+        xss.XScreenSaverQueryExtension.argtypes = [
+            ctypes.c_void_p, ctypes.POINTER(ctypes.c_int),
+            ctypes.POINTER(ctypes.c_int)]
+        xss.XScreenSaverQueryInfo.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong,
+            ctypes.POINTER(_ScreenSaverInfo)]
+
+        # displays which have reported errors
+        self.failed = set()  # type: set
+
+        # references to the callbacks need to be retained
+        self._error_handler = _ERROR_HANDLER(self._on_error)
+        self._io_error_handler = _IO_ERROR_HANDLER(self._on_io_error)
+        self.io_error_exit_handler = _IO_ERROR_EXIT_HANDLER(
+            self._on_io_error_exit)
+        # the default handlers terminate the process
+        x11.XSetErrorHandler(self._error_handler)
+        x11.XSetIOErrorHandler(self._io_error_handler)
+
+    def _on_error(self, display: int, event: int) -> int:
+        _logger.debug('X error on display %s', display)
+        self.failed.add(display)
+        return 0
+
+    def _on_io_error(self, display: int) -> int:
+        _logger.warning('Connection to X display lost')
+        self.failed.add(display)
+        return 0
+
+    def _on_io_error_exit(self, display: int, data: int) -> None:
+        self.failed.add(display)
+
+
+_lock = threading.RLock()
+_libraries = None  # type: Optional[_Libraries]
+
+
+def _load() -> _Libraries:
+    global _libraries
+    with _lock:
+        if _libraries is None:
+            _libraries = _Libraries()
+        return _libraries
+
+
+def _connection_closed(fd: int) -> bool:
+    poller = select.poll()
+    poller.register(fd, select.POLLIN | select.POLLHUP | select.POLLERR)
+    events = poller.poll(0)
+    if not events:
+        return False
+    if events[0][1] & (select.POLLHUP | select.POLLERR):
+        return True
+    # readable might also mean pending events. EOF tells them apart.
+    with socket.socket(fileno=os.dup(fd)) as sock:
+        try:
+            return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b''
+        except BlockingIOError:
+            return False
+        except OSError:
+            return True
+
+
+class IdleTimeQuery:
+    """Determines idle times of X displays via persistent connections.
+
+    Raises:
+        XssUnavailable:
+            libX11 or libXss cannot be loaded
+    """
+
+    def __init__(self) -> None:
+        self._libraries = _load()
+        # (display, xauthority) -> Display pointer
+        self._connections = {}  # type: Dict[Tuple[int, str], int]
+
+    @property
+    def safe(self) -> bool:
+        """Whether lost connections are survived in all cases.
+
+        This requires libX11 to provide ``XSetIOErrorExitHandler``.
+        """
+        return self._libraries.has_exit_handler
+
+    def _open(self, display: int, xauthority: str) -> int:
+        libs = self._libraries
+        authorization = read_xauthority(xauthority, display)
+        name = ':{}'.format(display).encode()
+        with _lock:
+            if authorization is not None:
+                auth_name, cookie = authorization
+                libs.x11.XSetAuthorization(auth_name, len(auth_name),
+                                           cookie, len(cookie))
+            try:
+                handle = libs.x11.XOpenDisplay(name)
+            finally:
+                if authorization is not None:
+                    # restore the default lookup via $XAUTHORITY
+                    libs.x11.XSetAuthorization(None, 0, None, 0)
+            if not handle:
+                raise XssError('Unable to open display :{}'.format(display))
+
+            if libs.has_exit_handler:
+                libs.x11.XSetIOErrorExitHandler(
+                    handle, libs.io_error_exit_handler, None)
+
+            event_base = ctypes.c_int()
+            error_base = ctypes.c_int()
+            if not libs.xss.XScreenSaverQueryExtension(
+                    handle, ctypes.byref(event_base),
+                    ctypes.byref(error_base)):
+                libs.x11.XCloseDisplay(handle)
+                raise XssError(
+                    'Display :{} lacks the MIT-SCREEN-SAVER extension'.format(
+                        display))
+        return handle
+
+    def _discard(self, key: Tuple[int, str], handle: int) -> None:
+        del self._connections[key]
+        libs = self._libraries
+        # closing requires I/O, which is only safe with an exit handler
+        if libs.has_exit_handler:
+            libs.x11.XCloseDisplay(handle)
+        libs.failed.discard(handle)
+
+    def idle_time(self, display: int, xauthority: str) -> float:
+        """Return the idle time of a local display.
+
+        Args:
+            display:
+                number of the local display
+            xauthority:
+                path of the Xauthority file of the user owning the display
+
+        Returns:
+            the idle time in seconds
+
+        Raises:
+            XssError:
+                the idle time could not be queried
+        """
+        libs = self._libraries
+        key = (display, xauthority)
+        with _lock:
+            handle = self._connections.get(key)
+            if handle is not None and (
+                    handle in libs.failed or
+                    _connection_closed(libs.x11.XConnectionNumber(handle))):
+                _logger.debug('Reconnecting to display :%s', display)
+                self._discard(key, handle)
+                handle = None
+            if handle is None:
+                handle = self._open(display, xauthority)
+                self._connections[key] = handle
+
+            info = _ScreenSaverInfo()
+            status = libs.xss.XScreenSaverQueryInfo(
+                handle, libs.x11.XDefaultRootWindow(handle),
+                ctypes.byref(info))
+            if not status or handle in libs.failed:
+                self._discard(key, handle)
+                raise XssError(
+                    'Unable to query idle time of display :{}'.format(
+                        display))
+            return info.idle / 1000.
+
+    def close(self) -> None:
+        """Close all connections."""
+        with _lock:
+            for key, handle in list(self._connections.items()):
+                self._discard(key, handle)
@@ -1,13 +1,21 @@
 import argparse
+import asyncio
+import concurrent.futures
 import configparser
 from datetime import datetime, timedelta, timezone
 import logging
+import os
 import subprocess
+import sys
+import threading
+from typing import List
 
 import dateutil.parser
 import pytest
 
 import autosuspend
+from autosuspend.checks.activity import Processes
+from autosuspend.util import metrics, ordering, state, trace
 
 
 class TestExecuteSuspend:
@@ -105,6 +113,102 @@ class TestSetUpChecks:
 
         mock_class.create.assert_called_once_with('Foo', parser['check.Foo'])
 
+    def test_generic_cache_options(self, mocker) -> None:
+        mock_class = mocker.patch('autosuspend.checks.activity.Mpd')
+        check = mocker.MagicMock(spec=autosuspend.checks.Activity)
+        mock_class.create.return_value = check
+
+        parser = configparser.ConfigParser()
+        parser.read_string('''[check.Foo]
+                           class = Mpd
+                           enabled = True
+                           cache_ttl = 600
+                           cache_temporary_errors = True''')
+
+        autosuspend.set_up_checks(parser, 'check', 'activity',
+                                  autosuspend.Activity)  # type: ignore
+
+        check.configure_cache.assert_called_once_with(600, True)
+        assert check.interval is None
+
+    def test_generic_interval_option(self, mocker) -> None:
+        mock_class = mocker.patch('autosuspend.checks.activity.Mpd')
+        check = mocker.MagicMock(spec=autosuspend.checks.Activity)
+        mock_class.create.return_value = check
+
+        parser = configparser.ConfigParser()
+        parser.read_string('''[check.Foo]
+                           class = Mpd
+                           enabled = True
+                           interval = 120''')
+
+        autosuspend.set_up_checks(parser, 'check', 'activity',
+                                  autosuspend.Activity)  # type: ignore
+
+        assert check.interval == 120
+
+    def test_generic_execution_timeout_option(self, mocker) -> None:
+        mock_class = mocker.patch('autosuspend.checks.activity.Mpd')
+        check = mocker.MagicMock(spec=autosuspend.checks.Activity)
+        mock_class.create.return_value = check
+
+        parser = configparser.ConfigParser()
+        parser.read_string('''[check.Foo]
+                           class = Mpd
+                           enabled = True
+                           execution_timeout = 2.5''')
+
+        autosuspend.set_up_checks(parser, 'check', 'activity',
+                                  autosuspend.Activity)  # type: ignore
+
+        assert check.execution_timeout == 2.5
+
+    def test_generic_priority_option(self, mocker) -> None:
+        mock_class = mocker.patch('autosuspend.checks.activity.Mpd')
+        check = mocker.MagicMock(spec=autosuspend.checks.Activity)
+        mock_class.create.return_value = check
+
+        parser = configparser.ConfigParser()
+        parser.read_string('''[check.Foo]
+                           class = Mpd
+                           enabled = True
+                           priority = 3''')
+
+        autosuspend.set_up_checks(parser, 'check', 'activity',
+                                  autosuspend.Activity)  # type: ignore
+
+        assert check.priority == 3
+
+    def test_non_positive_interval(self, mocker) -> None:
+        mock_class = mocker.patch('autosuspend.checks.activity.Mpd')
+        mock_class.create.return_value = mocker.MagicMock(
+            spec=autosuspend.checks.Activity)
+
+        parser = configparser.ConfigParser()
+        parser.read_string('''[check.Foo]
+                           class = Mpd
+                           enabled = True
+                           interval = 0''')
+
+        with pytest.raises(autosuspend.ConfigurationError):
+            autosuspend.set_up_checks(parser, 'check', 'activity',
+                                      autosuspend.Activity)  # type: ignore
+
+    def test_invalid_generic_options(self, mocker) -> None:
+        mock_class = mocker.patch('autosuspend.checks.activity.Mpd')
+        mock_class.create.return_value = mocker.MagicMock(
+            spec=autosuspend.checks.Activity)
+
+        parser = configparser.ConfigParser()
+        parser.read_string('''[check.Foo]
+                           class = Mpd
+                           enabled = True
+                           cache_ttl = never''')
+
+        with pytest.raises(autosuspend.ConfigurationError):
+            autosuspend.set_up_checks(parser, 'check', 'activity',
+                                      autosuspend.Activity)  # type: ignore
+
     def test_external_class(self, mocker) -> None:
         mock_class = mocker.patch('os.path.TestCheck', create=True)
         mock_class.create.return_value = mocker.MagicMock(
@@ -183,6 +287,187 @@ class TestSetUpChecks:
         mock_class.create.assert_called_once_with('Foo', parser['check.Foo'])
 
 
+class TestLazyImports:
+
+    HEAVY_MODULES = ['asyncio', 'dateutil', 'dbus', 'http.server',
+                     'icalendar', 'lxml', 'mpd', 'psutil', 'requests']
+
+    def _loaded_modules(self, code: str) -> List[str]:
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.path.dirname(
+            os.path.dirname(autosuspend.__file__))
+        code += '\nimport sys\nprint("\\n".join(sys.modules))'
+        output = subprocess.check_output([sys.executable, '-c', code],
+                                         env=env)
+        loaded = output.decode().splitlines()
+        return [m for m in self.HEAVY_MODULES if m in loaded]
+
+    def test_module_import(self) -> None:
+        assert self._loaded_modules(
+            'import autosuspend, autosuspend.checks.activity, '
+            'autosuspend.checks.wakeup') == []
+
+    def test_set_up_checks_loads_enabled_only(self) -> None:
+        assert self._loaded_modules(
+            'import configparser, autosuspend\n'
+            'parser = configparser.ConfigParser()\n'
+            'parser.read_string("""'
+            '[check.Load]\nenabled = True\nthreshold = 1000\n'
+            '[check.XPath]\nenabled = False\n"""'
+            ')\n'
+            'autosuspend.set_up_checks(parser, "check", "activity", '
+            'autosuspend.Activity)') == []
+
+
+class TestSetUpChecksReuse:
+
+    CONFIG = """
+[DEFAULT]
+threshold = 1000
+[check.Same]
+class = Load
+enabled = True
+[check.Changed]
+class = Load
+enabled = True
+"""
+
+    def _parse(self, content: str) -> configparser.ConfigParser:
+        parser = configparser.ConfigParser()
+        parser.read_string(content)
+        return parser
+
+    def _set_up(self, config, previous_config=None, previous_checks=()):
+        return {check.name: check for check in autosuspend.set_up_checks(
+            config, 'check', 'activity', autosuspend.Activity,
+            previous_config=previous_config,
+            previous_checks=previous_checks)}
+
+    def test_unchanged_sections_are_reused(self) -> None:
+        old_config = self._parse(self.CONFIG)
+        old = self._set_up(old_config)
+        new = self._set_up(
+            self._parse(self.CONFIG + 'interval = 10\n'),
+            old_config, old.values())
+
+        assert new['Same'] is old['Same']
+        assert new['Changed'] is not old['Changed']
+        assert new['Changed'].interval == 10
+
+    def test_default_section_changes_apply(self) -> None:
+        old_config = self._parse(self.CONFIG)
+        old = self._set_up(old_config)
+        new = self._set_up(
+            self._parse(self.CONFIG.replace('1000', '500')),
+            old_config, old.values())
+
+        assert new['Same'] is not old['Same']
+
+    def test_without_previous_config(self) -> None:
+        old = self._set_up(self._parse(self.CONFIG))
+        new = self._set_up(self._parse(self.CONFIG), None, old.values())
+
+        assert new['Same'] is not old['Same']
+
+
+class TestConfigReloader:
+
+    CONFIG = """
+[general]
+idle_time = 100
+suspend_cmd = echo suspend
+wakeup_cmd = echo wakeup
+[check.Kept]
+class = Load
+enabled = True
+threshold = 1000
+[check.Removed]
+class = Load
+enabled = True
+threshold = 1000
+"""
+
+    @pytest.fixture
+    def setup(self, tmpdir):
+        path = tmpdir.join('autosuspend.conf')
+        path.write(self.CONFIG)
+        args = autosuspend.parse_arguments(['-c', str(path)])
+        config = autosuspend.parse_config(args.config_file)
+        checks, wakeups = autosuspend.set_up_all_checks(config)
+        processor = autosuspend.configure_processor(args, config, checks,
+                                                    wakeups)
+        reloader = autosuspend.ConfigReloader(args, config, checks, wakeups)
+        return path, processor, reloader, {c.name: c for c in checks}
+
+    def test_no_request(self, setup) -> None:
+        path, processor, reloader, _ = setup
+        path.write('invalid')
+
+        assert reloader.apply(processor) is processor
+
+    def test_reload(self, setup, mocker) -> None:
+        path, processor, reloader, checks = setup
+        close = mocker.spy(checks['Removed'], 'close')
+        processor._idle_since = datetime.now(timezone.utc)
+        path.write(self.CONFIG.replace('[check.Removed]', '[check.Added]'))
+
+        reloader.request()
+        reloaded = reloader.apply(processor)
+
+        assert reloaded is not processor
+        assert reloaded._activities[0] is checks['Kept']
+        assert reloaded._activities[1].name == 'Added'
+        assert reloaded._idle_since == processor._idle_since
+        close.assert_called_once_with()
+        # only a single reload per request
+        assert reloader.apply(reloaded) is reloaded
+
+    def test_warns_about_options_requiring_restart(
+        self, setup, caplog,
+    ) -> None:
+        path, processor, reloader, _ = setup
+        path.write(self.CONFIG.replace(
+            'idle_time = 100', 'idle_time = 200\ninterval = 10'))
+
+        reloader.request()
+        with caplog.at_level(logging.WARNING):
+            assert reloader.apply(processor) is not processor
+
+        assert 'interval requires a restart' in caplog.text
+        assert 'idle_time' not in caplog.text
+
+    def test_invalid_config_keeps_previous(self, setup, caplog) -> None:
+        path, processor, reloader, _ = setup
+        path.write(self.CONFIG.replace('Load', 'DoesNotExist'))
+
+        reloader.request()
+
+        assert reloader.apply(processor) is processor
+        assert 'Unable to reload' in caplog.text
+
+    def test_invalid_general_section_closes_new_checks(self, setup,
+                                                       mocker) -> None:
+        path, processor, reloader, checks = setup
+        close = mocker.patch('autosuspend.checks.activity.Load.close')
+        path.write(self.CONFIG.replace(
+            '[check.Removed]', '[check.Added]').replace(
+                'idle_time = 100', 'executor = invalid'))
+
+        reloader.request()
+
+        assert reloader.apply(processor) is processor
+        # only the newly created check, the kept one is still in use
+        close.assert_called_once_with()
+
+    def test_missing_file_keeps_previous(self, setup) -> None:
+        path, processor, reloader, _ = setup
+        path.remove()
+
+        reloader.request()
+
+        assert reloader.apply(processor) is processor
+
+
 class TestExecuteChecks:
 
     def test_no_checks(self, mocker) -> None:
@@ -247,6 +532,479 @@ class TestExecuteChecks:
         second_check.check.assert_called_once_with()
 
 
+class TestExecutionTimeout:
+
+    def test_timeout_is_temporary_error(self, mocker) -> None:
+        release = threading.Event()
+        hanging = _StubCheck('hanging', None)
+        mocker.patch.object(hanging, 'check',
+                            side_effect=lambda: release.wait(5) and 'late')
+        hanging.execution_timeout = 0.1
+        logger = mocker.MagicMock()
+
+        try:
+            assert autosuspend.execute_checks(
+                [hanging], False, logger) is False
+        finally:
+            release.set()
+        assert logger.warning.called
+
+    @staticmethod
+    def _watchdog_threads() -> List[threading.Thread]:
+        return [t for t in threading.enumerate()
+                if t.name.startswith('autosuspend-watchdog-')]
+
+    @pytest.mark.parametrize('executor', [
+        None,
+        concurrent.futures.ThreadPoolExecutor,
+        autosuspend.AsyncioExecutor,
+    ])
+    def test_abandoned_call_not_repeated(self, mocker, executor) -> None:
+        release = threading.Event()
+        hanging = mocker.MagicMock(spec=autosuspend.Activity)
+        hanging.name = 'hanging'
+        hanging.execution_timeout = 0.1
+        hanging.check.side_effect = lambda: release.wait(5) and 'late'
+        pool = executor(max_workers=2) if executor else None
+        before = len(self._watchdog_threads())
+
+        try:
+            for _ in range(4):
+                assert autosuspend.execute_checks(
+                    [hanging], False, mocker.MagicMock(), pool) is False
+            assert hanging.check.call_count == 1
+            assert len(self._watchdog_threads()) == before + 1
+        finally:
+            release.set()
+            if pool:
+                pool.shutdown()
+
+        autosuspend._abandoned[hanging].result(5)
+        autosuspend.execute_checks([hanging], False, mocker.MagicMock())
+        assert hanging.check.call_count == 2
+
+    def test_result_within_timeout(self, mocker) -> None:
+        check = _StubCheck('fast', 'matches')
+        check.execution_timeout = 5
+        assert autosuspend.execute_checks(
+            [check], False, mocker.MagicMock()) is True
+
+    def test_wakeup_timeout(self, mocker) -> None:
+        release = threading.Event()
+        now = datetime.now(timezone.utc)
+        hanging = _StubWakeup('hanging', None)
+        mocker.patch.object(
+            hanging, 'check',
+            side_effect=lambda timestamp: release.wait(5) and now)
+        hanging.execution_timeout = 0.1
+
+        try:
+            assert autosuspend.execute_wakeups(
+                [hanging], now, mocker.MagicMock()) is None
+        finally:
+            release.set()
+
+
+class TestTraceRecording:
+
+    @pytest.fixture
+    def recorder(self, mocker) -> trace.Trace:
+        recorder = trace.Trace()
+        mocker.patch('autosuspend.util.trace._trace', recorder)
+        return recorder
+
+    def test_check(self, mocker, recorder) -> None:
+        check = mocker.MagicMock(spec=autosuspend.Activity)
+        check.name = 'foo'
+        check.check.return_value = 'matches'
+
+        autosuspend.execute_checks([check], False, mocker.MagicMock())
+
+        record, = recorder.records()
+        assert record['check'] == 'foo'
+        assert record['type'] == 'activity'
+        assert record['result'] == 'matches'
+        assert record['wall'] >= 0
+        assert record['cpu'] >= 0
+
+    def test_cached_result_not_recorded(self, mocker, recorder) -> None:
+        check = _StubCheck('cached', 'matches')
+        check.configure_cache(600)
+
+        autosuspend.execute_checks([check], False, mocker.MagicMock())
+        autosuspend.execute_checks([check], False, mocker.MagicMock())
+
+        assert len(recorder.records()) == 1
+
+    def test_check_error(self, mocker, recorder) -> None:
+        check = mocker.MagicMock(spec=autosuspend.Wakeup)
+        check.name = 'foo'
+        check.check.side_effect = autosuspend.TemporaryCheckError()
+
+        autosuspend.execute_wakeups([check], datetime.now(timezone.utc),
+                                    mocker.MagicMock())
+
+        record, = recorder.records()
+        assert record['type'] == 'wakeup'
+        assert record['error'] == 'TemporaryCheckError'
+
+    def test_iteration(self, recorder, sleep_fn, wakeup_fn) -> None:
+        processor = autosuspend.Processor([_StubCheck('stub', 'active')],
+                                          [], 2, 0, 0, sleep_fn, wakeup_fn,
+                                          False)
+        processor.iteration(datetime.now(timezone.utc), False)
+
+        kinds = [r['kind'] for r in recorder.records()]
+        assert kinds == ['check', 'iteration']
+        iteration = recorder.records()[-1]
+        assert iteration['active'] is True
+        assert iteration['wakeup_at'] is None
+
+
+class TestMetricsRecording:
+
+    @pytest.fixture
+    def registry(self, mocker) -> metrics.Metrics:
+        registry = metrics.Metrics()
+        mocker.patch('autosuspend.util.metrics._metrics', registry)
+        return registry
+
+    def test_checks(self, mocker, registry) -> None:
+        matching = mocker.MagicMock(spec=autosuspend.Activity)
+        matching.name = 'matching'
+        matching.check.return_value = 'matches'
+        failing = mocker.MagicMock(spec=autosuspend.Activity)
+        failing.name = 'failing'
+        failing.check.side_effect = autosuspend.TemporaryCheckError()
+
+        autosuspend.execute_checks([failing, matching], False,
+                                   mocker.MagicMock())
+
+        rendered = registry.render()
+        assert ('autosuspend_check_matches_total'
+                '{check="matching",type="activity"} 1') in rendered
+        assert ('autosuspend_check_temporary_errors_total'
+                '{check="failing",type="activity"} 1') in rendered
+
+    def test_processor(self, mocker, registry, sleep_fn, wakeup_fn) -> None:
+        start = datetime.now(timezone.utc)
+        wakeup = start + timedelta(hours=1)
+        wakeup_check = mocker.MagicMock(spec=autosuspend.Wakeup)
+        wakeup_check.name = 'wakeup'
+        wakeup_check.check.return_value = wakeup
+        processor = autosuspend.Processor([_StubCheck('stub', None)],
+                                          [wakeup_check],
+                                          2, 0, 10, sleep_fn, wakeup_fn,
+                                          False)
+
+        processor.iteration(start, False)
+        rendered = registry.render()
+        assert 'autosuspend_idle_since_timestamp_seconds {!r}'.format(
+            start.timestamp()) in rendered
+        assert 'autosuspend_next_wakeup_timestamp_seconds {!r}'.format(
+            wakeup.timestamp() - 10) in rendered
+
+        processor.iteration(start + timedelta(seconds=3), False)
+        rendered = registry.render()
+        assert sleep_fn.called
+        assert 'autosuspend_suspends_total 1' in rendered
+        assert 'autosuspend_idle_since_timestamp_seconds 0.0' in rendered
+
+
+class TestConfigureMetrics:
+
+    def test_disabled(self, mocker) -> None:
+        textfile = mocker.patch('autosuspend.util.metrics.TextfileExporter')
+        http = mocker.patch('autosuspend.util.metrics.HttpExporter')
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]')
+        autosuspend.configure_metrics(parser)
+        textfile.assert_not_called()
+        http.assert_not_called()
+
+    def test_textfile(self, mocker) -> None:
+        textfile = mocker.patch('autosuspend.util.metrics.TextfileExporter')
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]\nmetrics_file = /tmp/a.prom')
+        autosuspend.configure_metrics(parser)
+        textfile.assert_called_once_with(mocker.ANY, '/tmp/a.prom')
+        textfile.return_value.start.assert_called_once_with()
+
+    def test_http(self, mocker) -> None:
+        http = mocker.patch('autosuspend.util.metrics.HttpExporter')
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]\nmetrics_port = 9999')
+        autosuspend.configure_metrics(parser)
+        http.assert_called_once_with(mocker.ANY, '127.0.0.1', 9999)
+        http.return_value.start.assert_called_once_with()
+
+    @pytest.mark.parametrize('port', ['many', '-1'])
+    def test_invalid_port(self, port) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]\nmetrics_port = ' + port)
+        with pytest.raises(autosuspend.ConfigurationError):
+            autosuspend.configure_metrics(parser)
+
+
+class TestConfigureTrace:
+
+    def test_default(self, mocker) -> None:
+        mock = mocker.patch('autosuspend.util.trace.configure')
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]')
+        autosuspend.configure_trace(parser)
+        mock.assert_called_once_with(1000, None)
+
+    def test_configured(self, mocker) -> None:
+        mock = mocker.patch('autosuspend.util.trace.configure')
+        parser = configparser.ConfigParser()
+        parser.read_string(
+            '[general]\ntrace_capacity = 10\ntrace_file = /tmp/trace')
+        autosuspend.configure_trace(parser)
+        mock.assert_called_once_with(10, '/tmp/trace')
+
+    @pytest.mark.parametrize('value', ['0', 'many'])
+    def test_invalid(self, value) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]\ntrace_capacity = ' + value)
+        with pytest.raises(autosuspend.ConfigurationError):
+            autosuspend.configure_trace(parser)
+
+
+class TestExecuteChecksConcurrently:
+
+    @pytest.fixture
+    def pool(self):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+            yield pool
+
+    def test_no_checks(self, mocker, pool) -> None:
+        assert autosuspend.execute_checks(
+            [], False, mocker.MagicMock(), pool) is False
+
+    def test_all_called(self, mocker, pool) -> None:
+        first = mocker.MagicMock(spec=autosuspend.Activity)
+        first.name = 'foo'
+        first.check.return_value = None
+        second = mocker.MagicMock(spec=autosuspend.Activity)
+        second.name = 'bar'
+        second.check.return_value = 'matches'
+
+        assert autosuspend.execute_checks(
+            [first, second], True, mocker.MagicMock(), pool) is True
+        first.check.assert_called_once_with()
+        second.check.assert_called_once_with()
+
+    def test_no_match(self, mocker, pool) -> None:
+        first = mocker.MagicMock(spec=autosuspend.Activity)
+        first.name = 'foo'
+        first.check.return_value = None
+        second = mocker.MagicMock(spec=autosuspend.Activity)
+        second.name = 'bar'
+        second.check.side_effect = autosuspend.TemporaryCheckError()
+
+        assert autosuspend.execute_checks(
+            [first, second], False, mocker.MagicMock(), pool) is False
+
+    def test_first_match_does_not_wait(self, mocker, pool) -> None:
+        release = threading.Event()
+        blocking = mocker.MagicMock(spec=autosuspend.Activity)
+        blocking.name = 'blocking'
+        blocking.check.side_effect = lambda: release.wait(5) and None
+        matching = mocker.MagicMock(spec=autosuspend.Activity)
+        matching.name = 'matching'
+        matching.check.return_value = 'matches'
+
+        try:
+            assert autosuspend.execute_checks(
+                [blocking, matching], False, mocker.MagicMock(), pool) is True
+            assert not release.is_set()
+        finally:
+            release.set()
+
+    def test_abandoned_check_not_executed_again(self, mocker, pool) -> None:
+        release = threading.Event()
+        blocking = mocker.MagicMock(spec=autosuspend.Activity)
+        blocking.name = 'blocking'
+        blocking.check.side_effect = lambda: release.wait(5) and None
+        matching = mocker.MagicMock(spec=autosuspend.Activity)
+        matching.name = 'matching'
+        matching.check.return_value = 'matches'
+
+        try:
+            for _ in range(2):
+                assert autosuspend.execute_checks(
+                    [blocking, matching], False, mocker.MagicMock(),
+                    pool) is True
+            assert blocking.check.call_count == 1
+        finally:
+            release.set()
+
+        autosuspend._running[blocking].result(5)
+        autosuspend.execute_checks(
+            [blocking], False, mocker.MagicMock(), pool)
+        assert blocking.check.call_count == 2
+
+    def test_timed_out_check_not_submitted_again(self, mocker, pool) -> None:
+        release = threading.Event()
+        hanging = mocker.MagicMock(spec=autosuspend.Activity)
+        hanging.name = 'hanging'
+        hanging.execution_timeout = 0.1
+        hanging.check.side_effect = lambda: release.wait(5) and 'late'
+        submit = mocker.spy(pool, 'submit')
+
+        try:
+            for _ in range(2):
+                assert autosuspend.execute_checks(
+                    [hanging], True, mocker.MagicMock(), pool) is False
+            # the pool thread gave up, but the watchdog thread still runs
+            assert submit.call_count == 1
+            assert hanging.check.call_count == 1
+        finally:
+            release.set()
+
+    def test_logging_in_configured_order(self, mocker, pool) -> None:
+        first = mocker.MagicMock(spec=autosuspend.Activity)
+        first.name = 'foo'
+        first.check.return_value = 'first'
+        second = mocker.MagicMock(spec=autosuspend.Activity)
+        second.name = 'bar'
+        second.check.return_value = 'second'
+        logger = mocker.MagicMock()
+
+        assert autosuspend.execute_checks(
+            [first, second], True, logger, pool) is True
+
+        assert [c[0][1] for c in logger.info.call_args_list] == [
+            'foo', 'bar']
+
+    def test_severe_errors_propagate(self, mocker, pool) -> None:
+        check = mocker.MagicMock(spec=autosuspend.Activity)
+        check.name = 'foo'
+        check.check.side_effect = autosuspend.checks.SevereCheckError()
+
+        with pytest.raises(autosuspend.checks.SevereCheckError):
+            autosuspend.execute_checks(
+                [check], False, mocker.MagicMock(), pool)
+
+
+class _AsyncActivity(autosuspend.Activity):
+
+    @classmethod
+    def create(cls, name, config):
+        pass
+
+    def __init__(self, name, match, delay=0.):
+        autosuspend.Activity.__init__(self, name)
+        self.match = match
+        self.delay = delay
+        self.cancelled = False
+
+    def check(self):
+        raise AssertionError('check_async must be used')
+
+    async def check_async(self):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.match, Exception):
+            raise self.match
+        return self.match
+
+
+class _AsyncWakeup(autosuspend.Wakeup):
+
+    @classmethod
+    def create(cls, name, config):
+        pass
+
+    def __init__(self, name, wakeup_at):
+        autosuspend.Wakeup.__init__(self, name)
+        self.wakeup_at = wakeup_at
+
+    def check(self, timestamp):
+        raise AssertionError('check_async must be used')
+
+    async def check_async(self, timestamp):
+        return self.wakeup_at
+
+
+class TestExecuteChecksAsync:
+
+    @pytest.fixture
+    def pool(self):
+        with autosuspend.AsyncioExecutor(max_workers=2) as pool:
+            yield pool
+
+    def test_no_checks(self, mocker, pool) -> None:
+        assert autosuspend.execute_checks(
+            [], False, mocker.MagicMock(), pool) is False
+
+    def test_native_and_bridged_checks(self, mocker, pool) -> None:
+        native = _AsyncActivity('native', None)
+        bridged = mocker.MagicMock(spec=autosuspend.Activity)
+        bridged.name = 'bridged'
+        bridged.check.return_value = 'matches'
+
+        assert autosuspend.collect_check_results(
+            [native, bridged], True, mocker.MagicMock(), pool) == {
+                native: None, bridged: 'matches'}
+        bridged.check.assert_called_once_with()
+
+    def test_first_match_cancels_others(self, mocker, pool) -> None:
+        slow = _AsyncActivity('slow', None, delay=5)
+        matching = _AsyncActivity('matching', 'matches')
+
+        results = autosuspend.collect_check_results(
+            [slow, matching], False, mocker.MagicMock(), pool)
+
+        assert results == {matching: 'matches'}
+        assert slow.cancelled
+
+    def test_temporary_errors_ignored(self, mocker, pool) -> None:
+        failing = _AsyncActivity(
+            'failing', autosuspend.TemporaryCheckError())
+        matching = _AsyncActivity('matching', 'matches', delay=0.01)
+
+        assert autosuspend.collect_check_results(
+            [failing, matching], False, mocker.MagicMock(), pool) == {
+                matching: 'matches'}
+
+    def test_severe_errors_propagate(self, mocker, pool) -> None:
+        check = _AsyncActivity('foo', autosuspend.checks.SevereCheckError())
+
+        with pytest.raises(autosuspend.checks.SevereCheckError):
+            autosuspend.execute_checks(
+                [check], False, mocker.MagicMock(), pool)
+
+    def test_execution_timeout(self, mocker, pool) -> None:
+        slow = _AsyncActivity('slow', 'matches', delay=5)
+        slow.execution_timeout = 0.1
+
+        assert autosuspend.collect_check_results(
+            [slow], True, mocker.MagicMock(), pool) == {}
+        assert slow.cancelled
+
+    def test_wakeups(self, mocker, pool) -> None:
+        now = datetime.now(timezone.utc)
+        native = _AsyncWakeup('native', now + timedelta(minutes=10))
+        bridged = mocker.MagicMock(spec=autosuspend.Wakeup)
+        bridged.check.return_value = now + timedelta(minutes=5)
+
+        assert autosuspend.execute_wakeups(
+            [native, bridged], now, mocker.MagicMock(), pool,
+        ) == now + timedelta(minutes=5)
+        bridged.check.assert_called_once_with(now)
+
+    def test_reused_between_iterations(self, mocker, pool) -> None:
+        check = _AsyncActivity('native', 'matches')
+        for _ in range(2):
+            assert autosuspend.execute_checks(
+                [check], False, mocker.MagicMock(), pool) is True
+
+
 class TestExecuteWakeups:
 
     def test_no_wakeups(self, mocker) -> None:
@@ -332,6 +1090,18 @@ class TestExecuteWakeups:
         assert autosuspend.execute_wakeups(
             [wakeup], now + timedelta(seconds=1), mocker.MagicMock()) is None
 
+    def test_soonest_taken_with_pool(self, mocker) -> None:
+        reference = datetime.now(timezone.utc)
+        wakeup = mocker.MagicMock(spec=autosuspend.Wakeup)
+        wakeup.check.return_value = reference + timedelta(seconds=20)
+        earlier = reference + timedelta(seconds=10)
+        wakeup_earlier = mocker.MagicMock(spec=autosuspend.Wakeup)
+        wakeup_earlier.check.return_value = earlier
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+            assert autosuspend.execute_wakeups(
+                [wakeup, wakeup_earlier],
+                reference, mocker.MagicMock(), pool) == earlier
+
 
 class TestNotifySuspend:
 
@@ -395,6 +1165,196 @@ wakeup_cmd = wakeup
         assert processor._min_sleep_time == 1200
         assert processor._wakeup_delta == 30
         assert processor._all_activities
+        assert processor._pool is None
+        assert processor._state_file is None
+        assert not processor._adaptive_order
+
+    def test_state_file(self, mocker, tmpdir) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string(
+            '''
+[general]
+suspend_cmd = suspend
+wakeup_cmd = wakeup
+state_file = {}
+            '''.format(tmpdir.join('state')))
+        args = mocker.MagicMock(spec=argparse.Namespace)
+        type(args).all_checks = mocker.PropertyMock(return_value=True)
+        processor = autosuspend.configure_processor(
+            args, parser, [], [],
+        )
+        assert isinstance(processor._state_file, state.StateFile)
+        assert processor._state_file.max_age == 120
+
+    def test_pool_shut_down_on_error(self, mocker) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string(
+            '''
+[general]
+suspend_cmd = suspend
+wakeup_cmd = wakeup
+executor = concurrent
+check_order = random
+            ''')
+        args = mocker.MagicMock(spec=argparse.Namespace)
+        type(args).all_checks = mocker.PropertyMock(return_value=False)
+        shutdown = mocker.spy(concurrent.futures.ThreadPoolExecutor,
+                              'shutdown')
+
+        with pytest.raises(autosuspend.ConfigurationError):
+            autosuspend.configure_processor(args, parser, [], [])
+        shutdown.assert_called_once()
+
+    def test_concurrent_executor(self, mocker) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string(
+            '''
+[general]
+suspend_cmd = suspend
+wakeup_cmd = wakeup
+executor = concurrent
+executor_workers = 3
+            ''')
+        args = mocker.MagicMock(spec=argparse.Namespace)
+        type(args).all_checks = mocker.PropertyMock(return_value=False)
+        processor = autosuspend.configure_processor(
+            args, parser, [], [],
+        )
+        assert isinstance(processor._pool,
+                          concurrent.futures.ThreadPoolExecutor)
+        processor._pool.shutdown()
+
+    def test_asyncio_executor(self) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]\nexecutor = asyncio')
+        pool = autosuspend.configure_pool(parser)
+        assert isinstance(pool, autosuspend.AsyncioExecutor)
+        pool.shutdown()
+
+    def test_adaptive_check_order(self) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]\ncheck_order = adaptive')
+        assert autosuspend.configure_check_order(parser)
+
+    def test_invalid_check_order(self) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]\ncheck_order = random')
+        with pytest.raises(autosuspend.ConfigurationError):
+            autosuspend.configure_check_order(parser)
+
+    @pytest.mark.parametrize('options', [
+        'executor = unknown',
+        'executor = concurrent\nexecutor_workers = 0',
+        'executor = concurrent\nexecutor_workers = many',
+    ])
+    def test_invalid_executor(self, options) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]\n' + options)
+        with pytest.raises(autosuspend.ConfigurationError):
+            autosuspend.configure_pool(parser)
+
+
+class TestConfigureHttpPool:
+
+    def test_default(self, mocker) -> None:
+        mock = mocker.patch('autosuspend.set_http_pool_size')
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]')
+        autosuspend.configure_http_pool(parser)
+        mock.assert_called_once_with(4)
+
+    def test_configured(self, mocker) -> None:
+        mock = mocker.patch('autosuspend.set_http_pool_size')
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]\nhttp_pool_size = 8')
+        autosuspend.configure_http_pool(parser)
+        mock.assert_called_once_with(8)
+
+    @pytest.mark.parametrize('value', ['0', 'many'])
+    def test_invalid(self, value) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]\nhttp_pool_size = ' + value)
+        with pytest.raises(autosuspend.ConfigurationError):
+            autosuspend.configure_http_pool(parser)
+
+
+class TestConfigureResumeCheckInterval:
+
+    def test_default(self) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]')
+        assert autosuspend.configure_resume_check_interval(parser) == 1
+
+    def test_configured(self) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]\nresume_check_interval = 0.5')
+        assert autosuspend.configure_resume_check_interval(parser) == 0.5
+
+    @pytest.mark.parametrize('value', ['0', 'often'])
+    def test_invalid(self, value) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('[general]\nresume_check_interval = ' + value)
+        with pytest.raises(autosuspend.ConfigurationError):
+            autosuspend.configure_resume_check_interval(parser)
+
+
+class TestLoop:
+
+    def test_resume_starts_iteration_immediately(self, mocker) -> None:
+        clock = mocker.patch('autosuspend.util.resume.suspended_seconds')
+        clock.return_value = 0.
+        sleeps = []
+
+        def sleep(seconds: float) -> None:
+            sleeps.append(seconds)
+            if len(sleeps) == 3:
+                clock.return_value = 3600.
+        mocker.patch('time.sleep', side_effect=sleep)
+
+        processor = mocker.MagicMock(spec=autosuspend.Processor)
+        iterations = []
+
+        def iteration(timestamp: datetime, just_woke_up: bool) -> None:
+            iterations.append(just_woke_up)
+            if len(iterations) == 3:
+                raise StopIteration
+        processor.iteration.side_effect = iteration
+
+        with pytest.raises(StopIteration):
+            autosuspend.loop(processor, 60, None, '/does/not/exist', 1)
+
+        assert iterations == [False, True, False]
+        assert sum(sleeps[:3]) == 3
+
+    def test_applies_reloads(self, mocker) -> None:
+        mocker.patch('time.sleep')
+        processor = mocker.MagicMock(spec=autosuspend.Processor)
+        reloaded = mocker.MagicMock(spec=autosuspend.Processor)
+        reloaded.iteration.side_effect = StopIteration
+        reloader = mocker.MagicMock(spec=autosuspend.ConfigReloader)
+        reloader.apply.side_effect = [processor, reloaded]
+
+        with pytest.raises(StopIteration):
+            autosuspend.loop(processor, 60, None, '/does/not/exist', 1,
+                             reloader=reloader)
+
+        processor.iteration.assert_called_once()
+        reloaded.iteration.assert_called_once()
+
+    def test_records_sleeps(self, mocker) -> None:
+        recorder = trace.Trace()
+        mocker.patch('autosuspend.util.trace._trace', recorder)
+        mocker.patch('time.sleep')
+        processor = mocker.MagicMock(spec=autosuspend.Processor)
+        processor.iteration.side_effect = [None, StopIteration]
+
+        with pytest.raises(StopIteration):
+            autosuspend.loop(processor, 60, None, '/does/not/exist', 1)
+
+        record, = recorder.records()
+        assert record['kind'] == 'sleep'
+        assert record['planned'] == 60
+        assert not record['interrupted']
 
 
 def test_notify_and_suspend(mocker) -> None:
@@ -419,11 +1379,29 @@ class _StubCheck(autosuspend.Activity):
     def __init__(self, name, match):
         autosuspend.Activity.__init__(self, name)
         self.match = match
+        self.calls = 0
 
     def check(self):
+        self.calls += 1
         return self.match
 
 
+class _StubWakeup(autosuspend.Wakeup):
+
+    @classmethod
+    def create(cls, name, config):
+        pass
+
+    def __init__(self, name, wakeup_at):
+        autosuspend.Wakeup.__init__(self, name)
+        self.wakeup_at = wakeup_at
+        self.calls = 0
+
+    def check(self, timestamp):
+        self.calls += 1
+        return self.wakeup_at
+
+
 @pytest.fixture
 def sleep_fn():
 
@@ -636,3 +1614,331 @@ class TestProcessor:
         processor.iteration(start + timedelta(seconds=3), False)
         assert sleep_fn.called
         assert wakeup_fn.call_arg == start + timedelta(seconds=21)
+
+    def test_checks_share_process_snapshot(
+        self, mocker, sleep_fn, wakeup_fn,
+    ) -> None:
+        process_iter = mocker.patch('psutil.process_iter', return_value=[])
+        checks = [
+            Processes('first', ['foo']),
+            Processes('second', ['bar']),
+        ]  # type: List[autosuspend.Activity]
+        processor = autosuspend.Processor(
+            checks,
+            [],
+            2,
+            0,
+            0,
+            sleep_fn,
+            wakeup_fn,
+            True)
+
+        processor.iteration(datetime.now(timezone.utc), False)
+        assert process_iter.call_count == 1
+
+        processor.iteration(datetime.now(timezone.utc), False)
+        assert process_iter.call_count == 2
+
+
+class TestProcessorIntervals:
+
+    def test_take_over_keeps_state(self, mocker, sleep_fn, wakeup_fn) -> None:
+        kept = _StubCheck('kept', 'active')
+        kept.interval = 10
+        removed = _StubCheck('removed', None)
+        removed.interval = 10
+        pool = mocker.MagicMock(spec=concurrent.futures.Executor)
+        previous = autosuspend.Processor([kept, removed], [], 100, 0, 0,
+                                         sleep_fn, wakeup_fn, True,
+                                         pool=None)
+        start = datetime.now(timezone.utc)
+        previous.iteration(start, False)
+        previous._idle_since = start
+        previous._pool = pool
+
+        processor = autosuspend.Processor([kept], [], 100, 0, 0,
+                                          sleep_fn, wakeup_fn, True)
+        processor.take_over(previous)
+
+        assert processor._idle_since == start
+        processor.iteration(start + timedelta(seconds=5), False)
+        assert kept.calls == 1
+        assert removed not in processor._scheduler._results
+        pool.shutdown.assert_called_once_with(wait=False)
+
+    def test_check_executed_only_when_due(self, sleep_fn, wakeup_fn) -> None:
+        slow = _StubCheck('slow', None)
+        slow.interval = 10
+        fast = _StubCheck('fast', None)
+        processor = autosuspend.Processor([slow, fast], [], 100, 0, 0,
+                                          sleep_fn, wakeup_fn, False)
+
+        start = datetime.now(timezone.utc)
+        for seconds in range(0, 12, 2):
+            processor.iteration(start + timedelta(seconds=seconds), False)
+
+        assert fast.calls == 6
+        assert slow.calls == 2
+
+    def test_remembered_match_keeps_system_active(
+        self, sleep_fn, wakeup_fn,
+    ) -> None:
+        slow = _StubCheck('slow', 'active')
+        slow.interval = 10
+        processor = autosuspend.Processor([slow], [], 2, 0, 0,
+                                          sleep_fn, wakeup_fn, False)
+
+        start = datetime.now(timezone.utc)
+        processor.iteration(start, False)
+        slow.match = None
+        processor.iteration(start + timedelta(seconds=5), False)
+        processor.iteration(start + timedelta(seconds=9), False)
+        assert not sleep_fn.called
+        assert slow.calls == 1
+        assert processor._idle_since is None
+
+    def test_remembered_match_skips_due_checks(
+        self, sleep_fn, wakeup_fn,
+    ) -> None:
+        slow = _StubCheck('slow', 'active')
+        slow.interval = 10
+        fast = _StubCheck('fast', None)
+        processor = autosuspend.Processor([slow, fast], [], 2, 0, 0,
+                                          sleep_fn, wakeup_fn, False)
+
+        start = datetime.now(timezone.utc)
+        processor.iteration(start, False)
+        processor.iteration(start + timedelta(seconds=2), False)
+        assert fast.calls == 0
+
+    def test_wake_up_resets_schedule(self, sleep_fn, wakeup_fn) -> None:
+        slow = _StubCheck('slow', None)
+        slow.interval = 10
+        processor = autosuspend.Processor([slow], [], 100, 0, 0,
+                                          sleep_fn, wakeup_fn, False)
+
+        start = datetime.now(timezone.utc)
+        processor.iteration(start, False)
+        processor.iteration(start + timedelta(seconds=2), True)
+        assert slow.calls == 2
+
+    def test_clock_jump_backwards(self, sleep_fn, wakeup_fn) -> None:
+        slow = _StubCheck('slow', None)
+        slow.interval = 10
+        processor = autosuspend.Processor([slow], [], 100, 0, 0,
+                                          sleep_fn, wakeup_fn, False)
+
+        start = datetime.now(timezone.utc)
+        processor.iteration(start, False)
+        processor.iteration(start - timedelta(seconds=2), False)
+        assert slow.calls == 2
+
+    def test_wakeup_reused_until_passed(self, sleep_fn, wakeup_fn) -> None:
+        start = datetime.now(timezone.utc)
+        wakeup = _StubWakeup('wakeup', start + timedelta(seconds=5))
+        wakeup.interval = 60
+        processor = autosuspend.Processor([_StubCheck('stub', 'active')],
+                                          [wakeup], 2, 0, 0,
+                                          sleep_fn, wakeup_fn, False)
+
+        processor.iteration(start, False)
+        processor.iteration(start + timedelta(seconds=2), False)
+        assert wakeup.calls == 1
+        processor.iteration(start + timedelta(seconds=6), False)
+        assert wakeup.calls == 2
+
+
+class TestProcessorState:
+
+    @pytest.fixture()
+    def state_file(self, tmpdir) -> state.StateFile:
+        return state.StateFile(str(tmpdir.join('state')))
+
+    def test_persists_changes(self, mocker, state_file, sleep_fn,
+                              wakeup_fn) -> None:
+        start = datetime.now(timezone.utc) - timedelta(minutes=1)
+        wakeup = mocker.MagicMock(spec=autosuspend.Wakeup)
+        wakeup.check.return_value = start + timedelta(hours=1)
+        processor = autosuspend.Processor([_StubCheck('stub', None)],
+                                          [wakeup], 2, 0, 10,
+                                          sleep_fn, wakeup_fn, False,
+                                          state_file=state_file)
+
+        processor.iteration(start, False)
+        assert state_file.load() == state.State(idle_since=start)
+
+        processor.iteration(start + timedelta(seconds=3), False)
+        assert sleep_fn.called
+        assert state_file.load() == state.State(
+            None, start + timedelta(seconds=3),
+            start + timedelta(hours=1, seconds=-10))
+
+    def test_writes_only_on_changes(self, mocker, state_file, sleep_fn,
+                                    wakeup_fn) -> None:
+        save = mocker.spy(state_file, 'save')
+        write = mocker.patch('autosuspend.util.state.write_atomically')
+        processor = autosuspend.Processor([_StubCheck('stub', None)], [],
+                                          100, 0, 0, sleep_fn, wakeup_fn,
+                                          False, state_file=state_file)
+        start = datetime.now(timezone.utc)
+
+        for i in range(5):
+            processor.iteration(start + timedelta(seconds=i), False)
+
+        assert save.call_count == 1
+        assert write.call_count == 1
+
+    def test_restores_idle_time(self, state_file, sleep_fn,
+                                wakeup_fn) -> None:
+        start = datetime.now(timezone.utc) - timedelta(seconds=10)
+        state_file.save(state.State(idle_since=start))
+
+        processor = autosuspend.Processor([_StubCheck('stub', None)], [],
+                                          5, 0, 0, sleep_fn, wakeup_fn,
+                                          False, state_file=state_file)
+        assert processor._idle_since == start
+
+        processor.iteration(datetime.now(timezone.utc), False)
+        assert sleep_fn.called
+
+    def test_discards_idle_time_before_boot(self, mocker, state_file,
+                                            sleep_fn, wakeup_fn) -> None:
+        start = datetime.now(timezone.utc) - timedelta(hours=1)
+        state_file.save(state.State(idle_since=start))
+        mocker.patch('autosuspend.util.state.boot_time',
+                     return_value=(start + timedelta(minutes=1)).timestamp())
+
+        processor = autosuspend.Processor([_StubCheck('stub', None)], [],
+                                          5, 0, 0, sleep_fn, wakeup_fn,
+                                          False, state_file=state_file)
+
+        assert processor._idle_since is None
+
+    def test_discards_idle_time_of_outdated_state(self, tmpdir, sleep_fn,
+                                                  wakeup_fn) -> None:
+        path = str(tmpdir.join('state'))
+        start = datetime.now(timezone.utc) - timedelta(hours=1)
+        state.StateFile(path).save(state.State(idle_since=start))
+        # the daemon was stopped shortly after the system became idle
+        stopped = (start + timedelta(minutes=1)).timestamp()
+        os.utime(path, (stopped, stopped))
+
+        processor = autosuspend.Processor([_StubCheck('stub', None)], [],
+                                          5, 0, 0, sleep_fn, wakeup_fn,
+                                          False, state_file=state.StateFile(
+                                              path, max_age=120))
+        assert processor._idle_since is None
+
+        processor.iteration(datetime.now(timezone.utc), False)
+        assert not sleep_fn.called
+
+    def test_iterations_touch_state(self, mocker, state_file, sleep_fn,
+                                    wakeup_fn) -> None:
+        touch = mocker.spy(state_file, 'touch')
+        processor = autosuspend.Processor([_StubCheck('stub', None)], [],
+                                          100, 0, 0, sleep_fn, wakeup_fn,
+                                          False, state_file=state_file)
+        start = datetime.now(timezone.utc)
+
+        for i in range(3):
+            processor.iteration(start + timedelta(seconds=i), False)
+
+        assert touch.call_count == 3
+
+    def test_take_over_persists(self, state_file, sleep_fn,
+                                wakeup_fn) -> None:
+        start = datetime.now(timezone.utc)
+        previous = autosuspend.Processor([], [], 100, 0, 0,
+                                         sleep_fn, wakeup_fn, False)
+        previous._idle_since = start
+
+        processor = autosuspend.Processor([], [], 100, 0, 0,
+                                          sleep_fn, wakeup_fn, False,
+                                          state_file=state_file)
+        processor.take_over(previous)
+
+        assert state_file.load() == state.State(idle_since=start)
+
+
+class TestCheckOrdering:
+
+    @pytest.fixture
+    def statistics(self, mocker) -> ordering.CheckStatistics:
+        statistics = ordering.CheckStatistics()
+        mocker.patch('autosuspend.util.ordering._statistics', statistics)
+        return statistics
+
+    def test_records_activity_checks(self, mocker, statistics) -> None:
+        matching = _StubCheck('matching', 'matches')
+        wakeup = _StubWakeup('wakeup', None)
+
+        autosuspend.execute_checks([matching], False, mocker.MagicMock())
+        autosuspend.execute_wakeups([wakeup], datetime.now(timezone.utc),
+                                    mocker.MagicMock())
+
+        assert statistics.averages('matching')[1] == 1.
+        assert statistics.averages('wakeup') is None
+
+    @pytest.mark.parametrize('pool', [None, 'concurrent', 'asyncio'])
+    def test_cached_results_not_recorded(self, mocker, statistics,
+                                         pool) -> None:
+        check = _StubCheck('cached', None)
+        check.configure_cache(600)
+        executor = {
+            None: lambda: None,
+            'concurrent': lambda: concurrent.futures.ThreadPoolExecutor(1),
+            'asyncio': lambda: autosuspend.AsyncioExecutor(1),
+        }[pool]()
+        observe = mocker.spy(statistics, 'observe')
+
+        try:
+            for _ in range(3):
+                autosuspend.execute_checks([check], False,
+                                           mocker.MagicMock(), executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        assert check.calls == 1
+        assert observe.call_count == 1
+
+    def test_adaptive_order_short_circuits(self, statistics, sleep_fn,
+                                           wakeup_fn) -> None:
+        expensive = _StubCheck('expensive', None)
+        cheap = _StubCheck('cheap', 'active')
+        statistics.observe('expensive', 5., False)
+        statistics.observe('cheap', 0.01, True)
+        processor = autosuspend.Processor([expensive, cheap], [], 100, 0, 0,
+                                          sleep_fn, wakeup_fn, False,
+                                          adaptive_order=True)
+
+        processor.iteration(datetime.now(timezone.utc), False)
+
+        assert cheap.calls == 1
+        assert expensive.calls == 0
+
+    def test_configured_order_by_default(self, statistics, sleep_fn,
+                                         wakeup_fn) -> None:
+        expensive = _StubCheck('expensive', None)
+        cheap = _StubCheck('cheap', 'active')
+        statistics.observe('expensive', 5., False)
+        statistics.observe('cheap', 0.01, True)
+        processor = autosuspend.Processor([expensive, cheap], [], 100, 0, 0,
+                                          sleep_fn, wakeup_fn, False)
+
+        processor.iteration(datetime.now(timezone.utc), False)
+
+        assert cheap.calls == 1
+        assert expensive.calls == 1
+
+    def test_priority(self, statistics, sleep_fn, wakeup_fn) -> None:
+        first = _StubCheck('first', 'active')
+        second = _StubCheck('second', 'active')
+        second.priority = 1
+        processor = autosuspend.Processor([first, second], [], 100, 0, 0,
+                                          sleep_fn, wakeup_fn, False)
+
+        processor.iteration(datetime.now(timezone.utc), False)
+
+        assert first.calls == 0
+        assert second.calls == 1
@@ -1,4 +1,15 @@
-from autosuspend.checks import Check
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from freezegun import freeze_time
+import pytest
+
+from autosuspend.checks import (Activity,
+                                Check,
+                                has_native_async,
+                                ResultCache,
+                                TemporaryCheckError,
+                                Wakeup)
 
 
 class TestCheck:
@@ -21,3 +32,151 @@ class TestCheck:
 
     def test_str(self) -> None:
         assert isinstance(str(self.DummyCheck('test')), str)
+
+    def test_options_exclude_cache(self) -> None:
+        check = self.DummyCheck('test')
+        check.configure_cache(10)
+        assert '_result_cache' not in check.options()
+
+
+class _CountingActivity(Activity):
+
+    @classmethod
+    def create(cls, name, config):
+        pass
+
+    def __init__(self, results):
+        Activity.__init__(self, 'counting')
+        self.results = list(results)
+        self.calls = 0
+
+    def check(self):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class _CountingWakeup(Wakeup):
+
+    @classmethod
+    def create(cls, name, config):
+        pass
+
+    def __init__(self, result):
+        Wakeup.__init__(self, 'counting')
+        self.result = result
+        self.calls = 0
+
+    def check(self, timestamp):
+        self.calls += 1
+        return self.result
+
+
+class _AsyncCountingActivity(_CountingActivity):
+
+    async def check_async(self):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+class TestCheckAsync:
+
+    def test_bridge_to_check(self) -> None:
+        check = _CountingActivity(['a'])
+        assert asyncio.run(check.check_async()) == 'a'
+        assert check.calls == 1
+
+    def test_bridge_to_wakeup_check(self) -> None:
+        now = datetime.now(timezone.utc)
+        check = _CountingWakeup(now)
+        assert asyncio.run(check.check_async(now)) == now
+
+    def test_has_native_async(self) -> None:
+        assert not has_native_async(_CountingActivity([]))
+        assert not has_native_async(_CountingWakeup(None))
+        assert has_native_async(_AsyncCountingActivity([]))
+
+    def test_native_async_cached(self) -> None:
+        check = _AsyncCountingActivity(['a', 'b'])
+        check.configure_cache(10)
+        assert asyncio.run(check.check_async()) == 'a'
+        assert asyncio.run(check.check_async()) == 'a'
+        assert check.calls == 1
+
+    def test_bridge_shares_cache_with_check(self) -> None:
+        check = _CountingActivity(['a', 'b'])
+        check.configure_cache(10)
+        assert check.check() == 'a'
+        assert asyncio.run(check.check_async()) == 'a'
+        assert check.calls == 1
+
+
+class TestResultCaching:
+
+    def test_disabled_by_default(self) -> None:
+        check = _CountingActivity(['a', 'b'])
+        assert check.check() == 'a'
+        assert check.check() == 'b'
+
+    def test_none_is_cached_until_expiry(self) -> None:
+        check = _CountingActivity([None, 'b'])
+        with freeze_time() as frozen_time:
+            check.configure_cache(10)
+            assert check.check() is None
+            frozen_time.tick(timedelta(seconds=9))
+            assert check.check() is None
+            assert check.calls == 1
+            frozen_time.tick(timedelta(seconds=2))
+            assert check.check() == 'b'
+            assert check.calls == 2
+
+    def test_temporary_errors_not_cached(self) -> None:
+        check = _CountingActivity([TemporaryCheckError(), 'b'])
+        check.configure_cache(10)
+        with pytest.raises(TemporaryCheckError):
+            check.check()
+        assert check.check() == 'b'
+
+    def test_temporary_errors_cached_on_request(self) -> None:
+        check = _CountingActivity([TemporaryCheckError(), 'b'])
+        check.configure_cache(10, cache_temporary_errors=True)
+        with pytest.raises(TemporaryCheckError):
+            check.check()
+        with pytest.raises(TemporaryCheckError):
+            check.check()
+        assert check.calls == 1
+
+    def test_disable_again(self) -> None:
+        check = _CountingActivity(['a', 'b'])
+        check.configure_cache(10)
+        assert check.check() == 'a'
+        check.configure_cache(0)
+        assert check.check() == 'b'
+
+    def test_wakeup_in_the_past_not_reused(self) -> None:
+        now = datetime.now(timezone.utc)
+        check = _CountingWakeup(now + timedelta(seconds=5))
+        check.configure_cache(600)
+        assert check.check(now) is not None
+        assert check.check(now + timedelta(seconds=1)) is not None
+        assert check.calls == 1
+        check.check(now + timedelta(seconds=10))
+        assert check.calls == 2
+
+    def test_invalidate(self) -> None:
+        cache = ResultCache(10)
+        assert cache.get(lambda: 'a', lambda _: True) == 'a'
+        assert cache.get(lambda: 'b', lambda _: True) == 'a'
+        cache.invalidate()
+        assert cache.get(lambda: 'b', lambda _: True) == 'b'
+
+    def test_computations(self) -> None:
+        cache = ResultCache(10)
+        cache.get(lambda: 'a', lambda _: True)
+        cache.get(lambda: 'b', lambda _: True)
+        assert cache.computations == 1
+        cache.invalidate()
+        cache.get(lambda: 'b', lambda _: True)
+        assert cache.computations == 2
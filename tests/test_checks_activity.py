@@ -1,3 +1,4 @@
+import asyncio
 from collections import namedtuple
 import configparser
 import json
@@ -6,8 +7,10 @@ import os.path
 import pwd
 import re
 import socket
+import struct
 import subprocess
 import sys
+from typing import Dict, List
 
 from freezegun import freeze_time
 import psutil
@@ -32,6 +35,7 @@ from autosuspend.checks.activity import (ActiveCalendarEvent,
                                          Users,
                                          XIdleTime,
                                          XPath)
+from autosuspend.util import bandwidth, icmp, kodi, tcp, xss
 from . import CheckTest
 
 
@@ -70,6 +74,23 @@ class TestSmb(CheckTest):
         with pytest.raises(SevereCheckError):
             Smb('foo').check()
 
+    def test_async_with_connections(self, mocker) -> None:
+        with open(os.path.join(os.path.dirname(__file__), 'test_data',
+                               'smbstatus_with_connections'), 'rb') as f:
+            mocker.patch('autosuspend.util.aio.check_output',
+                         return_value=f.read())
+
+        res = asyncio.run(Smb('foo').check_async())
+        assert res is not None
+        assert len(res.splitlines()) == 3
+
+    def test_async_call_error(self, mocker) -> None:
+        mocker.patch('autosuspend.util.aio.check_output',
+                     side_effect=subprocess.CalledProcessError(2, 'cmd'))
+
+        with pytest.raises(SevereCheckError):
+            asyncio.run(Smb('foo').check_async())
+
     def test_create(self) -> None:
         assert isinstance(Smb.create('name', None), Smb)
 
@@ -146,37 +167,29 @@ class TestProcesses(CheckTest):
 
     class StubProcess:
 
-        def __init__(self, name):
-            self._name = name
-
-        def name(self):
-            return self._name
-
-    class RaisingProcess:
-
-        def name(self):
-            raise psutil.NoSuchProcess(42)
+        def __init__(self, name, username='someone'):
+            self.info = {'name': name, 'username': username}
 
     def test_matching_process(self, monkeypatch) -> None:
 
-        def data():
+        def data(attrs=None, ad_value=None):
             return [self.StubProcess('blubb'), self.StubProcess('nonmatching')]
         monkeypatch.setattr(psutil, 'process_iter', data)
 
         assert Processes(
             'foo', ['dummy', 'blubb', 'other']).check() is not None
 
-    def test_ignore_no_such_process(self, monkeypatch) -> None:
+    def test_ignore_inaccessible_process(self, monkeypatch) -> None:
 
-        def data():
-            return [self.RaisingProcess()]
+        def data(attrs=None, ad_value=None):
+            return [self.StubProcess(None)]
         monkeypatch.setattr(psutil, 'process_iter', data)
 
-        Processes('foo', ['dummy']).check()
+        assert Processes('foo', ['dummy']).check() is None
 
     def test_non_matching_process(self, monkeypatch) -> None:
 
-        def data():
+        def data(attrs=None, ad_value=None):
             return [self.StubProcess('asdfasdf'),
                     self.StubProcess('nonmatching')]
         monkeypatch.setattr(psutil, 'process_iter', data)
@@ -184,6 +197,13 @@ class TestProcesses(CheckTest):
         assert Processes(
             'foo', ['dummy', 'blubb', 'other']).check() is None
 
+    def test_only_collects_names(self, mocker) -> None:
+        mock = mocker.patch('psutil.process_iter', return_value=[])
+
+        Processes('foo', ['dummy']).check()
+
+        mock.assert_called_once_with(attrs=['name'])
+
     def test_create(self) -> None:
         parser = configparser.ConfigParser()
         parser.read_string('''[section]
@@ -303,6 +323,7 @@ class TestActiveConnection(CheckTest):
 
         monkeypatch.setattr(psutil, 'net_if_addrs', addresses)
         monkeypatch.setattr(psutil, 'net_connections', connections)
+        self.disable_tcp_tables(monkeypatch)
 
         assert ActiveConnection(
             'foo', [10, self.MY_PORT, 30]).check() is not None
@@ -345,10 +366,81 @@ class TestActiveConnection(CheckTest):
 
         monkeypatch.setattr(psutil, 'net_if_addrs', addresses)
         monkeypatch.setattr(psutil, 'net_connections', connections)
+        self.disable_tcp_tables(monkeypatch)
 
         assert ActiveConnection(
             'foo', [10, self.MY_PORT, 30]).check() is None
 
+    @staticmethod
+    def disable_tcp_tables(monkeypatch) -> None:
+        monkeypatch.setattr(tcp, 'TCP_TABLES', [
+            (socket.AF_INET, '/does/not/exist')])
+
+    @staticmethod
+    def write_tcp_tables(monkeypatch, tmpdir, connections) -> None:
+        tables = {
+            socket.AF_INET: [],
+            socket.AF_INET6: [],
+        }  # type: Dict[socket.AddressFamily, List[str]]
+
+        def encode(family, address):
+            words = struct.unpack(
+                '={}I'.format(4 if family == socket.AF_INET6 else 1),
+                socket.inet_pton(family, address[0]))
+            return '{}:{:04X}'.format(
+                ''.join('{:08X}'.format(w) for w in words), address[1])
+
+        for family, laddr, raddr, state in connections:
+            tables[family].append('   0: {} {} {} rest'.format(
+                encode(family, laddr), encode(family, raddr), state))
+
+        paths = []
+        for family, lines in tables.items():
+            path = tmpdir.join(str(int(family)))
+            path.write('  sl  local_address rem_address   st\n' +
+                       '\n'.join(lines) + '\n')
+            paths.append((family, path.strpath))
+        monkeypatch.setattr(tcp, 'TCP_TABLES', paths)
+
+    @pytest.mark.parametrize('family,laddr,state,matches', [
+        (socket.AF_INET, ('192.168.0.2', 22), '01', True),
+        (socket.AF_INET6, ('fe80::5193:518c:5c69:aedb', 22), '01', True),
+        (socket.AF_INET, ('192.168.0.2', 23), '01', False),
+        (socket.AF_INET, ('192.168.0.3', 22), '01', False),
+        (socket.AF_INET, ('192.168.0.2', 22), '0A', False),
+    ])
+    def test_tcp_tables(self, monkeypatch, tmpdir, family, laddr, state,
+                        matches) -> None:
+        remote = '42.42.42.42' if family == socket.AF_INET else '::42'
+        self.write_tcp_tables(monkeypatch, tmpdir, [
+            (family, laddr, (remote, 4242), state)])
+        monkeypatch.setattr(psutil, 'net_if_addrs', lambda: {'dummy': [
+            snic(socket.AF_INET, '192.168.0.2', '255.255.255.0', None, None),
+            snic(socket.AF_INET6, 'fe80::5193:518c:5c69:aedb%eth0',
+                 'ffff:ffff:ffff:ffff::', None, None),
+        ]})
+
+        def fail():
+            raise AssertionError('psutil must not be used')
+        monkeypatch.setattr(psutil, 'net_connections', fail)
+
+        assert (ActiveConnection('foo', [22]).check() is not None) == matches
+
+    def test_local_addresses_cached(self, monkeypatch, tmpdir,
+                                    mocker) -> None:
+        self.write_tcp_tables(monkeypatch, tmpdir, [
+            (socket.AF_INET, ('192.168.0.2', 22), ('42.42.42.42', 42),
+             '01')])
+        addresses = mocker.patch('psutil.net_if_addrs')
+        addresses.return_value = {'dummy': [
+            snic(socket.AF_INET, '192.168.0.2', '255.255.255.0', None, None),
+        ]}
+        check = ActiveConnection('foo', [22])
+
+        assert check.check() is not None
+        assert check.check() is not None
+        assert addresses.call_count == 1
+
     def test_create(self) -> None:
         parser = configparser.ConfigParser()
         parser.read_string('''[section]
@@ -492,6 +584,56 @@ class TestMpd(CheckTest):
         with pytest.raises(ConfigurationError):
             Mpd.create('name', parser['section'])
 
+    def test_create_idle(self, mocker) -> None:
+        watcher = mocker.patch('autosuspend.checks.activity.MpdWatcher')
+        parser = configparser.ConfigParser()
+        parser.read_string('''[section]
+                           host = host
+                           port = 1234
+                           timeout = 12
+                           idle = true''')
+
+        check = Mpd.create('name', parser['section'])
+
+        watcher.assert_called_once_with('host', 1234, 12)
+        watcher.return_value.start.assert_called_once_with()
+        assert check._watcher is watcher.return_value
+
+    def test_create_idle_default(self) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('''[section]''')
+
+        assert Mpd.create('name', parser['section'])._watcher is None
+
+    @pytest.mark.parametrize('state,expected', [
+        ('play', True), ('pause', False), ('stop', False),
+    ])
+    def test_idle_state(self, mocker, state, expected) -> None:
+        watcher = mocker.patch('autosuspend.checks.activity.MpdWatcher')
+        watcher.return_value.state.return_value = {'state': state}
+        client = mocker.patch('mpd.MPDClient')
+
+        check = Mpd('name', 'host', 1234, 12, idle=True)
+
+        assert (check.check() is not None) == expected
+        client.assert_not_called()
+
+    def test_idle_disconnected(self, mocker) -> None:
+        watcher = mocker.patch('autosuspend.checks.activity.MpdWatcher')
+        watcher.return_value.state.side_effect = ConnectionError('gone')
+
+        check = Mpd('name', 'host', 1234, 12, idle=True)
+
+        with pytest.raises(TemporaryCheckError):
+            check.check()
+
+    def test_close_stops_watcher(self, mocker) -> None:
+        watcher = mocker.patch('autosuspend.checks.activity.MpdWatcher')
+
+        Mpd('name', 'host', 1234, 12, idle=True).close()
+
+        watcher.return_value.stop.assert_called_once_with()
+
     def test_create_timeout_no_number(self) -> None:
         parser = configparser.ConfigParser()
         parser.read_string('''[section]
@@ -664,6 +806,92 @@ threshold_receive = xxx
             assert res is not None
             assert ' 100.0 ' in res
 
+    def test_create_sampling(self, mock_interfaces, mocker) -> None:
+        sampler = mocker.patch(
+            'autosuspend.util.bandwidth.BandwidthSampler')
+        parser = configparser.ConfigParser()
+        parser.read_string('''
+[section]
+interfaces = foo, baz
+sample_interval = 0.5
+window = 20
+aggregate = percentile
+percentile = 90
+''')
+        check = NetworkBandwidth.create('name', parser['section'])
+
+        sampler.assert_called_once_with(['foo', 'baz'], 0.5, 40)
+        sampler.return_value.start.assert_called_once_with()
+        assert check._aggregate([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11]) == 10
+
+    @pytest.mark.parametrize('options,error_match', [
+        ('sample_interval = 0', 'sample_interval must be positive'),
+        ('sample_interval = xxx', 'Unable to configure sampling'),
+        ('window = -1', 'window must be positive'),
+        ('aggregate = median', 'Unknown aggregate'),
+        ('aggregate = percentile\npercentile = 101', 'percentile'),
+        ('aggregate = ewma\newma_alpha = 0', 'alpha'),
+    ])
+    def test_create_sampling_error(self, mock_interfaces, options,
+                                   error_match) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('''
+[section]
+interfaces = foo
+{}
+'''.format(options))
+        with pytest.raises(ConfigurationError, match=error_match):
+            NetworkBandwidth.create('name', parser['section'])
+
+    @pytest.fixture
+    def sampler(self, mocker):
+        sampler = mocker.patch(
+            'autosuspend.util.bandwidth.BandwidthSampler').return_value
+        sampler.rates.return_value = [(0, 0), (1000, 10), (0, 20)]
+        return sampler
+
+    @pytest.mark.parametrize('aggregate,threshold,match', [
+        (bandwidth.mean, (300, 50), 'sending rate 333'),
+        (bandwidth.maximum, (999, 50), 'sending rate 1000'),
+        (bandwidth.mean, (1000, 5), 'receive rate 10.0'),
+        (bandwidth.mean, (1000, 10), None),
+    ])
+    def test_sampled(self, sampler, aggregate, threshold, match) -> None:
+        check = NetworkBandwidth('name', ['eth0'],
+                                 threshold_send=threshold[0],
+                                 threshold_receive=threshold[1],
+                                 sample_interval=1, aggregate=aggregate)
+
+        res = check.check()
+
+        if match is None:
+            assert res is None
+        else:
+            assert res is not None
+            assert match in res
+        sampler.rates.assert_called_with('eth0')
+
+    def test_sampled_no_samples(self, sampler) -> None:
+        sampler.rates.return_value = []
+        check = NetworkBandwidth('name', ['eth0'], 0, 0, sample_interval=1)
+
+        with pytest.raises(TemporaryCheckError):
+            check.check()
+
+    def test_sampled_no_throttling(self, sampler) -> None:
+        check = NetworkBandwidth('name', ['eth0'], 0, 0, sample_interval=1)
+
+        with freeze_time('2019-10-01 10:00:00'):
+            assert check.check() is not None
+            assert check.check() is not None
+
+    def test_close_stops_sampler(self, sampler) -> None:
+        check = NetworkBandwidth('name', ['eth0'], 0, 0, sample_interval=1)
+
+        check.close()
+
+        sampler.stop.assert_called_once_with()
+
 
 class TestKodi(CheckTest):
 
@@ -778,6 +1006,82 @@ class TestKodi(CheckTest):
         assert check._url.startswith('anurl')
         assert check._suspend_while_paused
 
+    def test_create_notifications(self, mocker) -> None:
+        client_for = mocker.patch('autosuspend.util.kodi.client_for')
+        parser = configparser.ConfigParser()
+        parser.read_string('''[section]
+                           url = http://kodi.local:8080/jsonrpc
+                           timeout = 7
+                           notifications = true
+                           notification_port = 9999''')
+
+        check = Kodi.create('name', parser['section'])
+
+        client_for.assert_called_once_with('kodi.local', 9999, 7)
+        assert check._client is client_for.return_value
+
+    def test_create_notifications_default(self, mocker) -> None:
+        client_for = mocker.patch('autosuspend.util.kodi.client_for')
+        parser = configparser.ConfigParser()
+        parser.read_string('''[section]
+                           notifications = true''')
+
+        Kodi.create('name', parser['section'])
+
+        client_for.assert_called_once_with('localhost', 9090, 5)
+
+    def test_create_notifications_disabled(self, mocker) -> None:
+        client_for = mocker.patch('autosuspend.util.kodi.client_for')
+        parser = configparser.ConfigParser()
+        parser.read_string('''[section]''')
+
+        assert Kodi.create('name', parser['section'])._client is None
+        client_for.assert_not_called()
+
+    @pytest.mark.parametrize('state,suspend_while_paused,active', [
+        (kodi.PLAYING, False, True),
+        (kodi.PAUSED, False, True),
+        (kodi.STOPPED, False, False),
+        (kodi.PLAYING, True, True),
+        (kodi.PAUSED, True, False),
+        (kodi.STOPPED, True, False),
+    ])
+    def test_notified_state(self, mocker, state, suspend_while_paused,
+                            active) -> None:
+        client = mocker.patch('autosuspend.util.kodi.client_for').return_value
+        client.player_state.return_value = state
+        get = mocker.patch('requests.Session.get')
+
+        check = Kodi('foo', url='url', timeout=10,
+                     suspend_while_paused=suspend_while_paused,
+                     notification_port=9090)
+
+        assert (check.check() is not None) == active
+        get.assert_not_called()
+
+    def test_notified_state_unknown_polls(self, mocker) -> None:
+        client = mocker.patch('autosuspend.util.kodi.client_for').return_value
+        client.player_state.return_value = None
+        mock_reply = mocker.MagicMock()
+        mock_reply.json.return_value = {
+            "id": 1, "jsonrpc": "2.0",
+            "result": [{"playerid": 0, "type": "audio"}]}
+        get = mocker.patch('requests.Session.get', return_value=mock_reply)
+
+        check = Kodi('foo', url='url', timeout=10, notification_port=9090)
+
+        assert check.check() is not None
+        get.assert_called_once()
+
+    def test_close_releases_client(self, mocker) -> None:
+        client_for = mocker.patch('autosuspend.util.kodi.client_for')
+        release = mocker.patch('autosuspend.util.kodi.release')
+
+        check = Kodi('foo', url='url', timeout=10, notification_port=9090)
+        check.close()
+
+        release.assert_called_once_with(client_for.return_value)
+
 
 class TestKodiIdleTime(CheckTest):
 
@@ -878,6 +1182,65 @@ class TestKodiIdleTime(CheckTest):
         assert KodiIdleTime('foo', url='url',
                             timeout=10, idle_time=42).check() is None
 
+    def test_create_notifications(self, mocker) -> None:
+        client_for = mocker.patch('autosuspend.util.kodi.client_for')
+        parser = configparser.ConfigParser()
+        parser.read_string('''[section]
+                           url = http://kodi.local:8080/jsonrpc
+                           notifications = true''')
+
+        check = KodiIdleTime.create('name', parser['section'])
+
+        client_for.assert_called_once_with('kodi.local', 9090, 5)
+        assert check._client is client_for.return_value
+
+    @pytest.mark.parametrize('idle,active', [(False, True), (True, False)])
+    def test_notification_connection(self, mocker, idle, active) -> None:
+        client = mocker.patch('autosuspend.util.kodi.client_for').return_value
+        client.connected = True
+        client.call.return_value = {"System.IdleTime(42)": idle}
+        get = mocker.patch('requests.Session.get')
+
+        check = KodiIdleTime('foo', url='url', timeout=10, idle_time=42,
+                             notification_port=9090)
+
+        assert (check.check() is not None) == active
+        client.call.assert_called_once_with(
+            'XBMC.GetInfoBooleans', {'booleans': ['System.IdleTime(42)']})
+        get.assert_not_called()
+
+    def test_close_releases_client(self, mocker) -> None:
+        client_for = mocker.patch('autosuspend.util.kodi.client_for')
+        release = mocker.patch('autosuspend.util.kodi.release')
+
+        check = KodiIdleTime('foo', url='url', timeout=10, idle_time=42,
+                             notification_port=9090)
+        check.close()
+
+        release.assert_called_once_with(client_for.return_value)
+
+    @pytest.mark.parametrize('connected,error', [
+        (False, None),
+        (True, ConnectionError()),
+        (True, TimeoutError()),
+    ])
+    def test_notification_connection_fallback(self, mocker, connected,
+                                              error) -> None:
+        client = mocker.patch('autosuspend.util.kodi.client_for').return_value
+        client.connected = connected
+        client.call.side_effect = error
+        mock_reply = mocker.MagicMock()
+        mock_reply.json.return_value = {"id": 1, "jsonrpc": "2.0",
+                                        "result": {
+                                            "System.IdleTime(42)": False}}
+        get = mocker.patch('requests.Session.get', return_value=mock_reply)
+
+        check = KodiIdleTime('foo', url='url', timeout=10, idle_time=42,
+                             notification_port=9090)
+
+        assert check.check() is not None
+        get.assert_called_once()
+
     def test_request_error(self, mocker) -> None:
         mocker.patch('requests.Session.get',
                      side_effect=requests.exceptions.RequestException())
@@ -897,7 +1260,7 @@ class TestPing(CheckTest):
 
         hosts = ['abc', '129.123.145.42']
 
-        assert Ping('name', hosts).check() is None
+        assert Ping('name', hosts, native=False).check() is None
 
         assert mock.call_count == len(hosts)
         for (args, _), host in zip(mock.call_args_list, hosts):
@@ -906,7 +1269,87 @@ class TestPing(CheckTest):
     def test_matching(self, mocker) -> None:
         mock = mocker.patch('subprocess.call')
         mock.return_value = 0
-        assert Ping('name', ['foo']).check() is not None
+        assert Ping('name', ['foo'], native=False).check() is not None
+
+    def test_command_options(self, mocker) -> None:
+        mock = mocker.patch('subprocess.call')
+        mock.return_value = 0
+        Ping('name', ['foo'], count=3, timeout=2.5, native=False).check()
+        assert mock.call_args[0][0] == [
+            'ping', '-q', '-c', '3', '-W', '3', 'foo']
+
+    def test_command_require_all(self, mocker) -> None:
+        mock = mocker.patch('subprocess.call')
+        mock.side_effect = [0, 1]
+        assert Ping('name', ['a', 'b', 'c'], require_all=True,
+                    native=False).check() is None
+        assert mock.call_count == 2
+
+    def test_native(self, mocker) -> None:
+        mock = mocker.patch('autosuspend.util.icmp.ping')
+        mock.return_value = {'b'}
+
+        res = Ping('name', ['a', 'b'], count=2, timeout=3).check()
+
+        assert res == 'Host b is up'
+        mock.assert_called_once_with(['a', 'b'], 2, 3, wanted=1)
+
+    def test_native_no_match(self, mocker) -> None:
+        mocker.patch('autosuspend.util.icmp.ping', return_value=set())
+        assert Ping('name', ['a', 'b']).check() is None
+
+    def test_native_require_all(self, mocker) -> None:
+        mock = mocker.patch('autosuspend.util.icmp.ping')
+        mock.return_value = {'a'}
+        check = Ping('name', ['a', 'b'], require_all=True)
+
+        assert check.check() is None
+        mock.assert_called_once_with(['a', 'b'], 1, 1, wanted=None)
+
+        mock.return_value = {'a', 'b'}
+        assert check.check() is not None
+
+    def test_native_unavailable_falls_back(self, mocker) -> None:
+        native = mocker.patch('autosuspend.util.icmp.ping')
+        native.side_effect = icmp.IcmpUnavailable()
+        command = mocker.patch('subprocess.call')
+        command.return_value = 0
+        check = Ping('name', ['a'])
+
+        assert check.check() is not None
+        assert check.check() is not None
+        native.assert_called_once()
+        assert command.call_count == 2
+
+    def test_native_localhost(self) -> None:
+        check = Ping('name', ['127.0.0.1'])
+        try:
+            icmp.ping([], 1, 0.1)
+            result = check.check()
+        except icmp.IcmpUnavailable:
+            pytest.skip('ICMP sockets are not available')
+        assert result == 'Host 127.0.0.1 is up'
+
+    def test_async_native(self, mocker) -> None:
+        mocker.patch('autosuspend.util.icmp.ping', return_value={'a'})
+        assert asyncio.run(Ping('name', ['a']).check_async()) is not None
+
+    def test_async_pings_all_hosts(self, mocker) -> None:
+        mock = mocker.patch('autosuspend.util.aio.run_process')
+        mock.side_effect = [(1, b''), (0, b''), (0, b'')]
+
+        res = asyncio.run(
+            Ping('name', ['a', 'b', 'c'], native=False).check_async())
+
+        assert res is not None
+        assert 'b' in res
+        assert [c[0][0][-1] for c in mock.call_args_list] == ['a', 'b', 'c']
+
+    def test_async_no_match(self, mocker) -> None:
+        mocker.patch('autosuspend.util.aio.run_process',
+                     return_value=(1, b''))
+        assert asyncio.run(
+            Ping('name', ['a'], native=False).check_async()) is None
 
     def test_create_missing_hosts(self) -> None:
         parser = configparser.ConfigParser()
@@ -921,6 +1364,43 @@ class TestPing(CheckTest):
         ping = Ping.create('name', parser['section'])
         assert ping._hosts == ['a', 'b', 'c']
 
+    def test_create_defaults(self) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('''[section]
+                           hosts=a''')
+        ping = Ping.create('name', parser['section'])
+        assert ping._count == 1
+        assert ping._timeout == 1
+        assert not ping._require_all
+        assert ping._native
+
+    def test_create_options(self) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('''[section]
+                           hosts=a
+                           count=3
+                           timeout=0.5
+                           require=all
+                           method=command''')
+        ping = Ping.create('name', parser['section'])
+        assert ping._count == 3
+        assert ping._timeout == 0.5
+        assert ping._require_all
+        assert not ping._native
+
+    @pytest.mark.parametrize('option', [
+        'count=0',
+        'count=many',
+        'timeout=0',
+        'require=most',
+        'method=magic',
+    ])
+    def test_create_invalid(self, option) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('[section]\nhosts=a\n' + option)
+        with pytest.raises(ConfigurationError):
+            Ping.create('name', parser['section'])
+
 
 class TestXIdleTime(CheckTest):
 
@@ -994,6 +1474,110 @@ class TestXIdleTime(CheckTest):
         with pytest.raises(TemporaryCheckError):
             check.check()
 
+    def test_skip_user_with_ignored_process(self, mocker) -> None:
+        check = XIdleTime('name', 100, 'logind',
+                          re.compile(r'.*test'), re.compile(r'a^'))
+        mocker.patch.object(check, '_provide_sessions').return_value = [
+            ('42', 'auser'), ('17', 'otheruser'),
+        ]
+        process = mocker.MagicMock()
+        process.info = {'name': 'xtest', 'username': 'auser'}
+        mocker.patch('psutil.process_iter').return_value = [process]
+
+        co_mock = mocker.patch('subprocess.check_output')
+        co_mock.return_value = '120000'
+
+        assert check.check() is None
+        co_mock.assert_called_once()
+        assert 'otheruser' in co_mock.call_args[0][0]
+
+    @pytest.fixture
+    def idle_query(self, mocker):
+        query = mocker.patch(
+            'autosuspend.util.xss.IdleTimeQuery').return_value
+        query.safe = True
+        return query
+
+    @pytest.mark.parametrize('idle_time,active', [(0.123, True),
+                                                  (120, False)])
+    def test_xss(self, mocker, idle_query, idle_time, active) -> None:
+        check = XIdleTime('name', 100, 'logind',
+                          re.compile(r'a^'), re.compile(r'a^'))
+        mocker.patch.object(check, '_provide_sessions').return_value = [
+            ('42', 'auser'),
+        ]
+        idle_query.idle_time.return_value = idle_time
+        co_mock = mocker.patch('subprocess.check_output')
+
+        assert (check.check() is not None) == active
+
+        display, xauthority = idle_query.idle_time.call_args[0]
+        assert display == 42
+        assert xauthority.endswith('.Xauthority')
+        assert 'auser' in xauthority
+        co_mock.assert_not_called()
+
+    def test_xss_error_falls_back(self, mocker, idle_query) -> None:
+        check = XIdleTime('name', 100, 'logind',
+                          re.compile(r'a^'), re.compile(r'a^'))
+        mocker.patch.object(check, '_provide_sessions').return_value = [
+            ('42', 'auser'),
+        ]
+        idle_query.idle_time.side_effect = xss.XssError()
+        co_mock = mocker.patch('subprocess.check_output')
+        co_mock.return_value = '123'
+
+        assert check.check() is not None
+        co_mock.assert_called_once()
+
+    def test_xss_error_without_fallback(self, mocker, idle_query) -> None:
+        check = XIdleTime('name', 100, 'logind',
+                          re.compile(r'a^'), re.compile(r'a^'),
+                          backend='xss')
+        mocker.patch.object(check, '_provide_sessions').return_value = [
+            ('42', 'auser'),
+        ]
+        idle_query.idle_time.side_effect = xss.XssError()
+        co_mock = mocker.patch('subprocess.check_output')
+
+        with pytest.raises(TemporaryCheckError):
+            check.check()
+        co_mock.assert_not_called()
+
+    def test_xss_unavailable(self, mocker) -> None:
+        mocker.patch('autosuspend.util.xss.IdleTimeQuery',
+                     side_effect=xss.XssUnavailable())
+
+        check = XIdleTime('name', 100, 'logind',
+                          re.compile(r'a^'), re.compile(r'a^'))
+        assert check._xss is None
+
+        with pytest.raises(ConfigurationError):
+            XIdleTime('name', 100, 'logind',
+                      re.compile(r'a^'), re.compile(r'a^'), backend='xss')
+
+    def test_xss_unsafe(self, idle_query) -> None:
+        idle_query.safe = False
+
+        check = XIdleTime('name', 100, 'logind',
+                          re.compile(r'a^'), re.compile(r'a^'))
+        assert check._xss is None
+        idle_query.close.assert_called_once_with()
+
+        check = XIdleTime('name', 100, 'logind',
+                          re.compile(r'a^'), re.compile(r'a^'), backend='xss')
+        assert check._xss is idle_query
+
+    def test_xprintidle_backend(self, mocker) -> None:
+        query = mocker.patch('autosuspend.util.xss.IdleTimeQuery')
+
+        check = XIdleTime('name', 100, 'logind',
+                          re.compile(r'a^'), re.compile(r'a^'),
+                          backend='xprintidle')
+
+        assert check._xss is None
+        query.assert_not_called()
+
     def test_create_default(self) -> None:
         parser = configparser.ConfigParser()
         parser.read_string('''[section]''')
@@ -1003,6 +1587,20 @@ class TestXIdleTime(CheckTest):
         assert check._ignore_users_re == re.compile(r'a^')
         assert check._provide_sessions == check._list_sessions_sockets
 
+    def test_create_backend(self) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('''[section]
+                              backend = xprintidle''')
+        check = XIdleTime.create('name', parser['section'])
+        assert check._backend == 'xprintidle'
+
+    def test_create_unknown_backend(self) -> None:
+        parser = configparser.ConfigParser()
+        parser.read_string('''[section]
+                              backend = asdf''')
+        with pytest.raises(ConfigurationError):
+            XIdleTime.create('name', parser['section'])
+
     def test_create(self) -> None:
         parser = configparser.ConfigParser()
         parser.read_string('''[section]
@@ -1101,6 +1699,12 @@ class TestExternalCommand(CheckTest):
             'name', parser['section']).check() is None  # type: ignore
         mock.assert_called_once_with('foo bar', shell=True)
 
+    def test_check_async(self) -> None:
+        assert asyncio.run(
+            ExternalCommand('name', 'true').check_async()) is not None
+        assert asyncio.run(
+            ExternalCommand('name', 'false').check_async()) is None
+
 
 class TestXPath(CheckTest):
 
@@ -6,7 +6,10 @@ import requests
 from autosuspend.checks import (Activity,
                                 ConfigurationError,
                                 TemporaryCheckError)
-from autosuspend.checks.util import CommandMixin, NetworkMixin, XPathMixin
+from autosuspend.checks.util import (CommandMixin,
+                                     NetworkMixin,
+                                     set_http_pool_size,
+                                     XPathMixin)
 
 
 class _CommandMixinSub(CommandMixin, Activity):
@@ -124,6 +127,93 @@ class TestNetworkMixin:
     def test_file_url(self) -> None:
         NetworkMixin('file://' + __file__, 5).request()
 
+    @pytest.fixture
+    def no_sessions(self, mocker) -> None:
+        mocker.patch.dict('autosuspend.checks.util._sessions', clear=True)
+
+    @pytest.mark.usefixtures('no_sessions')
+    def test_session_shared_per_host(self, stub_server, mocker) -> None:
+        spy = mocker.spy(requests, 'Session')
+        NetworkMixin(stub_server.resource_address('data.txt'), 5).request()
+        NetworkMixin(stub_server.resource_address('xml_with_encoding.xml'),
+                     5).request()
+        assert spy.call_count == 1
+
+    @pytest.mark.usefixtures('no_sessions')
+    def test_session_per_user(self, stub_server, mocker) -> None:
+        spy = mocker.spy(requests, 'Session')
+        address = stub_server.resource_address('data.txt')
+        NetworkMixin(address, 5).request()
+        NetworkMixin(address, 5, username='user', password='pass').request()
+        assert spy.call_count == 2
+
+    @pytest.mark.usefixtures('no_sessions')
+    def test_pool_size_change_resets_sessions(self, stub_server,
+                                              mocker) -> None:
+        spy = mocker.spy(requests, 'Session')
+        address = stub_server.resource_address('data.txt')
+        set_http_pool_size(2)
+        NetworkMixin(address, 5).request()
+        set_http_pool_size(2)
+        NetworkMixin(address, 5).request()
+        assert spy.call_count == 1
+        set_http_pool_size(3)
+        NetworkMixin(address, 5).request()
+        assert spy.call_count == 2
+
+    def test_authentication_remembered(self, stub_auth_server,
+                                       mocker) -> None:
+        mixin = NetworkMixin(stub_auth_server.resource_address('data.txt'),
+                             5, username='user', password='pass')
+        mixin.request()
+        spy = mocker.spy(requests.Session, 'get')
+        mixin.request()
+        assert spy.call_count == 1
+
+
+class TestNetworkMixinConditionalRequests:
+
+    def test_not_modified_reuses_reply(self, stub_server, mocker) -> None:
+        mixin = NetworkMixin(stub_server.resource_address('data.txt'), 5)
+        first = mixin.request()
+        spy = mocker.spy(requests.Session, 'get')
+        second = mixin.request()
+        assert second is first
+        assert 'If-Modified-Since' in spy.call_args[1]['headers']
+
+    def test_modified_resource_downloaded(self, mocker) -> None:
+        first_reply = mocker.MagicMock(status_code=200,
+                                       headers={'ETag': '"a"'})
+        second_reply = mocker.MagicMock(status_code=200,
+                                        headers={'ETag': '"b"'})
+        mock = mocker.patch('requests.Session.get',
+                            side_effect=[first_reply, second_reply])
+        mixin = NetworkMixin('http://localhost/test', 5)
+        assert mixin.request() is first_reply
+        assert mixin.request() is second_reply
+        assert mock.call_args[1]['headers'] == {'If-None-Match': '"a"'}
+
+    def test_no_validators_no_conditional_request(self, mocker) -> None:
+        reply = mocker.MagicMock(status_code=200, headers={})
+        mock = mocker.patch('requests.Session.get', return_value=reply)
+        mixin = NetworkMixin('http://localhost/test', 5)
+        mixin.request()
+        mixin.request()
+        assert 'headers' not in mock.call_args[1]
+
+    def test_file_validators(self, tmpdir, mocker) -> None:
+        data = tmpdir.join('data.txt')
+        data.write('first')
+        mixin = NetworkMixin('file://' + data.strpath, 5)
+        first = mixin.request()
+
+        spy = mocker.spy(requests.Session, 'get')
+        assert mixin.request() is first
+        assert spy.call_count == 0
+
+        data.write('second version')
+        assert mixin.request().text == 'second version'
+
 
 class _XPathMixinSub(XPathMixin, Activity):
 
@@ -167,6 +257,14 @@ class TestXPathMixin:
 
         _XPathMixinSub('foo', xpath='/b', url='nourl', timeout=5).evaluate()
 
+    def test_unchanged_reply_not_parsed_again(self, stub_server) -> None:
+        address = stub_server.resource_address('xml_with_encoding.xml')
+        check = _XPathMixinSub('foo', xpath='/b', url=address, timeout=5)
+        check.evaluate()
+        root = check._root
+        check.evaluate()
+        assert check._root is root
+
     def test_xpath_prevalidation(self) -> None:
         with pytest.raises(ConfigurationError,
                            match=r'^Invalid xpath.*'):
@@ -1,3 +1,4 @@
+import asyncio
 import configparser
 from datetime import datetime, timedelta, timezone
 import os
@@ -150,6 +151,17 @@ class TestCommand(CheckTest):
         with pytest.raises(TemporaryCheckError):
             check.check(datetime.now(timezone.utc))
 
+    def test_async(self) -> None:
+        check = Command('test', 'echo 1234')
+        assert asyncio.run(check.check_async(
+            datetime.now(timezone.utc))) == datetime.fromtimestamp(
+                1234, timezone.utc)
+
+    def test_async_not_parseable(self) -> None:
+        check = Command('test', 'echo asdfasdf')
+        with pytest.raises(TemporaryCheckError):
+            asyncio.run(check.check_async(datetime.now(timezone.utc)))
+
     def test_multiple_lines(self, mocker) -> None:
         mock = mocker.patch('subprocess.check_output')
         mock.return_value = '1234\nignore\n'
@@ -1,4 +1,11 @@
-from autosuspend.util import logger_by_class, logger_by_class_instance
+import os
+import stat
+
+import pytest
+
+from autosuspend.util import (logger_by_class,
+                              logger_by_class_instance,
+                              write_atomically)
 
 
 class DummyClass:
@@ -29,3 +36,40 @@ class TestLoggerByClassInstance:
         logger = logger_by_class_instance(DummyClass(), 'foo')
         assert logger is not None
         assert logger.name == 'tests.test_util.DummyClass.foo'
+
+
+class TestWriteAtomically:
+
+    def test_replaces(self, tmpdir) -> None:
+        path = tmpdir.join('metrics.prom')
+        path.write('old')
+
+        write_atomically(str(path), 'new')
+
+        assert path.read() == 'new'
+        assert stat.S_IMODE(os.stat(str(path)).st_mode) == 0o644
+        assert tmpdir.listdir() == [path]
+
+    def test_mode(self, tmpdir) -> None:
+        path = tmpdir.join('state')
+
+        write_atomically(str(path), 'new', 0o600)
+
+        assert stat.S_IMODE(os.stat(str(path)).st_mode) == 0o600
+
+    def test_sync(self, tmpdir, mocker) -> None:
+        sync = mocker.patch('os.fdatasync')
+        path = tmpdir.join('state')
+
+        write_atomically(str(path), 'new', sync=True)
+
+        assert path.read() == 'new'
+        sync.assert_called_once()
+
+    def test_cleans_up_on_error(self, tmpdir, mocker) -> None:
+        mocker.patch('os.replace', side_effect=PermissionError)
+
+        with pytest.raises(PermissionError):
+            write_atomically(str(tmpdir.join('metrics.prom')), 'x')
+
+        assert tmpdir.listdir() == []
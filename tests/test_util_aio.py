@@ -0,0 +1,64 @@
+import asyncio
+import subprocess
+import time
+
+import psutil
+import pytest
+
+from autosuspend.util import aio
+
+
+class TestRunProcess:
+
+    def test_output(self) -> None:
+        assert asyncio.run(aio.run_process(
+            ['echo', 'foo'], stdout=subprocess.PIPE)) == (0, b'foo\n')
+
+    def test_return_code(self) -> None:
+        assert asyncio.run(aio.run_process('exit 3', shell=True)) == (3, b'')
+
+    def test_killed_on_cancellation(self) -> None:
+
+        async def run() -> None:
+            await asyncio.wait_for(aio.run_process(['sleep', '30']), 0.5)
+
+        before = time.monotonic()
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(run())
+        assert time.monotonic() - before < 5
+        assert 'sleep' not in [
+            p.name() for p in psutil.Process().children(recursive=True)]
+
+    def test_shell_children_killed_on_cancellation(self) -> None:
+
+        async def run() -> None:
+            await asyncio.wait_for(
+                aio.run_process('sleep 31.5; true', shell=True), 0.5)
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(run())
+        time.sleep(0.2)
+        assert not [p for p in psutil.process_iter(['cmdline'])
+                    if p.info['cmdline'] == ['sleep', '31.5']]
+
+
+class TestCheckCall:
+
+    def test_success(self) -> None:
+        asyncio.run(aio.check_call('true', shell=True))
+
+    def test_failure(self) -> None:
+        with pytest.raises(subprocess.CalledProcessError):
+            asyncio.run(aio.check_call(['false']))
+
+
+class TestCheckOutput:
+
+    def test_success(self) -> None:
+        output = asyncio.run(aio.check_output('echo foo', shell=True))
+        assert output == b'foo\n'
+
+    def test_failure(self) -> None:
+        with pytest.raises(subprocess.CalledProcessError) as error:
+            asyncio.run(aio.check_output('echo foo; false', shell=True))
+        assert error.value.output == b'foo\n'
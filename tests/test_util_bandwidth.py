@@ -0,0 +1,144 @@
+from collections import namedtuple
+import time
+
+import psutil
+import pytest
+
+from autosuspend.util import bandwidth
+
+
+snetio = namedtuple('snetio', ['bytes_sent', 'bytes_recv'])
+
+
+class TestReadCounters:
+
+    def test_smoke(self) -> None:
+        interface = next(iter(psutil.net_if_addrs().keys()))
+        sent, received = bandwidth.read_counters(interface)
+        assert sent >= 0
+        assert received >= 0
+
+    def test_fallback_to_psutil(self, mocker) -> None:
+        mocker.patch('builtins.open', side_effect=FileNotFoundError)
+        mocker.patch('psutil.net_io_counters',
+                     return_value={'eth0': snetio(42, 23)})
+
+        assert bandwidth.read_counters('eth0') == (42, 23)
+
+    def test_missing_interface(self, mocker) -> None:
+        mocker.patch('builtins.open', side_effect=FileNotFoundError)
+        mocker.patch('psutil.net_io_counters', return_value={})
+
+        with pytest.raises(KeyError):
+            bandwidth.read_counters('eth0')
+
+
+class TestAggregates:
+
+    def test_mean(self) -> None:
+        assert bandwidth.mean([1, 2, 6]) == 3
+
+    def test_maximum(self) -> None:
+        assert bandwidth.maximum([1, 6, 2]) == 6
+
+    def test_ewma(self) -> None:
+        assert bandwidth.ewma([10, 20], alpha=0.5) == 15
+        assert bandwidth.ewma([10, 20, 20], alpha=0.5) == 17.5
+        assert bandwidth.ewma([10, 20], alpha=1) == 20
+
+    @pytest.mark.parametrize('name,kwargs', [
+        ('median', {}),
+        ('ewma', {'alpha': 0}),
+        ('ewma', {'alpha': 1.5}),
+        ('percentile', {'q': -1}),
+        ('percentile', {'q': 101}),
+    ])
+    def test_create_aggregate_invalid(self, name, kwargs) -> None:
+        with pytest.raises(ValueError):
+            bandwidth.create_aggregate(name, **kwargs)
+
+    def test_create_aggregate(self) -> None:
+        assert bandwidth.create_aggregate('mean') is bandwidth.mean
+        assert bandwidth.create_aggregate('max') is bandwidth.maximum
+        assert bandwidth.create_aggregate('ewma', alpha=1)([1, 2]) == 2
+        assert bandwidth.create_aggregate('percentile', q=0)([2, 1]) == 1
+
+
+class TestBandwidthSampler:
+
+    @pytest.fixture
+    def counters(self, mocker):
+        return mocker.patch('autosuspend.util.bandwidth.read_counters')
+
+    @pytest.fixture
+    def clock(self, mocker):
+        return mocker.patch('time.monotonic', return_value=100.)
+
+    def test_rates(self, counters, clock) -> None:
+        sampler = bandwidth.BandwidthSampler(['eth0'], 0.5, 10)
+
+        counters.return_value = (1000, 500)
+        sampler.sample()
+        assert sampler.rates('eth0') == []
+
+        clock.return_value = 100.5
+        counters.return_value = (1100, 1500)
+        sampler.sample()
+        assert sampler.rates('eth0') == [(200, 2000)]
+
+    def test_ring_buffer(self, counters, clock) -> None:
+        sampler = bandwidth.BandwidthSampler(['eth0'], 1, 3)
+
+        for i in range(10):
+            clock.return_value = 100. + i
+            counters.return_value = (i * i, 0)
+            sampler.sample()
+
+        assert sampler.rates('eth0') == [(13, 0), (15, 0), (17, 0)]
+
+    def test_counter_reset(self, counters, clock) -> None:
+        sampler = bandwidth.BandwidthSampler(['eth0'], 1, 3)
+        counters.return_value = (1000, 1000)
+        sampler.sample()
+
+        clock.return_value = 101.
+        counters.return_value = (10, 10)
+        sampler.sample()
+        assert sampler.rates('eth0') == []
+
+        clock.return_value = 102.
+        counters.return_value = (20, 30)
+        sampler.sample()
+        assert sampler.rates('eth0') == [(10, 20)]
+
+    def test_missing_interface(self, counters, clock) -> None:
+        sampler = bandwidth.BandwidthSampler(['eth0'], 1, 3)
+        counters.side_effect = KeyError('eth0')
+        sampler.sample()
+        clock.return_value = 101.
+        sampler.sample()
+
+        assert sampler.rates('eth0') == []
+
+    def test_background_thread(self, counters) -> None:
+        total = 0
+
+        def increasing(interface):
+            nonlocal total
+            total += 1000
+            return total, total
+
+        counters.side_effect = increasing
+        sampler = bandwidth.BandwidthSampler(['eth0'], 0.01, 100)
+        sampler.start()
+        try:
+            for _ in range(200):
+                if len(sampler.rates('eth0')) >= 3:
+                    break
+                time.sleep(0.01)
+        finally:
+            sampler.stop()
+
+        rates = sampler.rates('eth0')
+        assert len(rates) >= 3
+        assert all(send > 0 and receive > 0 for send, receive in rates)
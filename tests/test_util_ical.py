@@ -1,9 +1,12 @@
 from datetime import timedelta
+from io import BytesIO
 import os.path
 
 from dateutil import parser
 from dateutil.tz import tzlocal
+import pytest
 
+from autosuspend.util import ical
 from autosuspend.util.ical import CalendarEvent, list_calendar_events
 
 
@@ -93,6 +96,39 @@ class TestListCalendarEvents:
             expected_summaries = ['start', 'between', 'end']
             assert [e.summary for e in events] == expected_summaries
 
+    def test_mixed_all_day_and_timed_events(self) -> None:
+        data = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:test
+BEGIN:VEVENT
+UID:late
+SUMMARY:late
+DTSTAMP:20180601T000000Z
+DTSTART:20180612T100000Z
+DTEND:20180612T110000Z
+END:VEVENT
+BEGIN:VEVENT
+UID:all-day
+SUMMARY:all-day
+DTSTAMP:20180601T000000Z
+DTSTART;VALUE=DATE:20180612
+DTEND;VALUE=DATE:20180613
+END:VEVENT
+BEGIN:VEVENT
+UID:early
+SUMMARY:early
+DTSTAMP:20180601T000000Z
+DTSTART:20180611T100000Z
+DTEND:20180611T110000Z
+END:VEVENT
+END:VCALENDAR
+"""
+        start = parser.parse("2018-06-11 00:00:00 UTC")
+        events = list_calendar_events(BytesIO(data), start,
+                                      start + timedelta(days=3))
+
+        assert [e.summary for e in events] == ['early', 'all-day', 'late']
+
     def test_normal_events(self) -> None:
         with open(os.path.join(os.path.dirname(__file__), 'test_data',
                                'normal-events-corner-cases.ics'), 'rb') as f:
@@ -407,3 +443,102 @@ class TestListCalendarEvents:
             ]
 
             assert expected_start_times == [e.start for e in events]
+
+
+class TestParsedCalendarCache:
+
+    @staticmethod
+    def _read(name: str) -> bytes:
+        with open(os.path.join(os.path.dirname(__file__), 'test_data',
+                               name), 'rb') as f:
+            return f.read()
+
+    def test_parsed_once_for_different_windows(self, mocker) -> None:
+        content = self._read('simple-recurring.ics')
+        ical._parsed_cache.clear()
+        spy = mocker.spy(ical.icalendar.Calendar, 'from_ical')
+
+        start = parser.parse("2018-06-18 04:00:00 UTC")
+        first = list_calendar_events(BytesIO(content), start,
+                                     start + timedelta(weeks=2))
+        second = list_calendar_events(BytesIO(content),
+                                      start + timedelta(weeks=1),
+                                      start + timedelta(weeks=2))
+
+        assert spy.call_count == 1
+        assert len(first) == 10
+        assert len(second) == 5
+
+    def test_changed_content_parsed_again(self, mocker) -> None:
+        ical._parsed_cache.clear()
+        spy = mocker.spy(ical.icalendar.Calendar, 'from_ical')
+        start = parser.parse("2018-06-18 04:00:00 UTC")
+        for name in ['simple-recurring.ics', 'multiple.ics']:
+            list_calendar_events(BytesIO(self._read(name)), start,
+                                 start + timedelta(weeks=2))
+        assert spy.call_count == 2
+
+    def test_lru_eviction(self, mocker) -> None:
+        ical._parsed_cache.clear()
+        mocker.patch.object(ical, '_PARSED_CACHE_SIZE', 1)
+        first = ical._parse_calendar(self._read('simple-recurring.ics'))
+        ical._parse_calendar(self._read('multiple.ics'))
+        assert len(ical._parsed_cache) == 1
+        assert ical._parse_calendar(
+            self._read('simple-recurring.ics')) is not first
+
+
+class TestOccurrenceIndex:
+
+    @staticmethod
+    def _parse(name: str) -> ical._ParsedCalendar:
+        with open(os.path.join(os.path.dirname(__file__), 'test_data',
+                               name), 'rb') as f:
+            return ical._ParsedCalendar(f.read())
+
+    def test_recurrences_expanded_once_within_horizon(self, mocker) -> None:
+        parsed = self._parse('simple-recurring.ics')
+        spy = mocker.spy(ical, '_expand_rrule')
+
+        start = parser.parse("2018-06-18 04:00:00 UTC")
+        first = parsed.index.lookup(start, start + timedelta(weeks=1))
+        second = parsed.index.lookup(start + timedelta(days=1),
+                                     start + timedelta(weeks=1))
+
+        assert spy.call_count == 1
+        assert len(first) == 5
+        assert len(second) == 4
+
+    def test_horizon_extended_lazily(self, mocker) -> None:
+        parsed = self._parse('simple-recurring.ics')
+        start = parser.parse("2018-06-18 04:00:00 UTC")
+        parsed.index.lookup(start, start + timedelta(days=1))
+
+        spy = mocker.spy(ical, '_expand_rrule')
+        later = start + timedelta(weeks=20)
+        events = parsed.index.lookup(later, later + timedelta(weeks=1))
+
+        assert spy.call_count == 1
+        assert [e.start for e in events] == [
+            e.start for e in self._parse('simple-recurring.ics').index.lookup(
+                later, later + timedelta(weeks=1))]
+
+    @pytest.mark.parametrize('name', [
+        'simple-recurring.ics',
+        'all-day-recurring.ics',
+        'all-day-recurring-exclusions.ics',
+        'exclusions.ics',
+        'single-change.ics',
+        'recurring-change-dst.ics',
+        'normal-events-corner-cases.ics',
+    ])
+    def test_sliding_windows_match_fresh_lookups(self, name: str) -> None:
+        parsed = self._parse(name)
+        start = parser.parse("2018-01-01 00:00:00 UTC")
+        for step in range(0, 24 * 7 * 60, 37):
+            start_at = start + timedelta(hours=step)
+            end_at = start_at + timedelta(days=3)
+            expected = self._parse(name).index.lookup(start_at, end_at)
+            actual = parsed.index.lookup(start_at, end_at)
+            assert [(e.summary, e.start, e.end) for e in actual] == [
+                (e.summary, e.start, e.end) for e in expected]
@@ -0,0 +1,114 @@
+import socket
+import struct
+import time
+
+import pytest
+
+from autosuspend.util import icmp
+
+
+def _ping_or_skip(*args, **kwargs):
+    try:
+        return icmp.ping(*args, **kwargs)
+    except icmp.IcmpUnavailable:
+        pytest.skip('ICMP sockets are not available')
+
+
+class TestChecksum:
+
+    def test_known_value(self) -> None:
+        # echo request with identifier 1, sequence 1 and no payload
+        packet = struct.pack('!BBHHH', 8, 0, 0, 1, 1)
+        assert icmp._checksum(packet) == 0xf7fd
+
+    def test_odd_length(self) -> None:
+        packet = struct.pack('!BBHHH', 8, 0, 0, 1, 1) + b'a'
+        checksum = icmp._checksum(packet)
+        patched = packet[:2] + struct.pack('!H', checksum) + packet[4:]
+        assert icmp._checksum(patched) == 0
+
+
+class TestParseReply:
+
+    def test_datagram_reply(self) -> None:
+        data = struct.pack('!BBHHH', 0, 0, 0, 4711, 0) + b'token'
+        assert icmp._parse_reply(data, socket.AF_INET, False, 42, b'token')
+
+    def test_wrong_token(self) -> None:
+        data = struct.pack('!BBHHH', 0, 0, 0, 42, 0) + b'other'
+        assert not icmp._parse_reply(data, socket.AF_INET, False, 42,
+                                     b'token')
+
+    def test_no_reply(self) -> None:
+        data = struct.pack('!BBHHH', 8, 0, 0, 42, 0) + b'token'
+        assert not icmp._parse_reply(data, socket.AF_INET, False, 42,
+                                     b'token')
+
+    def test_raw_strips_ip_header(self) -> None:
+        data = (b'\x45' + b'\0' * 19 +
+                struct.pack('!BBHHH', 0, 0, 0, 42, 0) + b'token')
+        assert icmp._parse_reply(data, socket.AF_INET, True, 42, b'token')
+
+    def test_raw_foreign_identifier(self) -> None:
+        data = (b'\x45' + b'\0' * 19 +
+                struct.pack('!BBHHH', 0, 0, 0, 43, 0) + b'token')
+        assert not icmp._parse_reply(data, socket.AF_INET, True, 42,
+                                     b'token')
+
+    def test_ipv6_reply(self) -> None:
+        data = struct.pack('!BBHHH', 129, 0, 0, 42, 0) + b'token'
+        assert icmp._parse_reply(data, socket.AF_INET6, True, 42, b'token')
+
+
+class TestPing:
+
+    def test_no_hosts(self) -> None:
+        assert icmp.ping([]) == set()
+
+    def test_unresolvable_host(self) -> None:
+        assert icmp.ping(['host.invalid'], timeout=0.1) == set()
+
+    def test_localhost(self) -> None:
+        assert _ping_or_skip(['127.0.0.1', 'localhost']) == {
+            '127.0.0.1', 'localhost'}
+
+    def test_stops_when_enough_replies(self) -> None:
+        assert len(_ping_or_skip(['127.0.0.1', 'localhost', '::1'],
+                                 timeout=5, wanted=1)) >= 1
+
+    def test_shared_timeout(self, mocker) -> None:
+        # sockets that never receive a reply
+        sockets = []
+
+        def silent_socket(family):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(('127.0.0.1', 0))
+            sockets.append(sock)
+            return sock, False
+        mocker.patch.object(icmp, '_open_socket', side_effect=silent_socket)
+
+        before = time.monotonic()
+        assert icmp.ping(['127.0.0.1', '127.0.0.2', '127.0.0.3'],
+                         count=2, timeout=0.3) == set()
+        assert 0.3 <= time.monotonic() - before < 1
+        assert len(sockets) == 1
+
+    def test_slow_resolution_counts_against_timeout(self, mocker) -> None:
+        resolve = icmp._resolve
+
+        def slow_resolve(host):
+            if host == 'slow.invalid':
+                time.sleep(2)
+            return resolve(host)
+        mocker.patch.object(icmp, '_resolve', side_effect=slow_resolve)
+        mocker.patch.object(icmp, '_open_socket', return_value=(
+            socket.socket(socket.AF_INET, socket.SOCK_DGRAM), False))
+
+        before = time.monotonic()
+        assert icmp.ping(['slow.invalid', '127.0.0.1'], timeout=0.3) == set()
+        assert time.monotonic() - before < 1
+
+    def test_unavailable(self, mocker) -> None:
+        mocker.patch('socket.socket', side_effect=PermissionError())
+        with pytest.raises(icmp.IcmpUnavailable):
+            icmp.ping(['127.0.0.1'])
@@ -0,0 +1,216 @@
+import json
+import socket
+import threading
+import time
+from typing import Dict, List
+
+import pytest
+
+from autosuspend.util import kodi
+
+
+class FakeKodi:
+    """Answers GetInfoBooleans requests and pushes notifications."""
+
+    def __init__(self) -> None:
+        self.booleans = {'Player.Playing': False, 'Player.Paused': False,
+                         'System.IdleTime(10)': True}
+        self.connections = 0
+        self.requests = []  # type: List[Dict]
+        self._server = socket.socket()
+        self._server.bind(('127.0.0.1', 0))
+        self._server.listen(5)
+        self.port = self._server.getsockname()[1]
+        self._clients = []  # type: List[socket.socket]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            self._clients.append(client)
+            threading.Thread(target=self._serve, args=(client,),
+                             daemon=True).start()
+
+    def _serve(self, client: socket.socket) -> None:
+        decoder = json.JSONDecoder()
+        buffer = ''
+        try:
+            while True:
+                data = client.recv(4096)
+                if not data:
+                    return
+                buffer += data.decode()
+                while buffer:
+                    try:
+                        request, end = decoder.raw_decode(buffer)
+                    except ValueError:
+                        break
+                    buffer = buffer[end:]
+                    self.requests.append(request)
+                    booleans = {
+                        name: self.booleans[name]
+                        for name in request['params']['booleans']}
+                    # deliberately without delimiter, like Kodi
+                    client.sendall(json.dumps({
+                        'id': request['id'], 'jsonrpc': '2.0',
+                        'result': booleans}).encode())
+        except OSError:
+            pass
+
+    def notify(self, method: str) -> None:
+        message = json.dumps({'jsonrpc': '2.0', 'method': method,
+                              'params': {'sender': 'xbmc'}}).encode()
+        for client in self._clients:
+            # split messages to exercise the stream parsing
+            client.sendall(message[:10])
+            time.sleep(0.01)
+            client.sendall(message[10:])
+
+    def drop_clients(self) -> None:
+        for client in self._clients:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._clients = []
+
+    def close(self) -> None:
+        self._server.close()
+        self.drop_clients()
+
+
+@pytest.fixture
+def server():
+    server = FakeKodi()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def client(server):
+    client = kodi.KodiClient('127.0.0.1', server.port, 5, min_backoff=0.05)
+    client.start()
+    yield client
+    client.stop()
+
+
+def wait_for(predicate, timeout: float = 5.) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'Condition not reached in time'
+        time.sleep(0.01)
+
+
+class TestKodiClient:
+
+    @pytest.mark.parametrize('playing,paused,expected', [
+        (False, False, kodi.STOPPED),
+        (True, False, kodi.PLAYING),
+        (False, True, kodi.PAUSED),
+    ])
+    def test_initial_state(self, server, playing, paused, expected) -> None:
+        server.booleans['Player.Playing'] = playing
+        server.booleans['Player.Paused'] = paused
+        client = kodi.KodiClient('127.0.0.1', server.port, 5)
+        client.start()
+        try:
+            wait_for(lambda: client.player_state() is not None)
+            assert client.player_state() == expected
+        finally:
+            client.stop()
+
+    def test_notifications(self, server, client) -> None:
+        wait_for(lambda: client.player_state() == kodi.STOPPED)
+
+        server.notify('Player.OnPlay')
+        wait_for(lambda: client.player_state() == kodi.PLAYING)
+        server.notify('Player.OnPause')
+        wait_for(lambda: client.player_state() == kodi.PAUSED)
+        server.notify('Player.OnResume')
+        wait_for(lambda: client.player_state() == kodi.PLAYING)
+        server.notify('Player.OnStop')
+        wait_for(lambda: client.player_state() == kodi.STOPPED)
+
+        assert server.connections == 1
+
+    def test_ignores_unknown_notifications(self, server, client) -> None:
+        wait_for(lambda: client.player_state() == kodi.STOPPED)
+        server.notify('GUI.OnScreensaverActivated')
+        server.notify('Player.OnPlay')
+        wait_for(lambda: client.player_state() == kodi.PLAYING)
+
+    def test_call(self, server, client) -> None:
+        wait_for(lambda: client.connected)
+        assert client.call('XBMC.GetInfoBooleans',
+                           {'booleans': ['System.IdleTime(10)']}) == {
+            'System.IdleTime(10)': True}
+
+    def test_call_not_connected(self) -> None:
+        client = kodi.KodiClient('127.0.0.1', 1, 5)
+        with pytest.raises(ConnectionError):
+            client.call('JSONRPC.Ping')
+
+    def test_unreachable(self) -> None:
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        client = kodi.KodiClient('127.0.0.1', port, 1, min_backoff=10)
+        client.start()
+        try:
+            time.sleep(0.1)
+            assert not client.connected
+            assert client.player_state() is None
+        finally:
+            client.stop()
+
+    def test_reconnects(self, server, client) -> None:
+        wait_for(lambda: client.player_state() == kodi.STOPPED)
+
+        server.booleans['Player.Playing'] = True
+        server.drop_clients()
+
+        wait_for(lambda: server.connections == 2)
+        wait_for(lambda: client.player_state() == kodi.PLAYING)
+
+    def test_stop(self, server, client) -> None:
+        wait_for(lambda: client.connected)
+        start = time.monotonic()
+        client.stop()
+        assert time.monotonic() - start < 1
+        assert not client.connected
+
+
+class TestClientFor:
+
+    def test_shared(self, mocker) -> None:
+        mocker.patch.object(kodi, '_clients', {})
+        mocker.patch.object(kodi, '_users', {})
+        start = mocker.patch.object(kodi.KodiClient, 'start')
+
+        first = kodi.client_for('host', 9090, 5)
+        assert start.call_count == 1
+
+        assert kodi.client_for('host', 9090, 5) is first
+        assert start.call_count == 1
+        assert kodi.client_for('other', 9090, 5) is not first
+        assert start.call_count == 2
+
+    def test_release(self, mocker) -> None:
+        mocker.patch.object(kodi, '_clients', {})
+        mocker.patch.object(kodi, '_users', {})
+        mocker.patch.object(kodi.KodiClient, 'start')
+        stop = mocker.patch.object(kodi.KodiClient, 'stop')
+
+        first = kodi.client_for('host', 9090, 5)
+        assert kodi.client_for('host', 9090, 5) is first
+
+        kodi.release(first)
+        stop.assert_not_called()
+        kodi.release(first)
+        stop.assert_called_once_with()
+
+        assert kodi.client_for('host', 9090, 5) is not first
@@ -0,0 +1,133 @@
+import time
+from typing import Iterator
+import urllib.error
+import urllib.request
+
+import pytest
+
+from autosuspend.util import metrics
+
+
+def _samples(text: str) -> dict:
+    return dict(line.rsplit(' ', 1) for line in text.splitlines()
+                if not line.startswith('#'))
+
+
+class TestMetrics:
+
+    def test_render_empty(self) -> None:
+        samples = _samples(metrics.Metrics().render())
+
+        assert samples['autosuspend_idle_since_timestamp_seconds'] == '0.0'
+        assert samples['autosuspend_next_wakeup_timestamp_seconds'] == '0.0'
+        assert samples['autosuspend_suspends_total'] == '0'
+
+    def test_histogram(self) -> None:
+        registry = metrics.Metrics(buckets=[1, 0.1])
+        registry.observe_check('foo', 'activity', 0.05, False, False)
+        registry.observe_check('foo', 'activity', 0.5, True, False)
+        registry.observe_check('foo', 'activity', 5, False, True)
+
+        samples = _samples(registry.render())
+        prefix = ('autosuspend_check_duration_seconds_{}'
+                  '{{check="foo",type="activity"{}}}')
+        assert samples[prefix.format('bucket', ',le="0.1"')] == '1'
+        assert samples[prefix.format('bucket', ',le="1.0"')] == '2'
+        assert samples[prefix.format('bucket', ',le="+Inf"')] == '3'
+        assert float(samples[prefix.format('sum', '')]) == pytest.approx(
+            5.55)
+        assert samples[prefix.format('count', '')] == '3'
+        assert samples['autosuspend_check_matches_total'
+                       '{check="foo",type="activity"}'] == '1'
+        assert samples['autosuspend_check_temporary_errors_total'
+                       '{check="foo",type="activity"}'] == '1'
+
+    def test_label_escaping(self) -> None:
+        registry = metrics.Metrics()
+        registry.observe_check('a"b\\c', 'wakeup', 0, False, False)
+
+        assert ('autosuspend_check_matches_total'
+                '{check="a\\"b\\\\c",type="wakeup"} 0') in registry.render()
+
+    def test_state(self) -> None:
+        registry = metrics.Metrics()
+        registry.set_idle_since(42.)
+        registry.set_next_wakeup(1000.)
+        registry.count_suspend()
+
+        samples = _samples(registry.render())
+        assert samples['autosuspend_idle_since_timestamp_seconds'] == '42.0'
+        assert samples[
+            'autosuspend_next_wakeup_timestamp_seconds'] == '1000.0'
+        assert samples['autosuspend_suspends_total'] == '1'
+
+    def test_wait_changed(self) -> None:
+        registry = metrics.Metrics()
+        generation = registry.wait_changed(-1)
+
+        assert registry.wait_changed(generation, 0.01) == generation
+        registry.set_idle_since(1.)
+        assert registry.wait_changed(generation, 0.01) != generation
+
+    def test_unchanged_state_does_not_notify(self) -> None:
+        registry = metrics.Metrics()
+        registry.set_idle_since(1.)
+        generation = registry.wait_changed(-1)
+        registry.set_idle_since(1.)
+
+        assert registry.wait_changed(generation, 0.01) == generation
+
+
+class TestTextfileExporter:
+
+    def test_writes_on_change(self, tmpdir) -> None:
+        path = tmpdir.join('metrics.prom')
+        registry = metrics.Metrics()
+        exporter = metrics.TextfileExporter(registry, str(path))
+        exporter.start()
+        try:
+            registry.count_suspend()
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                if path.check() and 'suspends_total 1' in path.read():
+                    break
+                time.sleep(0.01)
+            assert 'autosuspend_suspends_total 1' in path.read()
+        finally:
+            exporter.stop()
+
+    def test_write_error_is_logged(self, tmpdir, caplog) -> None:
+        exporter = metrics.TextfileExporter(
+            metrics.Metrics(), str(tmpdir.join('missing', 'metrics.prom')))
+
+        exporter.write()
+
+        assert 'Unable to write metrics' in caplog.text
+
+
+class TestHttpExporter:
+
+    @pytest.fixture
+    def exporter(self) -> Iterator[metrics.HttpExporter]:
+        registry = metrics.Metrics()
+        registry.count_suspend()
+        exporter = metrics.HttpExporter(registry, '127.0.0.1', 0)
+        exporter.start()
+        yield exporter
+        exporter.stop()
+
+    def test_serves_metrics(self, exporter) -> None:
+        with urllib.request.urlopen(
+                'http://127.0.0.1:{}/metrics'.format(exporter.port)) as reply:
+            assert reply.headers['Content-Type'].startswith('text/plain')
+            assert b'autosuspend_suspends_total 1' in reply.read()
+
+    def test_unknown_path(self, exporter) -> None:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(
+                'http://127.0.0.1:{}/other'.format(exporter.port))
+        assert error.value.code == 404
+
+
+def test_get_metrics() -> None:
+    assert metrics.get_metrics() is metrics.get_metrics()
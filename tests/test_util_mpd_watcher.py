@@ -0,0 +1,184 @@
+import os
+import queue
+import socket
+import threading
+import time
+from typing import Dict
+
+import pytest
+
+from autosuspend.util.mpd_watcher import MpdWatcher
+
+
+class FakeMpd:
+    """Speaks just enough of the MPD protocol for the watcher."""
+
+    def __init__(self) -> None:
+        self.state = 'stop'
+        self.connections = 0
+        self._server = socket.socket()
+        self._server.bind(('127.0.0.1', 0))
+        self._server.listen(5)
+        self.port = self._server.getsockname()[1]
+        self._clients = {}  # type: Dict[socket.socket, queue.Queue]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            self._clients[client] = queue.Queue()
+            threading.Thread(target=self._serve, args=(client,),
+                             daemon=True).start()
+
+    def _serve(self, client: socket.socket) -> None:
+        changes = self._clients[client]
+        try:
+            with client, client.makefile('rwb') as stream:
+                stream.write(b'OK MPD 0.21.0\n')
+                stream.flush()
+                for line in stream:
+                    command = line.strip()
+                    if command == b'status':
+                        stream.write('state: {}\nOK\n'.format(
+                            self.state).encode())
+                    elif command == b'idle "player"':
+                        if not changes.get():
+                            return
+                        stream.write(b'changed: player\nOK\n')
+                    else:
+                        stream.write(b'ACK [5@0] {} unknown command\n')
+                    stream.flush()
+        except OSError:
+            pass
+
+    def change(self, state: str) -> None:
+        self.state = state
+        for changes in list(self._clients.values()):
+            changes.put(True)
+
+    def drop_clients(self) -> None:
+        for client, changes in list(self._clients.items()):
+            changes.put(False)
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._clients = {}
+
+    def close(self) -> None:
+        self._server.close()
+        self.drop_clients()
+
+
+@pytest.fixture
+def server():
+    server = FakeMpd()
+    yield server
+    server.close()
+
+
+def wait_for(predicate, timeout: float = 5.) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'Condition not reached in time'
+        time.sleep(0.01)
+
+
+def current_state(watcher: MpdWatcher) -> str:
+    try:
+        return watcher.state()['state']
+    except ConnectionError:
+        return 'disconnected'
+
+
+class TestMpdWatcher:
+
+    def test_initial_state(self, server) -> None:
+        watcher = MpdWatcher('127.0.0.1', server.port, 5)
+        watcher.start()
+        try:
+            assert watcher.state()['state'] == 'stop'
+        finally:
+            watcher.stop()
+
+    def test_push_updates(self, server) -> None:
+        watcher = MpdWatcher('127.0.0.1', server.port, 5)
+        watcher.start()
+        try:
+            assert watcher.state()['state'] == 'stop'
+            server.change('play')
+            wait_for(lambda: current_state(watcher) == 'play')
+            server.change('pause')
+            wait_for(lambda: current_state(watcher) == 'pause')
+        finally:
+            watcher.stop()
+        assert server.connections == 1
+
+    def test_not_reachable(self) -> None:
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+
+        watcher = MpdWatcher('127.0.0.1', port, 1, min_backoff=10)
+        watcher.start()
+        try:
+            with pytest.raises(ConnectionError):
+                watcher.state()
+        finally:
+            watcher.stop()
+
+    def test_reconnects(self, server) -> None:
+        watcher = MpdWatcher('127.0.0.1', server.port, 5,
+                             min_backoff=0.05)
+        watcher.start()
+        try:
+            assert watcher.state()['state'] == 'stop'
+            server.drop_clients()
+            wait_for(lambda: server.connections == 2)
+            server.change('play')
+            wait_for(lambda: current_state(watcher) == 'play')
+        finally:
+            watcher.stop()
+
+    def test_stop_while_idle(self, server) -> None:
+        watcher = MpdWatcher('127.0.0.1', server.port, 5)
+        watcher.start()
+        assert watcher.state()['state'] == 'stop'
+
+        start = time.monotonic()
+        watcher.stop()
+
+        assert time.monotonic() - start < 1
+
+    def test_keepalive(self, server) -> None:
+        watcher = MpdWatcher('127.0.0.1', server.port, 5, keepalive=42)
+        watcher.start()
+        try:
+            assert watcher.state()['state'] == 'stop'
+            assert watcher._client is not None
+            with socket.socket(
+                    fileno=os.dup(watcher._client.fileno())) as sock:
+                assert sock.getsockopt(socket.SOL_SOCKET,
+                                       socket.SO_KEEPALIVE)
+                if hasattr(socket, 'TCP_KEEPIDLE'):
+                    assert sock.getsockopt(socket.IPPROTO_TCP,
+                                           socket.TCP_KEEPIDLE) == 42
+                    assert sock.getsockopt(socket.IPPROTO_TCP,
+                                           socket.TCP_KEEPINTVL) == 5
+        finally:
+            watcher.stop()
+
+    def test_lost_connection_marks_state_unknown(self, server) -> None:
+        watcher = MpdWatcher('127.0.0.1', server.port, 5, min_backoff=10)
+        watcher.start()
+        try:
+            assert watcher.state()['state'] == 'stop'
+            # the pending idle command fails like with failed keepalive probes
+            server.drop_clients()
+            wait_for(lambda: current_state(watcher) == 'disconnected')
+        finally:
+            watcher.stop()
@@ -0,0 +1,86 @@
+import pytest
+
+from autosuspend.util import ordering
+
+
+class _Check:
+
+    def __init__(self, name: str, priority: int = 0) -> None:
+        self.name = name
+        self.priority = priority
+
+
+class TestCheckStatistics:
+
+    def test_unknown(self) -> None:
+        statistics = ordering.CheckStatistics()
+        assert statistics.averages('unknown') is None
+        assert statistics.score('unknown') == 0
+
+    def test_first_observation(self) -> None:
+        statistics = ordering.CheckStatistics()
+        statistics.observe('check', 2., True)
+        assert statistics.averages('check') == (2., 1.)
+
+    def test_moving_average(self) -> None:
+        statistics = ordering.CheckStatistics(weight=0.5)
+        statistics.observe('check', 2., True)
+        statistics.observe('check', 4., False)
+        assert statistics.averages('check') == (3., 0.5)
+
+    def test_score(self) -> None:
+        statistics = ordering.CheckStatistics(weight=0.5)
+        statistics.observe('check', 2., True)
+        statistics.observe('check', 2., False)
+        assert statistics.score('check') == pytest.approx(4.)
+
+    def test_score_never_matched(self) -> None:
+        statistics = ordering.CheckStatistics(min_match_rate=0.1)
+        statistics.observe('check', 2., False)
+        assert statistics.score('check') == pytest.approx(20.)
+
+
+class TestOrder:
+
+    def test_keeps_configured_order(self) -> None:
+        statistics = ordering.CheckStatistics()
+        checks = [_Check('slow'), _Check('fast')]
+        statistics.observe('slow', 5., False)
+        statistics.observe('fast', 0.01, True)
+
+        assert ordering.order(checks, False, statistics) == checks
+
+    def test_adaptive(self) -> None:
+        statistics = ordering.CheckStatistics()
+        slow = _Check('slow')
+        fast = _Check('fast')
+        unknown = _Check('unknown')
+        statistics.observe('slow', 5., True)
+        statistics.observe('fast', 0.01, True)
+
+        assert ordering.order([slow, fast, unknown], True, statistics) == [
+            unknown, fast, slow]
+
+    def test_adaptive_prefers_likely_matches(self) -> None:
+        statistics = ordering.CheckStatistics()
+        cheap = _Check('cheap')
+        likely = _Check('likely')
+        statistics.observe('cheap', 0.1, False)
+        statistics.observe('likely', 0.5, True)
+
+        assert ordering.order([cheap, likely], True, statistics) == [
+            likely, cheap]
+
+    @pytest.mark.parametrize('adaptive', [True, False])
+    def test_priority_first(self, adaptive) -> None:
+        statistics = ordering.CheckStatistics()
+        slow = _Check('slow', priority=1)
+        fast = _Check('fast')
+        statistics.observe('slow', 5., False)
+        statistics.observe('fast', 0.01, True)
+
+        assert ordering.order([fast, slow], adaptive, statistics) == [
+            slow, fast]
+
+    def test_shared_statistics(self) -> None:
+        assert ordering.get_statistics() is ordering.get_statistics()
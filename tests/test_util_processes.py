@@ -0,0 +1,95 @@
+from autosuspend.util import processes
+
+
+class _StubProcess:
+
+    def __init__(self, name, username) -> None:
+        self.info = {'name': name, 'username': username}
+
+
+class TestProcessSnapshot:
+
+    def test_names(self) -> None:
+        snapshot = processes.ProcessSnapshot(
+            [{'name': 'foo'}, {'name': None}, {'name': 'bar'}],
+            frozenset(['name']))
+        assert snapshot.names() == {'foo', 'bar'}
+
+    def test_names_of_user(self) -> None:
+        snapshot = processes.ProcessSnapshot(
+            [{'name': 'foo', 'username': 'auser'},
+             {'name': 'bar', 'username': 'other'},
+             {'name': None, 'username': 'auser'},
+             {'name': 'baz', 'username': None}],
+            frozenset(['name', 'username']))
+        assert snapshot.names_of_user('auser') == ['foo']
+
+    def test_capture(self, mocker) -> None:
+        mock = mocker.patch('psutil.process_iter')
+        mock.return_value = [_StubProcess('foo', 'auser')]
+
+        snapshot = processes.ProcessSnapshot.capture(['username', 'name'])
+
+        mock.assert_called_once_with(attrs=['name', 'username'])
+        assert snapshot.names() == {'foo'}
+
+    def test_capture_real_processes(self) -> None:
+        assert processes.ProcessSnapshot.capture(['name']).names()
+
+
+class TestSnapshot:
+
+    def test_captured_per_call_outside_scope(self, mocker) -> None:
+        mock = mocker.patch('psutil.process_iter', return_value=[])
+
+        processes.snapshot(['name'])
+        processes.snapshot(['name'])
+
+        assert mock.call_count == 2
+
+    def test_shared_inside_scope(self, mocker) -> None:
+        mock = mocker.patch('psutil.process_iter', return_value=[])
+
+        with processes.iteration_scope():
+            first = processes.snapshot(['name'])
+            second = processes.snapshot(['name'])
+
+        assert first is second
+        assert mock.call_count == 1
+
+    def test_dropped_after_scope(self, mocker) -> None:
+        mock = mocker.patch('psutil.process_iter', return_value=[])
+
+        with processes.iteration_scope():
+            first = processes.snapshot(['name'])
+        with processes.iteration_scope():
+            second = processes.snapshot(['name'])
+
+        assert first is not second
+        assert mock.call_count == 2
+
+    def test_recaptured_for_additional_attributes(self, mocker) -> None:
+        mock = mocker.patch('psutil.process_iter', return_value=[])
+        mocker.patch.object(processes, '_wanted', frozenset())
+
+        with processes.iteration_scope():
+            processes.snapshot(['name'])
+            snapshot = processes.snapshot(['name', 'username'])
+            assert processes.snapshot(['name']) is snapshot
+
+        assert mock.call_count == 2
+        assert snapshot.attrs == {'name', 'username'}
+
+    def test_remembers_wanted_attributes(self, mocker) -> None:
+        mock = mocker.patch('psutil.process_iter', return_value=[])
+        mocker.patch.object(processes, '_wanted', frozenset())
+
+        with processes.iteration_scope():
+            processes.snapshot(['name'])
+            processes.snapshot(['username'])
+        mock.reset_mock()
+        with processes.iteration_scope():
+            processes.snapshot(['name'])
+            processes.snapshot(['username'])
+
+        mock.assert_called_once_with(attrs=['name', 'username'])
@@ -0,0 +1,71 @@
+import time
+
+from autosuspend.util import resume
+
+
+class TestSuspendedSeconds:
+
+    def test_smoke(self) -> None:
+        assert resume.suspended_seconds() is not None
+
+    def test_unsupported_clock(self, mocker) -> None:
+        mocker.patch('time.clock_gettime', side_effect=OSError)
+        assert resume.suspended_seconds() is None
+
+
+class TestResumeDetector:
+
+    def test_nothing_detected(self, tmpdir) -> None:
+        detector = resume.ResumeDetector(tmpdir.join('file').strpath)
+        assert not detector.check()
+
+    def test_clock_difference(self, mocker) -> None:
+        clock = mocker.patch('autosuspend.util.resume.suspended_seconds')
+        clock.return_value = 10.
+        detector = resume.ResumeDetector()
+
+        clock.return_value = 10.5
+        assert not detector.check()
+        clock.return_value = 42.
+        assert detector.check()
+        assert not detector.check()
+
+    def test_clocks_unavailable(self, mocker) -> None:
+        mocker.patch('autosuspend.util.resume.suspended_seconds',
+                     return_value=None)
+        detector = resume.ResumeDetector()
+        assert not detector.check()
+
+    def test_woke_up_file(self, tmpdir) -> None:
+        woke_up_file = tmpdir.join('file')
+        detector = resume.ResumeDetector(woke_up_file.strpath)
+        woke_up_file.ensure()
+
+        assert detector.check()
+        assert not woke_up_file.check()
+        assert not detector.check()
+
+    def test_sleep_full_duration(self, mocker) -> None:
+        sleep = mocker.patch('time.sleep')
+        detector = resume.ResumeDetector()
+
+        assert not detector.sleep(2.5, 1)
+
+        assert [c[0][0] for c in sleep.call_args_list] == [1, 1, 0.5]
+
+    def test_sleep_aborted_on_resume(self, mocker) -> None:
+        clock = mocker.patch('autosuspend.util.resume.suspended_seconds')
+        clock.return_value = 0.
+        detector = resume.ResumeDetector()
+
+        def suspend(seconds: float) -> None:
+            clock.return_value = 100.
+        sleep = mocker.patch('time.sleep', side_effect=suspend)
+
+        assert detector.sleep(60, 1)
+        sleep.assert_called_once_with(1)
+
+    def test_sleep_really_sleeps(self) -> None:
+        before = time.monotonic()
+        resume.ResumeDetector().sleep(0.2, 0.05)
+        assert time.monotonic() - before >= 0.2
@@ -0,0 +1,170 @@
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import stat
+import time
+
+import pytest
+
+from autosuspend.util import state
+
+
+NOW = datetime(2020, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class TestBootTime:
+
+    def test_smoke(self) -> None:
+        booted_at = state.boot_time()
+        assert booted_at is not None
+        assert booted_at < time.time()
+
+    def test_falls_back_to_psutil(self, mocker) -> None:
+        mocker.patch('time.clock_gettime', side_effect=OSError)
+        mocker.patch('psutil.boot_time', return_value=42.)
+        assert state.boot_time() == 42.
+
+    def test_unknown(self, mocker) -> None:
+        mocker.patch('time.clock_gettime', side_effect=OSError)
+        mocker.patch('psutil.boot_time', side_effect=RuntimeError)
+        assert state.boot_time() is None
+
+
+class TestValidate:
+
+    def test_keeps_valid_state(self) -> None:
+        restored = state.State(NOW - timedelta(minutes=5),
+                               NOW - timedelta(hours=1),
+                               NOW + timedelta(hours=1))
+        assert state.validate(
+            restored, NOW,
+            (NOW - timedelta(days=1)).timestamp()) == restored
+
+    def test_unknown_boot_time(self) -> None:
+        restored = state.State(NOW - timedelta(minutes=5))
+        assert state.validate(restored, NOW, None) == restored
+
+    @pytest.mark.parametrize('restored', [
+        state.State(idle_since=NOW + timedelta(minutes=1)),
+        state.State(idle_since=NOW - timedelta(minutes=1),
+                    last_suspend=NOW + timedelta(minutes=1)),
+    ])
+    def test_future_discards_all(self, restored) -> None:
+        assert state.validate(restored, NOW, None) == state.State()
+
+    def test_discards_idle_since_before_boot(self) -> None:
+        restored = state.State(NOW - timedelta(hours=2),
+                               NOW - timedelta(hours=3))
+        assert state.validate(
+            restored, NOW, (NOW - timedelta(hours=1)).timestamp(),
+        ) == restored._replace(idle_since=None)
+
+    def test_discards_idle_since_of_outdated_state(self) -> None:
+        restored = state.State(NOW - timedelta(hours=2))
+        assert state.validate(
+            restored, NOW, None, NOW - timedelta(minutes=3), 120,
+        ) == restored._replace(idle_since=None)
+        assert state.validate(
+            restored, NOW, None, NOW - timedelta(minutes=1), 120,
+        ) == restored
+
+    def test_discards_idle_since_before_suspend(self) -> None:
+        restored = state.State(NOW - timedelta(hours=2),
+                               NOW - timedelta(hours=1))
+        assert state.validate(
+            restored, NOW, None) == restored._replace(idle_since=None)
+
+
+class TestStateFile:
+
+    def test_missing_file(self, tmpdir) -> None:
+        assert state.StateFile(
+            str(tmpdir.join('state'))).load() == state.State()
+
+    def test_round_trip(self, tmpdir) -> None:
+        path = tmpdir.join('state')
+        saved = state.State(NOW, None, NOW + timedelta(hours=1))
+
+        state.StateFile(str(path)).save(saved)
+
+        assert state.StateFile(str(path)).load() == saved
+        assert json.loads(path.read()) == {
+            'version': 1,
+            'idle_since': NOW.timestamp(),
+            'last_suspend': None,
+            'last_wakeup': (NOW + timedelta(hours=1)).timestamp(),
+        }
+        assert stat.S_IMODE(os.stat(str(path)).st_mode) == 0o600
+
+    def test_syncs(self, tmpdir, mocker) -> None:
+        sync = mocker.patch('os.fdatasync')
+        state.StateFile(str(tmpdir.join('state'))).save(state.State(NOW))
+        sync.assert_called_once()
+
+    def test_writes_only_changes(self, tmpdir, mocker) -> None:
+        write = mocker.patch('autosuspend.util.state.write_atomically')
+        state_file = state.StateFile(str(tmpdir.join('state')))
+
+        state_file.save(state.State(NOW))
+        state_file.save(state.State(NOW))
+        assert write.call_count == 1
+
+        state_file.save(state.State())
+        assert write.call_count == 2
+
+    def test_loaded_state_is_not_rewritten(self, tmpdir, mocker) -> None:
+        path = str(tmpdir.join('state'))
+        state.StateFile(path).save(state.State(NOW))
+        write = mocker.patch('autosuspend.util.state.write_atomically')
+
+        state_file = state.StateFile(path)
+        state_file.save(state_file.load())
+
+        write.assert_not_called()
+
+    def test_write_error_is_retried(self, tmpdir, mocker) -> None:
+        write = mocker.patch('autosuspend.util.state.write_atomically',
+                             side_effect=[PermissionError, None])
+        state_file = state.StateFile(str(tmpdir.join('state')))
+
+        state_file.save(state.State(NOW))
+        state_file.save(state.State(NOW))
+
+        assert write.call_count == 2
+
+    def test_updated_at(self, tmpdir) -> None:
+        path = tmpdir.join('state')
+        state_file = state.StateFile(str(path))
+        assert state_file.updated_at() is None
+
+        state_file.save(state.State(NOW))
+        os.utime(str(path), (NOW.timestamp(), NOW.timestamp()))
+        assert state_file.updated_at() == NOW
+
+    def test_touch(self, tmpdir, mocker) -> None:
+        path = tmpdir.join('state')
+        state_file = state.StateFile(str(path))
+        state_file.touch()
+        assert not path.check()
+
+        state_file.save(state.State(NOW))
+        os.utime(str(path), (NOW.timestamp(), NOW.timestamp()))
+        write = mocker.patch('autosuspend.util.state.write_atomically')
+        state_file.touch()
+
+        updated_at = state_file.updated_at()
+        assert updated_at is not None
+        assert updated_at > NOW
+        write.assert_not_called()
+
+    @pytest.mark.parametrize('content', [
+        'garbage',
+        '[]',
+        '{"version": 2}',
+        '{"version": 1, "idle_since": "yesterday"}',
+        '{"version": 1, "idle_since": 1e300}',
+    ])
+    def test_invalid_content(self, tmpdir, content) -> None:
+        path = tmpdir.join('state')
+        path.write(content)
+        assert state.StateFile(str(path)).load() == state.State()
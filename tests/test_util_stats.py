@@ -0,0 +1,16 @@
+import pytest
+
+from autosuspend.util import stats
+
+
+class TestPercentile:
+
+    @pytest.mark.parametrize('q,expected', [
+        (0, 1), (50, 3), (100, 5), (75, 4), (90, 4.6),
+    ])
+    def test_interpolates(self, q, expected) -> None:
+        assert stats.percentile([5, 1, 4, 2, 3], q) == \
+            pytest.approx(expected)
+
+    def test_single_value(self) -> None:
+        assert stats.percentile([7], 95) == 7
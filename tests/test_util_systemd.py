@@ -1,9 +1,225 @@
+from typing import Callable, Dict, List
+
 import pytest
 
-from autosuspend.util.systemd import list_logind_sessions
+from autosuspend.util import systemd
+from autosuspend.util.systemd import LogindSessionModel, list_logind_sessions
 
 
 def test_list_logind_sessions() -> None:
     pytest.importorskip('dbus')
 
     assert list_logind_sessions() is not None
+
+
+class FakeSession:
+
+    def __init__(self, bus: 'FakeBus', path: str) -> None:
+        self._bus = bus
+        self._path = path
+
+    def GetAll(self, interface: str, dbus_interface: str) -> dict:  # noqa
+        assert interface == 'org.freedesktop.login1.Session'
+        assert dbus_interface == 'org.freedesktop.DBus.Properties'
+        self._bus.calls.append(('GetAll', self._path))
+        return dict(self._bus.properties[self._path])
+
+
+class FakeManager:
+
+    def __init__(self, bus: 'FakeBus') -> None:
+        self._bus = bus
+
+    def ListSessions(self, dbus_interface: str) -> list:  # noqa
+        assert dbus_interface == 'org.freedesktop.login1.Manager'
+        self._bus.calls.append(('ListSessions', None))
+        return [(path.rsplit('/', 1)[1], 1000, 'user', 'seat0', path)
+                for path in sorted(self._bus.properties)]
+
+
+class FakeBus:
+
+    def __init__(self) -> None:
+        self.properties = {}  # type: Dict[str, dict]
+        self.receivers = {}  # type: Dict[str, Callable]
+        self.owner_callbacks = []  # type: List[Callable]
+        self.calls = []  # type: List
+
+    def get_object(self, bus_name: str, path: str):
+        assert bus_name == 'org.freedesktop.login1'
+        if path == '/org/freedesktop/login1':
+            return FakeManager(self)
+        return FakeSession(self, path)
+
+    def add_signal_receiver(self, handler, signal_name, **kwargs) -> None:
+        self.receivers[signal_name] = handler
+
+    def watch_name_owner(self, name, callback) -> None:
+        self.owner_callbacks.append(callback)
+
+    def add_session(self, session_id: str, **properties) -> str:
+        path = '/org/freedesktop/login1/session/{}'.format(session_id)
+        self.properties[path] = properties
+        return path
+
+
+@pytest.fixture
+def bus() -> FakeBus:
+    bus = FakeBus()
+    bus.add_session('c1', Type='x11', State='active', IdleHint=False)
+    bus.add_session('c2', Type='tty', State='online', IdleHint=True)
+    return bus
+
+
+class TestLogindSessionModel:
+
+    def test_initial_load(self, bus) -> None:
+        model = LogindSessionModel(bus)
+
+        assert model.sessions() == [
+            ('c1', {'Type': 'x11', 'State': 'active', 'IdleHint': False}),
+            ('c2', {'Type': 'tty', 'State': 'online', 'IdleHint': True}),
+        ]
+
+    def test_no_traffic_when_reading(self, bus) -> None:
+        model = LogindSessionModel(bus)
+        calls = len(bus.calls)
+
+        model.sessions()
+        model.sessions()
+
+        assert len(bus.calls) == calls
+
+    def test_session_new(self, bus) -> None:
+        model = LogindSessionModel(bus)
+
+        path = bus.add_session('c3', Type='wayland')
+        bus.receivers['SessionNew']('c3', path)
+
+        assert ('c3', {'Type': 'wayland'}) in model.sessions()
+
+    def test_session_new_already_gone(self, bus) -> None:
+        model = LogindSessionModel(bus)
+
+        bus.receivers['SessionNew']('c3', '/does/not/exist')
+
+        assert [s for s, _ in model.sessions()] == ['c1', 'c2']
+
+    def test_session_removed(self, bus) -> None:
+        model = LogindSessionModel(bus)
+
+        bus.receivers['SessionRemoved'](
+            'c1', '/org/freedesktop/login1/session/c1')
+
+        assert [s for s, _ in model.sessions()] == ['c2']
+
+    def test_properties_changed(self, bus) -> None:
+        model = LogindSessionModel(bus)
+
+        path = '/org/freedesktop/login1/session/c1'
+        bus.properties[path]['IdleHint'] = True
+        bus.properties[path]['State'] = 'online'
+        bus.receivers['PropertiesChanged'](
+            'org.freedesktop.login1.Session', {'IdleHint': True}, [],
+            path=path)
+
+        assert dict(model.sessions())['c1'] == {
+            'Type': 'x11', 'State': 'online', 'IdleHint': True}
+
+    @pytest.mark.parametrize('interface,path', [
+        ('org.freedesktop.login1.User',
+         '/org/freedesktop/login1/session/c1'),
+        ('org.freedesktop.login1.Session',
+         '/org/freedesktop/login1/session/unknown'),
+    ])
+    def test_properties_changed_ignored(self, bus, interface, path) -> None:
+        model = LogindSessionModel(bus)
+        calls = len(bus.calls)
+        before = model.sessions()
+
+        bus.receivers['PropertiesChanged'](interface, {}, [], path=path)
+
+        assert len(bus.calls) == calls
+        assert model.sessions() == before
+
+    def test_owner_changed(self, bus) -> None:
+        model = LogindSessionModel(bus)
+
+        bus.add_session('c3', Type='wayland')
+        for callback in bus.owner_callbacks:
+            callback(':1.42')
+
+        assert [s for s, _ in model.sessions()] == ['c1', 'c2', 'c3']
+
+    def test_owner_lost(self, bus) -> None:
+        model = LogindSessionModel(bus)
+        calls = len(bus.calls)
+
+        for callback in bus.owner_callbacks:
+            callback('')
+
+        assert len(bus.calls) == calls
+        assert len(model.sessions()) == 2
+
+
+class TestListLogindSessions:
+
+    @pytest.fixture(autouse=True)
+    def reset_model(self, mocker) -> None:
+        mocker.patch.object(systemd, '_model', None)
+        mocker.patch.object(systemd, '_model_unavailable', False)
+        mocker.patch.object(systemd, '_model_retry_at', None)
+
+    def test_uses_shared_model(self, bus, mocker) -> None:
+        create = mocker.patch('autosuspend.util.systemd._create_model',
+                              return_value=LogindSessionModel(bus))
+
+        first = list_logind_sessions()
+        calls = len(bus.calls)
+        second = list_logind_sessions()
+
+        assert first == second
+        assert [s for s, _ in first] == ['c1', 'c2']
+        assert len(bus.calls) == calls
+        create.assert_called_once_with()
+
+    def test_model_unavailable(self, mocker) -> None:
+        create = mocker.patch('autosuspend.util.systemd._create_model',
+                              side_effect=ImportError)
+
+        assert systemd.logind_session_model() is None
+        assert systemd.logind_session_model() is None
+        create.assert_called_once_with()
+
+    def test_model_dbus_error(self, mocker) -> None:
+        dbus = pytest.importorskip('dbus')
+        pytest.importorskip('gi')
+        bus = mocker.patch('dbus.SystemBus',
+                           side_effect=dbus.exceptions.DBusException)
+
+        assert systemd.logind_session_model() is None
+        assert bus.call_count == 1
+
+    def test_model_dbus_error_closes_bus(self, mocker) -> None:
+        dbus = pytest.importorskip('dbus')
+        pytest.importorskip('gi')
+        bus = mocker.patch('dbus.SystemBus')
+        mocker.patch('autosuspend.util.systemd.LogindSessionModel',
+                     side_effect=dbus.exceptions.DBusException)
+
+        assert systemd.logind_session_model() is None
+        bus.return_value.close.assert_called_once_with()
+
+    def test_model_failure_retried_after_delay(self, mocker) -> None:
+        create = mocker.patch('autosuspend.util.systemd._create_model',
+                              return_value=None)
+        monotonic = mocker.patch('time.monotonic', return_value=100.)
+
+        assert systemd.logind_session_model() is None
+        monotonic.return_value = 100. + systemd._MODEL_RETRY_DELAY - 1
+        assert systemd.logind_session_model() is None
+        # not permanent, unlike missing dependencies
+        assert create.call_count == 1
+        monotonic.return_value = 100. + systemd._MODEL_RETRY_DELAY
+        assert systemd.logind_session_model() is None
+        assert create.call_count == 2
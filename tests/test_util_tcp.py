@@ -0,0 +1,144 @@
+from collections import namedtuple
+import socket
+
+import psutil
+import pytest
+
+from autosuspend.util import tcp
+
+
+snicaddr = namedtuple(
+    'snicaddr', ['family', 'address', 'netmask', 'broadcast', 'ptp'])
+
+HEADER = ('  sl  local_address rem_address   st tx_queue rx_queue tr '
+          'tm->when retrnsmt   uid  timeout inode\n')
+
+
+@pytest.fixture
+def tables(tmpdir, monkeypatch):
+    ipv4 = tmpdir.join('tcp')
+    ipv6 = tmpdir.join('tcp6')
+    monkeypatch.setattr(tcp, 'TCP_TABLES', [
+        (socket.AF_INET, ipv4.strpath), (socket.AF_INET6, ipv6.strpath)])
+    return ipv4, ipv6
+
+
+class TestEstablishedConnections:
+
+    def test_smoke(self) -> None:
+        tcp.established_connections()
+
+    def test_ipv4(self, tables) -> None:
+        ipv4, ipv6 = tables
+        ipv4.write(
+            HEADER +
+            '   0: 0100007F:0016 0100007F:A1B2 01 00000000:00000000 00:0\n'
+            '   1: 00000000:0050 00000000:0000 0A 00000000:00000000 00:0\n')
+        ipv6.write(HEADER)
+
+        assert tcp.established_connections() == [
+            tcp.Connection(socket.AF_INET, ('127.0.0.1', 22),
+                           ('127.0.0.1', 0xA1B2)),
+        ]
+
+    def test_ipv6(self, tables) -> None:
+        ipv4, ipv6 = tables
+        ipv4.write(HEADER)
+        ipv6.write(
+            HEADER +
+            '   0: 00000000000000000000000001000000:0016 '
+            '0000000000000000FFFF00000100007F:1234 01 00000000:00000000\n')
+
+        assert tcp.established_connections() == [
+            tcp.Connection(socket.AF_INET6, ('::1', 22),
+                           ('::ffff:127.0.0.1', 0x1234)),
+        ]
+
+    def test_port_filter(self, tables) -> None:
+        ipv4, _ = tables
+        ipv4.write(
+            HEADER +
+            '   0: 0100007F:0016 0100007F:A1B2 01 00000000:00000000 00:0\n'
+            '   1: 0100007F:0017 0100007F:A1B3 01 00000000:00000000 00:0\n')
+
+        connections = tcp.established_connections({23})
+
+        assert [c.laddr for c in connections] == [('127.0.0.1', 23)]
+
+    def test_missing_ipv6_table(self, tables) -> None:
+        ipv4, _ = tables
+        ipv4.write(HEADER)
+
+        assert tcp.established_connections() == []
+
+    def test_missing_ipv4_table(self, tables) -> None:
+        _, ipv6 = tables
+        ipv6.write(HEADER)
+
+        with pytest.raises(OSError):
+            tcp.established_connections()
+
+    def test_matches_psutil(self) -> None:
+        try:
+            expected = {
+                (c.family, tuple(c.laddr), tuple(c.raddr))
+                for c in psutil.net_connections(kind='tcp')
+                if c.status == psutil.CONN_ESTABLISHED}
+        except psutil.AccessDenied:
+            pytest.skip('Connections not accessible')
+
+        actual = {(c.family, c.laddr, c.raddr)
+                  for c in tcp.established_connections()}
+
+        # connections might appear or vanish in between
+        assert len(expected ^ actual) <= 2
+
+
+class TestLocalAddresses:
+
+    @pytest.fixture
+    def addresses(self, mocker):
+        mock = mocker.patch('psutil.net_if_addrs')
+        mock.return_value = {'lo': [
+            snicaddr(socket.AF_INET, '127.0.0.1', '255.0.0.0', None, None),
+            snicaddr(socket.AF_INET6, 'fe80::1%lo', 'ffff::', None, None),
+        ]}
+        return mock
+
+    def test_contains(self, addresses) -> None:
+        local = tcp.LocalAddresses()
+
+        assert (socket.AF_INET, '127.0.0.1') in local
+        assert (socket.AF_INET6, 'fe80::1') in local
+        assert (socket.AF_INET6, '127.0.0.1') not in local
+
+    def test_cached(self, addresses) -> None:
+        local = tcp.LocalAddresses()
+
+        assert (socket.AF_INET, '127.0.0.1') in local
+        assert (socket.AF_INET, '127.0.0.1') in local
+        assert addresses.call_count == 1
+
+    def test_miss_refreshes_rate_limited(self, addresses, mocker) -> None:
+        clock = mocker.patch('time.monotonic', return_value=100.)
+        local = tcp.LocalAddresses(min_refresh=10.)
+
+        assert (socket.AF_INET, '10.0.0.1') not in local
+        assert addresses.call_count == 1
+
+        clock.return_value = 111.
+        addresses.return_value['eth0'] = [
+            snicaddr(socket.AF_INET, '10.0.0.1', '255.0.0.0', None, None)]
+        assert (socket.AF_INET, '10.0.0.1') in local
+        assert addresses.call_count == 2
+
+    def test_interface_change_refreshes(self, addresses, mocker) -> None:
+        signature = mocker.patch(
+            'autosuspend.util.tcp._interface_signature',
+            return_value=frozenset({(1, 'lo')}))
+        local = tcp.LocalAddresses()
+
+        assert (socket.AF_INET, '127.0.0.1') in local
+        signature.return_value = frozenset({(1, 'lo'), (2, 'eth0')})
+        assert (socket.AF_INET, '127.0.0.1') in local
+        assert addresses.call_count == 2
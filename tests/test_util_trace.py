@@ -0,0 +1,135 @@
+import json
+import time
+
+import pytest
+
+from autosuspend.util import trace
+
+
+class TestTrace:
+
+    def test_record_check(self) -> None:
+        recorder = trace.Trace()
+        recorder.record_check('foo', 'activity', 0.5, 0.1, 'busy')
+
+        record = recorder.records()[0]
+        assert record['kind'] == 'check'
+        assert record['check'] == 'foo'
+        assert record['type'] == 'activity'
+        assert record['wall'] == 0.5
+        assert record['cpu'] == 0.1
+        assert record['result'] == 'busy'
+        assert record['error'] is None
+        assert record['timestamp'] == pytest.approx(time.time(), abs=10)
+
+    def test_record_error(self) -> None:
+        recorder = trace.Trace()
+        recorder.record_check('foo', 'wakeup', 0.5, None, None,
+                              RuntimeError('boom'))
+
+        assert recorder.records()[0]['error'] == 'RuntimeError'
+
+    def test_record_sleep_lag(self) -> None:
+        recorder = trace.Trace()
+        recorder.record_sleep(60, 60.5, False)
+
+        record = recorder.records()[0]
+        assert record['lag'] == pytest.approx(0.5)
+        assert not record['interrupted']
+
+    def test_capacity(self) -> None:
+        recorder = trace.Trace(capacity=3)
+        for i in range(5):
+            recorder.record_iteration(i, i, False, None)
+
+        assert [r['wall'] for r in recorder.records()] == [2, 3, 4]
+
+    def test_json_lines(self) -> None:
+        recorder = trace.Trace()
+        recorder.record_iteration(1.5, 0.5, True, 42.)
+
+        lines = list(recorder.json_lines())
+        assert len(lines) == 1
+        assert json.loads(lines[0])['wakeup_at'] == 42.
+
+    def test_flush_appends_new_records(self, tmpdir) -> None:
+        path = tmpdir.join('trace.jsonl')
+        recorder = trace.Trace(path=str(path))
+        recorder.record_iteration(1, 1, False, None)
+        recorder.flush()
+        recorder.flush()
+        recorder.record_iteration(2, 2, False, None)
+        recorder.flush()
+
+        records = [json.loads(line) for line in path.readlines()]
+        assert [r['wall'] for r in records] == [1, 2]
+
+    def test_flush_without_path(self, tmpdir) -> None:
+        recorder = trace.Trace()
+        recorder.record_iteration(1, 1, False, None)
+        recorder.flush()
+
+    def test_flush_error_is_logged(self, tmpdir, caplog) -> None:
+        recorder = trace.Trace(path=str(tmpdir.join('missing', 'trace')))
+        recorder.record_iteration(1, 1, False, None)
+        recorder.flush()
+
+        assert 'Unable to write trace' in caplog.text
+
+    def test_summary(self) -> None:
+        recorder = trace.Trace()
+        for wall in range(1, 101):
+            recorder.record_check('slow', 'activity', wall, None, None)
+        recorder.record_check('fast', 'activity', 0.1, None, None,
+                              RuntimeError())
+        recorder.record_iteration(1, 1, False, None)
+
+        summary = recorder.summary()
+        assert set(summary) == {'slow', 'fast'}
+        assert summary['slow']['count'] == 100
+        assert summary['slow']['errors'] == 0
+        assert summary['slow']['p50'] == pytest.approx(50.5)
+        assert summary['slow']['p95'] == pytest.approx(95.05)
+        assert summary['slow']['max'] == 100
+        assert summary['fast']['errors'] == 1
+
+    def test_format_summary_slowest_first(self) -> None:
+        recorder = trace.Trace()
+        recorder.record_check('fast', 'activity', 0.1, None, None)
+        recorder.record_check('slow', 'activity', 2, None, None)
+
+        lines = recorder.format_summary().splitlines()
+        assert lines[0].startswith('check')
+        assert lines[1].startswith('slow')
+        assert lines[2].startswith('fast')
+
+
+class TestTimed:
+
+    def test_measures_cpu(self) -> None:
+        cpu, call = trace.timed(sum, range(100000))
+        assert cpu() is None
+
+        assert call() == sum(range(100000))
+        used = cpu()
+        assert used is not None
+        assert used > 0
+
+    def test_measures_on_error(self) -> None:
+        def fail() -> None:
+            raise ValueError()
+        cpu, call = trace.timed(fail)
+
+        with pytest.raises(ValueError):
+            call()
+        assert cpu() is not None
+
+
+def test_configure() -> None:
+    previous = trace.get_trace()
+    try:
+        configured = trace.configure(10, None)
+        assert trace.get_trace() is configured
+        assert configured is not previous
+    finally:
+        trace._trace = previous
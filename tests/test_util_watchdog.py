@@ -0,0 +1,80 @@
+import os
+import subprocess
+import threading
+import time
+
+import psutil
+import pytest
+
+from autosuspend.util.watchdog import (ExecutionTimeout,
+                                       run_with_timeout,
+                                       subprocess_kwargs)
+
+
+class TestSubprocessKwargs:
+
+    def test_unsupervised_without_env(self) -> None:
+        assert subprocess_kwargs() == {}
+
+    def test_unsupervised_with_env(self) -> None:
+        assert subprocess_kwargs({'A': 'b'}) == {'env': {'A': 'b'}}
+
+    def test_supervised_marks_environment(self) -> None:
+        kwargs = run_with_timeout(lambda: subprocess_kwargs({'A': 'b'}), 5)
+        assert kwargs['env']['A'] == 'b'
+        assert len(kwargs['env']) == 2
+
+    def test_supervised_inherits_environment(self) -> None:
+        kwargs = run_with_timeout(subprocess_kwargs, 5)
+        assert set(os.environ).issubset(kwargs['env'])
+
+
+class TestRunWithTimeout:
+
+    def test_result(self) -> None:
+        assert run_with_timeout(lambda: 42, 5) == 42
+
+    def test_exception_propagates(self) -> None:
+        def fail():
+            raise KeyError('foo')
+
+        with pytest.raises(KeyError):
+            run_with_timeout(fail, 5)
+
+    def test_timeout(self) -> None:
+        event = threading.Event()
+        try:
+            with pytest.raises(ExecutionTimeout):
+                run_with_timeout(lambda: event.wait(5), 0.1)
+        finally:
+            event.set()
+
+    def test_timeout_provides_pending_call(self) -> None:
+        event = threading.Event()
+        try:
+            with pytest.raises(ExecutionTimeout) as error:
+                run_with_timeout(lambda: event.wait(5) and 42, 0.1)
+            assert error.value.pending is not None
+            assert not error.value.pending.done()
+        finally:
+            event.set()
+        assert error.value.pending.result(5) == 42
+
+    def test_kills_process_tree(self) -> None:
+        started = []
+
+        def spawn():
+            process = subprocess.Popen(
+                'sleep 30; true', shell=True, **subprocess_kwargs())
+            started.append(process)
+            process.wait()
+
+        before = time.monotonic()
+        with pytest.raises(ExecutionTimeout):
+            run_with_timeout(spawn, 2)
+        assert time.monotonic() - before < 10
+
+        # the shell has been killed and the sleep child with it
+        assert started[0].wait(5) == -9
+        assert 'sleep' not in [
+            p.name() for p in psutil.Process().children(recursive=True)]
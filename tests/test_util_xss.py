@@ -0,0 +1,112 @@
+import socket
+import struct
+
+import pytest
+
+from autosuspend.util import xss
+
+
+def xauthority_entry(family: int, address: bytes, number: bytes,
+                     name: bytes, data: bytes) -> bytes:
+    result = struct.pack('!H', family)
+    for field in (address, number, name, data):
+        result += struct.pack('!H', len(field)) + field
+    return result
+
+
+class TestReadXauthority:
+
+    def test_missing_file(self, tmpdir) -> None:
+        assert xss.read_xauthority(tmpdir.join('nope').strpath, 0) is None
+
+    def test_matching_display(self, tmpdir) -> None:
+        path = tmpdir.join('.Xauthority')
+        path.write_binary(
+            xauthority_entry(256, b'other', b'1', b'MIT-MAGIC-COOKIE-1',
+                             b'one') +
+            xauthority_entry(0, b'\x7f\x00\x00\x01', b'0',
+                             b'MIT-MAGIC-COOKIE-1', b'network') +
+            xauthority_entry(256, b'other', b'0', b'MIT-MAGIC-COOKIE-1',
+                             b'zero'))
+
+        assert xss.read_xauthority(path.strpath, 0) == (
+            b'MIT-MAGIC-COOKIE-1', b'zero')
+        assert xss.read_xauthority(path.strpath, 1) == (
+            b'MIT-MAGIC-COOKIE-1', b'one')
+        assert xss.read_xauthority(path.strpath, 2) is None
+
+    def test_prefers_host_name(self, tmpdir) -> None:
+        path = tmpdir.join('.Xauthority')
+        path.write_binary(
+            xauthority_entry(256, b'other', b'0', b'MIT-MAGIC-COOKIE-1',
+                             b'other') +
+            xauthority_entry(256, socket.gethostname().encode(), b'0',
+                             b'MIT-MAGIC-COOKIE-1', b'mine'))
+
+        assert xss.read_xauthority(path.strpath, 0) == (
+            b'MIT-MAGIC-COOKIE-1', b'mine')
+
+    def test_wildcard(self, tmpdir) -> None:
+        path = tmpdir.join('.Xauthority')
+        path.write_binary(xauthority_entry(65535, b'', b'',
+                                           b'MIT-MAGIC-COOKIE-1', b'wild'))
+
+        assert xss.read_xauthority(path.strpath, 3) == (
+            b'MIT-MAGIC-COOKIE-1', b'wild')
+
+    def test_truncated(self, tmpdir) -> None:
+        path = tmpdir.join('.Xauthority')
+        path.write_binary(xauthority_entry(256, b'host', b'0',
+                                           b'MIT-MAGIC-COOKIE-1',
+                                           b'cookie')[:-2])
+
+        with pytest.raises(xss.XssError):
+            xss.read_xauthority(path.strpath, 0)
+
+
+class TestConnectionClosed:
+
+    def test_open(self) -> None:
+        first, second = socket.socketpair()
+        with first, second:
+            assert not xss._connection_closed(first.fileno())
+
+    def test_pending_data(self) -> None:
+        first, second = socket.socketpair()
+        with first, second:
+            second.sendall(b'event')
+            assert not xss._connection_closed(first.fileno())
+            # data must not be consumed
+            assert first.recv(5) == b'event'
+
+    def test_closed(self) -> None:
+        first, second = socket.socketpair()
+        with first:
+            second.close()
+            assert xss._connection_closed(first.fileno())
+
+
+class TestIdleTimeQuery:
+
+    @pytest.fixture
+    def query(self):
+        try:
+            query = xss.IdleTimeQuery()
+        except xss.XssUnavailable:
+            pytest.skip('libXss is not installed')
+        yield query
+        query.close()
+
+    def test_display_not_available(self, query, tmpdir) -> None:
+        with pytest.raises(xss.XssError):
+            query.idle_time(4242, tmpdir.join('.Xauthority').strpath)
+
+    def test_safe(self, query) -> None:
+        assert query.safe == xss._load().has_exit_handler
+
+    def test_unavailable(self, mocker) -> None:
+        mocker.patch('ctypes.util.find_library', return_value=None)
+        mocker.patch.object(xss, '_libraries', None)
+
+        with pytest.raises(xss.XssUnavailable):
+            xss.IdleTimeQuery()